@@ -6,6 +6,9 @@ from theme import create_styled_frame, create_styled_label, create_styled_button
 from data_handler import load_data, save_data, get_next_id # Import necessary data functions
 from datetime import datetime
 from ui_elements import show_error, show_success
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class ExpensesBillsManager:
     def __init__(self, root, current_language, languages, back_callback):
@@ -31,17 +34,17 @@ class ExpensesBillsManager:
 
     def load_data(self):
         """Load expenses and bills data"""
-        print("[DEBUG] Loading expenses and bills data...")
+        logger.debug("Loading expenses and bills data...")
         self.expenses = load_data('expenses') or []
         self.bills = load_data('bills') or []
-        print(f"[DEBUG] Loaded {len(self.expenses)} expenses and {len(self.bills)} bills")
+        logger.debug("Loaded %s expenses and %s bills", len(self.expenses), len(self.bills))
 
     def save_data(self):
         """Save expenses and bills data"""
-        print("[DEBUG] Saving expenses and bills data...")
+        logger.debug("Saving expenses and bills data...")
         save_data('expenses', self.expenses)
         save_data('bills', self.bills)
-        print("[DEBUG] Expenses and bills data saved")
+        logger.debug("Expenses and bills data saved")
 
     def create_expenses_bills_interface(self):
         """Create the expenses and bills interface"""
@@ -148,7 +151,7 @@ class ExpensesBillsManager:
                     # Default string sorting for other columns
                     all_entries = sorted(all_entries, key=lambda x: str(x.get(self.sort_column, '')).lower(), reverse=(self.sort_order == 'desc'))
             except Exception as e:
-                print(f"[ERROR] Error during sorting: {e}")
+                logger.error("Error during sorting: %s", e)
                 # Fallback to unsorted if sorting fails
                 pass
 
@@ -1,7 +1,12 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
-from ui_elements import show_error, show_success
-from data_handler import load_data, save_data, get_next_id, import_from_excel
+from ui_elements import show_error, show_success, debounce, VirtualList
+from data_handler import load_data, save_data, get_next_id, import_from_excel, record_sale, find_by_barcode
+from data_worker import run_in_background
+from product_search import search_products
+from thumbnails import get_thumbnail, LIST_SIZE
+from schema import compact_sale_item
+from constants import SEARCH_DEBOUNCE_MS
 from theme import (
     COLORS, FONTS, create_styled_button,
     create_styled_entry, create_styled_frame,
@@ -10,7 +15,9 @@ from theme import (
 from datetime import datetime
 # Import for image handling
 import os
-from PIL import Image
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class RecordSale:
     def __init__(self, root, current_language, languages, back_callback):
@@ -19,9 +26,12 @@ class RecordSale:
         self.LANGUAGES = languages
         self.back_callback = back_callback
         self.cart = []
+        self.checkout_in_progress = False
         self.products = load_data("products") or []
         self.products = [p for p in self.products if p.get('status', 'Active') == 'Active']
         self.sale_type = 'wholesale'  # الافتراضي جملة
+        # Logged-in account, stored on each sale for the per-employee reports
+        self.employee = None
 
     def refresh_products(self):
         """Refresh the products list from database and update display"""
@@ -29,92 +39,18 @@ class RecordSale:
         try:
             # Load products from database
             all_products = load_data("products") or []
-            print(f"[DEBUG] Loaded products count: {len(all_products)}")
-            print(f"[DEBUG] Loaded products: {all_products}")
+            logger.debug("Loaded products count: %s", len(all_products))
             # Filter out deleted or inactive products
             self.products = [p for p in all_products if p.get('status', 'Active') == 'Active']
-            print(f"[DEBUG] Active products count: {len(self.products)}")
-            print(f"[DEBUG] Active products: {self.products}")
+            logger.debug("Active products count: %s", len(self.products))
             
             # If the UI frames exist, update them
             if hasattr(self, 'products_frame') and self.products_frame.winfo_exists():
-                # Clear current products
-                for widget in self.products_frame.winfo_children():
-                    widget.destroy()
-                
-                # Check if there are active products to display
-                if not self.products:
-                    no_products_label = create_styled_label(
-                        self.products_frame,
-                        text=self.LANGUAGES[self.current_language].get("no_active_products", "No active products found."),
-                        style='body'
-                    )
-                    no_products_label.pack(pady=20)
-                else:
-                    # Add products to display
-                    for product in self.products:
-                        try:
-                            product_frame = create_styled_frame(self.products_frame, style='card')
-                            product_frame.pack(fill='x', padx=10, pady=5)
-                            
-                            # Image display
-                            image_path = product.get('image_path')
-                            if isinstance(image_path, str) and image_path and os.path.exists(image_path):
-                                try:
-                                    img = Image.open(image_path)
-                                    img.thumbnail((50, 50)) # Resize for list view
-                                    # Use CTkImage for compatibility with customtkinter
-                                    img_tk = ctk.CTkImage(light_image=img, dark_image=img, size=(50, 50))
-                                    image_label = ctk.CTkLabel(product_frame, image=img_tk, text="")
-                                    image_label.image = img_tk # Keep a reference!
-                                except Exception as e:
-                                    print(f"[ERROR] Could not load product image {image_path}: {e}")
-                                    image_label = create_styled_label(product_frame, text=self.LANGUAGES[self.current_language].get("error_loading_image", "Error loading image"), style='small')
-                            else:
-                                 image_label = create_styled_label(product_frame, text=self.LANGUAGES[self.current_language].get("no_image", "No Image"), style='small')
-
-                            image_label.pack(side='left', padx=10, pady=5) # Pack image to the left
-
-                            # Product details
-                            details_frame = create_styled_frame(product_frame, style='card')
-                            details_frame.pack(side='left', fill='x', expand=True, padx=(0, 10), pady=10) # Pack details next to image
-                            
-                            name_label = create_styled_label(
-                                details_frame,
-                                text=product.get('name', ''),
-                                style='subheading'
-                            )
-                            name_label.pack(side='left', padx=10)
-
-                            # عرض الكميات المتاحة جملة وقطاعي
-                            qty_text = f" | {self.LANGUAGES[self.current_language].get('wholesale_quantity', 'Wholesale Qty')}: {product.get('quantity', 0)}"
-                            qty_text += f" | {self.LANGUAGES[self.current_language].get('retail_quantity', 'Retail Qty')}: {product.get('retail_quantity', 0)}"
-                            qty_label = create_styled_label(
-                                details_frame,
-                                text=qty_text,
-                                style='small'
-                            )
-                            qty_label.pack(side='left', padx=10)
-                            
-                            price_label = create_styled_label(
-                                details_frame,
-                                text=f"${float(product.get('price', 0) or 0):.2f}",
-                                style='body'
-                            )
-                            price_label.pack(side='left', padx=10)
-                            
-                            # Add to cart button
-                            add_button = create_styled_button(
-                                product_frame,
-                                text=self.LANGUAGES[self.current_language].get("add_to_cart", "Add to Cart"),
-                                style='primary',
-                                width=120,
-                                command=lambda p=product: self.add_to_cart(p)
-                            )
-                            add_button.pack(side='right', padx=10, pady=10)
-                        except Exception as e:
-                            print(f"[DEBUG] Error adding product: {e}")
-                    
+                self.products_frame.set_items(
+                    self.products,
+                    self.LANGUAGES[self.current_language].get("no_active_products", "No active products found.")
+                )
+                if self.products:
                     # Update cart display as well if it exists and the cart is not empty
                     if hasattr(self, 'cart_frame') and self.cart_frame.winfo_exists():
                          self.update_cart_display()
@@ -122,9 +58,65 @@ class RecordSale:
         except Exception as e:
             import traceback
             traceback_str = traceback.format_exc()
-            print(f"[TRACEBACK] {traceback_str}")
+            logger.error("%s", traceback_str)
             show_error(f"Error refreshing products: {str(e)}", self.current_language)
 
+    def _create_product_row(self, parent):
+        """One reusable product card for the product list"""
+        texts = self.LANGUAGES[self.current_language]
+        row = create_styled_frame(parent, style='card')
+        row.grid_columnconfigure(1, weight=1)
+        # Image and placeholder share a cell; binding shows one of them
+        row.image_label = ctk.CTkLabel(row, text="")
+        row.image_label.grid(row=0, column=0, padx=10, pady=5)
+        row.no_image_label = create_styled_label(row, text=texts.get("no_image", "No Image"), style='small')
+        row.no_image_label.grid(row=0, column=0, padx=10, pady=5)
+
+        details_frame = create_styled_frame(row, style='card')
+        details_frame.grid(row=0, column=1, sticky='ew', padx=(0, 10), pady=10)
+        row.name_label = create_styled_label(details_frame, text="", style='subheading')
+        row.name_label.pack(side='left', padx=10)
+        row.qty_label = create_styled_label(details_frame, text="", style='small')
+        row.qty_label.pack(side='left', padx=10)
+        row.price_label = create_styled_label(details_frame, text="", style='body')
+        row.price_label.pack(side='left', padx=10)
+
+        row.add_button = create_styled_button(
+            row,
+            text=texts.get("add_to_cart", "Add to Cart"),
+            style='primary',
+            width=120
+        )
+        row.add_button.grid(row=0, column=2, padx=10, pady=10)
+        return row
+
+    def _bind_product_row(self, row, product):
+        """Show a product in a recycled product row"""
+        texts = self.LANGUAGES[self.current_language]
+        image = None
+        placeholder = texts.get("no_image", "No Image")
+        image_path = product.get('image_path')
+        if isinstance(image_path, str) and image_path and os.path.exists(image_path):
+            image = get_thumbnail(image_path, LIST_SIZE)
+            if image is None:
+                placeholder = texts.get("error_loading_image", "Error loading image")
+        if image is not None:
+            row.image_label.configure(image=image)
+            row.image_label.grid()
+            row.no_image_label.grid_remove()
+        else:
+            row.no_image_label.configure(text=placeholder)
+            row.no_image_label.grid()
+            row.image_label.grid_remove()
+
+        row.name_label.configure(text=product.get('name', ''))
+        # عرض الكميات المتاحة جملة وقطاعي
+        qty_text = f" | {texts.get('wholesale_quantity', 'Wholesale Qty')}: {product.get('quantity', 0)}"
+        qty_text += f" | {texts.get('retail_quantity', 'Retail Qty')}: {product.get('retail_quantity', 0)}"
+        row.qty_label.configure(text=qty_text)
+        row.price_label.configure(text=f"${float(product.get('price', 0) or 0):.2f}")
+        row.add_button.configure(command=lambda p=product: self.add_to_cart(p))
+
     def update_cart_display(self):
         """Update the cart display with current items"""
         try:
@@ -269,6 +261,21 @@ class RecordSale:
         )
         retail_radio.pack(side='left', padx=10)
         
+        # Customer the sale is for (first option: walk-in, no customer)
+        customer_frame = create_styled_frame(left_frame, style='card')
+        customer_frame.pack(fill='x', padx=20, pady=(0, 10))
+        customer_label = create_styled_label(
+            customer_frame,
+            text=self.LANGUAGES[self.current_language].get('customer', 'Customer:'),
+            style='body'
+        )
+        customer_label.pack(side='left', padx=10, pady=10)
+        self.walk_in_customer = self.LANGUAGES[self.current_language].get('walk_in_customer', 'Walk-in')
+        customer_names = sorted({str(c['name']) for c in load_data('customers') or [] if c.get('name')})
+        self.customer_menu = ctk.CTkOptionMenu(customer_frame, values=[self.walk_in_customer] + customer_names)
+        self.customer_menu.set(self.walk_in_customer)
+        self.customer_menu.pack(side='left', padx=10, pady=10, fill='x', expand=True)
+        
         # Search section
         search_frame = create_styled_frame(left_frame, style='card')
         search_frame.pack(fill='x', padx=20, pady=(0, 20))
@@ -280,10 +287,11 @@ class RecordSale:
             textvariable=self.search_var
         )
         search_entry.pack(side='left', padx=20, pady=20, fill='x', expand=True)
-        self.search_var.trace_add('write', lambda *args: self.filter_products())
+        self.search_var.trace_add('write', debounce(search_entry, SEARCH_DEBOUNCE_MS, self.filter_products))
         
         # Products list
-        self.products_frame = ctk.CTkScrollableFrame(left_frame, orientation='vertical')
+        # Only the visible rows exist; they are rebound as the list scrolls
+        self.products_frame = VirtualList(left_frame, self._create_product_row, self._bind_product_row, row_height=80)
         self.products_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
         
         # عرض كل المنتجات مباشرة عند فتح الشاشة
@@ -378,54 +386,68 @@ class RecordSale:
             show_error(f"Error removing from cart: {str(e)}", self.current_language)
 
     def checkout(self):
-        """Process the sale"""
-        try:
-            if not self.cart:
-                show_error(self.LANGUAGES[self.current_language].get("empty_cart", "Cart is empty"), self.current_language)
-                return
-            sale = {
-                'id': get_next_id('sales_journal'),
-                'items': self.cart,
-                'total': sum(float(item['product'].get('price', 0)) * item['quantity'] for item in self.cart),
-                'date': str(datetime.now())
-            }
-            sales = load_data("sales_journal") or []
-            sales.append(sale)
-            save_data("sales_journal", sales)
-            inventory_updated = False
-            products_to_update = load_data("products") or []
-            for item in self.cart:
-                for product in products_to_update:
-                    if product.get('id') == item['product'].get('id'):
-                        if item.get('sale_type') == 'wholesale':
-                            current_quantity = product.get('quantity', 0)
-                            if isinstance(current_quantity, (int, float)):
-                                product['quantity'] = current_quantity - item['quantity']
-                                inventory_updated = True
-                        elif item.get('sale_type') == 'retail':
-                            current_quantity = product.get('retail_quantity', 0)
-                            if isinstance(current_quantity, (int, float)):
-                                product['retail_quantity'] = current_quantity - item['quantity']
-                                inventory_updated = True
-                        break
-            if inventory_updated:
-                save_data("products", products_to_update)
-            self.cart = []
-            self.update_cart_display()
-            show_success(self.LANGUAGES[self.current_language].get("sale_recorded", "Sale recorded successfully"), self.current_language)
-        except Exception as e:
-            show_error(f"Error processing checkout: {str(e)}", self.current_language)
+        """Process the sale on the data worker"""
+        if not self.cart:
+            show_error(self.LANGUAGES[self.current_language].get("empty_cart", "Cart is empty"), self.current_language)
+            return
+        if self.checkout_in_progress:
+            return
+        self.checkout_in_progress = True
+        customer = self.customer_menu.get()
+        if customer == self.walk_in_customer:
+            customer = None
+        run_in_background(
+            self.root, self._record_checkout, list(self.cart), customer,
+            on_done=self._on_checkout_done,
+            on_error=self._on_checkout_failed,
+            loading_message=self.LANGUAGES[self.current_language].get("processing", "Processing..."),
+            write=True
+        )
+
+    def _record_checkout(self, cart, customer=None):
+        """Save the sale and update stock; runs on the data worker"""
+        # Store a snapshot of each line, not the whole product document
+        items = [compact_sale_item(item) for item in cart]
+        sale = {
+            'id': get_next_id('sales_journal'),
+            'items': items,
+            'total': sum(item['line_total'] for item in items),
+            'date': str(datetime.now())
+        }
+        # Sales without them count as 'Unknown' in the employee/customer reports
+        if self.employee:
+            sale['employee'] = self.employee
+        if customer:
+            sale['customer'] = customer
+        stock_fields = {'wholesale': 'quantity', 'retail': 'retail_quantity'}
+        stock_changes = [
+            {'id': item['product'].get('id'), 'field': stock_fields[item.get('sale_type')], 'quantity': item['quantity']}
+            for item in cart
+            if item.get('sale_type') in stock_fields
+        ]
+        return record_sale(sale, stock_changes)
+
+    def _on_checkout_done(self, sale):
+        self.checkout_in_progress = False
+        self.cart = []
+        if self.customer_menu.winfo_exists():
+            self.customer_menu.set(self.walk_in_customer)
+        self.update_cart_display()
+        show_success(self.LANGUAGES[self.current_language].get("sale_recorded", "Sale recorded successfully"), self.current_language)
+
+    def _on_checkout_failed(self, error):
+        self.checkout_in_progress = False
+        show_error(f"Error processing checkout: {str(error)}", self.current_language)
 
     def handle_barcode_entry(self, event=None):
         """Handle barcode entry and add product to cart if found"""
         barcode = self.barcode_entry.get().strip()
         if not barcode:
             return
-        found_product = None
-        for product in self.products:
-            if str(product.get('barcode', '')).strip() == barcode:
-                found_product = product
-                break
+        # Look up the whole catalog, not just what the search box left in self.products
+        found_product = find_by_barcode(barcode)
+        if found_product and found_product.get('status', 'Active') != 'Active':
+            found_product = None
         if found_product:
             self.add_to_cart(found_product)
             self.barcode_entry.delete(0, 'end')
@@ -438,70 +460,9 @@ class RecordSale:
 
     def filter_products(self):
         """تصفية المنتجات حسب البحث أو عرض الكل إذا كان الحقل فارغاً"""
-        query = self.search_var.get().strip().lower()
-        all_products = load_data("products") or []
-        print(f"[DEBUG] Loaded {len(all_products)} products: {[p.get('name') for p in all_products]}")
-        filtered = all_products
-        if query:
-            filtered = [p for p in filtered if query in str(p.get('name', '')).lower() or query in str(p.get('barcode', '')).lower()]
-        self.products = filtered
+        self.products = search_products(self.search_var.get())
         if hasattr(self, 'products_frame') and self.products_frame.winfo_exists():
-            for widget in self.products_frame.winfo_children():
-                widget.destroy()
-            if not self.products:
-                no_products_label = create_styled_label(
-                    self.products_frame,
-                    text=self.LANGUAGES[self.current_language].get("no_active_products", "No products found."),
-                    style='body'
-                )
-                no_products_label.pack(pady=20)
-            else:
-                for product in self.products:
-                    try:
-                        product_frame = create_styled_frame(self.products_frame, style='card')
-                        product_frame.pack(fill='x', padx=10, pady=5)
-                        image_path = product.get('image_path')
-                        if isinstance(image_path, str) and image_path and os.path.exists(image_path):
-                            try:
-                                img = Image.open(image_path)
-                                img.thumbnail((50, 50))
-                                img_tk = ctk.CTkImage(light_image=img, dark_image=img, size=(50, 50))
-                                image_label = ctk.CTkLabel(product_frame, image=img_tk, text="")
-                                image_label.image = img_tk
-                            except Exception as e:
-                                image_label = create_styled_label(product_frame, text=self.LANGUAGES[self.current_language].get("error_loading_image", "Error loading image"), style='small')
-                        else:
-                            image_label = create_styled_label(product_frame, text=self.LANGUAGES[self.current_language].get("no_image", "No Image"), style='small')
-                        image_label.pack(side='left', padx=10, pady=5)
-                        details_frame = create_styled_frame(product_frame, style='card')
-                        details_frame.pack(side='left', fill='x', expand=True, padx=(0, 10), pady=10)
-                        name_label = create_styled_label(
-                            details_frame,
-                            text=product.get('name', ''),
-                            style='subheading'
-                        )
-                        name_label.pack(side='left', padx=10)
-                        qty_text = f" | {self.LANGUAGES[self.current_language].get('wholesale_quantity', 'Wholesale Qty')}: {product.get('quantity', 0)}"
-                        qty_text += f" | {self.LANGUAGES[self.current_language].get('retail_quantity', 'Retail Qty')}: {product.get('retail_quantity', 0)}"
-                        qty_label = create_styled_label(
-                            details_frame,
-                            text=qty_text,
-                            style='small'
-                        )
-                        qty_label.pack(side='left', padx=10)
-                        price_label = create_styled_label(
-                            details_frame,
-                            text=f"${float(product.get('price', 0) or 0):.2f}",
-                            style='body'
-                        )
-                        price_label.pack(side='left', padx=10)
-                        add_button = create_styled_button(
-                            product_frame,
-                            text=self.LANGUAGES[self.current_language].get("add_to_cart", "Add to Cart"),
-                            style='primary',
-                            width=120,
-                            command=lambda p=product: self.add_to_cart(p)
-                        )
-                        add_button.pack(side='right', padx=10, pady=10)
-                    except Exception as e:
-                        print(f"[DEBUG] Error adding product: {e}")
+            self.products_frame.set_items(
+                self.products,
+                self.LANGUAGES[self.current_language].get("no_active_products", "No products found.")
+            )
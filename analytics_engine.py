@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+# Columnar analytics
+# The dashboard, trend analysis, inventory forecast and customer insights
+# all work on a few columns: stock quantity, price and category per
+# inventory item, sales per day, and purchases per customer. Each is turned
+# into NumPy arrays once (bad or missing numbers count as 0), and the KPIs
+# are vectorized expressions over those arrays instead of per-row loops.
+
+
+def numeric_column(rows, field):
+    """float array of rows[i][field], 0 where missing or not a number"""
+    values = [row.get(field) for row in rows]
+    try:
+        # Numbers, numeric text and None (as NaN) convert in one go
+        column = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        column = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+    column[np.isnan(column)] = 0
+    return column
+
+
+class InventoryColumns:
+    """Inventory items as quantity, price and category-code arrays"""
+
+    def __init__(self, inventory_data):
+        # Whole units, as the reports have always counted stock
+        self.quantity = np.trunc(numeric_column(inventory_data, 'quantity'))
+        self.price = numeric_column(inventory_data, 'price')
+        categories = pd.Series([str(item.get('category', 'Uncategorized')) for item in inventory_data], dtype=object)
+        self.category_codes, self.categories = pd.factorize(categories)
+        self.value = self.quantity * self.price
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def total_value(self):
+        return float(self.value.sum())
+
+    def total_quantity(self):
+        return int(self.quantity.sum())
+
+    def low_stock_threshold(self):
+        """25% of the median quantity of stocked items, at least 1 (10 with no stock data)"""
+        quantities = self.quantity[self.quantity != 0]
+        if len(quantities):
+            return max(1, int(np.median(quantities) * 0.25))
+        return 10
+
+    def stock_counts(self, threshold):
+        """(in stock, low stock, out of stock) item counts; out of stock items are also low"""
+        low = self.quantity < threshold
+        return int((~low).sum()), int(low.sum()), int((self.quantity == 0).sum())
+
+    def by_category(self):
+        """{category: {'count', 'value', 'quantity'}}"""
+        size = len(self.categories)
+        counts = np.bincount(self.category_codes, minlength=size)
+        values = np.bincount(self.category_codes, weights=self.value, minlength=size)
+        quantities = np.bincount(self.category_codes, weights=self.quantity, minlength=size)
+        return {
+            category: {'count': int(counts[i]), 'value': float(values[i]), 'quantity': int(quantities[i])}
+            for i, category in enumerate(self.categories)
+        }
+
+
+class DailySeries:
+    """Sales per day with sales, oldest first: datetime64 dates, gross and items"""
+
+    def __init__(self, daily):
+        days = sorted(daily)
+        self.dates = np.array(days, dtype='datetime64[D]')
+        self.gross = np.array([daily[day]['gross'] for day in days], dtype=float)
+        self.items = np.array([daily[day]['items'] for day in days], dtype=float)
+
+    def __len__(self):
+        return len(self.gross)
+
+    def total(self):
+        return float(self.gross.sum())
+
+    def mean(self):
+        return float(self.gross.mean()) if len(self) else 0.0
+
+    def growth_rate(self):
+        """Percent change from the first to the last day, 0 with fewer than two days"""
+        if len(self) < 2 or self.gross[0] == 0:
+            return 0.0
+        return float((self.gross[-1] - self.gross[0]) / self.gross[0] * 100)
+
+    def volatility(self):
+        """Sample standard deviation as a percent of the mean"""
+        mean = self.mean()
+        if len(self) < 2 or mean <= 0:
+            return 0.0
+        return float(self.gross.std(ddof=1) / mean * 100)
+
+    def trailing_mean(self, days):
+        return float(self.gross[-days:].mean()) if len(self) else 0.0
+
+
+class CustomerColumns:
+    """Per-customer totals (analytics_store.combine()['customers']) as arrays"""
+
+    def __init__(self, customers):
+        self.names = list(customers)
+        self.quantity = np.array([customers[name]['quantity'] for name in self.names], dtype=float)
+        self.revenue = np.array([customers[name]['revenue'] for name in self.names], dtype=float)
+        self.visits = np.array([customers[name]['count'] for name in self.names], dtype=float)
+
+    def __len__(self):
+        return len(self.names)
+
+    def purchase_segments(self):
+        """(frequent, regular, occasional) customers by items bought: >10, 5-10, <5"""
+        quantity = self.quantity
+        return int((quantity > 10).sum()), int(((quantity >= 5) & (quantity <= 10)).sum()), int((quantity < 5).sum())
+
+    def value_stats(self):
+        """(average, highest, lowest) spending, all 0 with no customers"""
+        if not len(self):
+            return 0.0, 0.0, 0.0
+        return float(self.revenue.mean()), float(self.revenue.max()), float(self.revenue.min())
+
+    def value_segments(self, average):
+        """(high, medium, low) customers by spending against the average"""
+        revenue = self.revenue
+        return (
+            int((revenue > average * 2).sum()),
+            int(((revenue >= average * 0.5) & (revenue <= average * 2)).sum()),
+            int((revenue < average * 0.5).sum()),
+        )
+
+    def average_visits(self):
+        return float(self.visits.mean()) if len(self) else 0.0
@@ -0,0 +1,318 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import MongoClient, ReplaceOne
+from constants import (
+    MONGODB_URI, MONGODB_DB_NAME, MONGODB_COLLECTIONS,
+    ANALYTICS_DAILY_COLLECTION, ANALYTICS_LOOKBACK_HOURS,
+)
+import schema
+
+# Materialized sales analytics
+# One analytics_daily document per day holds that day's sales totals and
+# their breakdown by product, category, employee and customer. refresh()
+# finds the sales recorded since the stored watermark and recomputes just
+# the days they fall on, so reports read a few small documents whatever the
+# size of the sales history. Days are replaced whole, which makes a refresh
+# safe to repeat; the watermark is moved back by ANALYTICS_LOOKBACK_HOURS on
+# each refresh to pick up checkouts that reach MongoDB late from an offline
+# terminal. Run this file to rebuild the store from the whole journal.
+
+STATE_ID = '_state'
+BATCH_SIZE = 500
+DIMENSIONS = ('products', 'categories', 'employees', 'customers')
+ENTRY_FIELDS = ('count', 'quantity', 'revenue')
+SALE_PROJECTION = {'date': 1, 'items': 1, 'employee': 1, 'customer': 1}
+
+
+def sale_day(sale):
+    """'YYYY-MM-DD' of a sale, or None if its date cannot be read"""
+    date = sale.get('date')
+    if isinstance(date, datetime):
+        return date.strftime('%Y-%m-%d')
+    try:
+        return datetime.fromisoformat(str(date)).strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
+
+
+def in_range(day, start_day=None, end_day=None):
+    return (not start_day or day >= start_day) and (not end_day or day <= end_day)
+
+
+def category_map(products):
+    """product id -> category (or type) for line items that carry neither"""
+    return {
+        product['id']: product.get('category') or product.get('type')
+        for product in products
+        if product.get('id') is not None and (product.get('category') or product.get('type'))
+    }
+
+
+def _empty_day(day):
+    return dict({'date': day, 'count': 0, 'gross': 0, 'items': 0}, **{dimension: {} for dimension in DIMENSIONS})
+
+
+def _add(entries, name, count, quantity, revenue):
+    entry = entries.setdefault(name, dict.fromkeys(ENTRY_FIELDS, 0))
+    entry['count'] += count
+    entry['quantity'] += quantity
+    entry['revenue'] += revenue
+
+
+def fold_sales(sales, categories=None):
+    """{day: day totals} for an iterable of sales"""
+    categories = categories or {}
+    days = {}
+    for sale in sales:
+        day = sale_day(sale)
+        if day is None:
+            continue
+        totals = days.setdefault(day, _empty_day(day))
+        items = schema.sale_items(sale)
+        quantity = sum(item['quantity'] for item in items)
+        revenue = sum(item['line_total'] for item in items)
+        totals['count'] += 1
+        totals['gross'] += revenue
+        totals['items'] += quantity
+        for item in items:
+            category = item.get('category') or categories.get(item.get('product_id')) or 'Uncategorized'
+            _add(totals['products'], item.get('name') or 'Unnamed Item', 1, item['quantity'], item['line_total'])
+            _add(totals['categories'], str(category), 1, item['quantity'], item['line_total'])
+        _add(totals['employees'], str(sale.get('employee') or 'Unknown'), 1, quantity, revenue)
+        _add(totals['customers'], str(sale.get('customer') or 'Unknown'), 1, quantity, revenue)
+    return days
+
+
+def _to_document(totals):
+    # Names may hold '.' or '$', so breakdowns are stored as lists, not as keys
+    document = {field: totals[field] for field in ('date', 'count', 'gross', 'items')}
+    document['_id'] = totals['date']
+    for dimension in DIMENSIONS:
+        document[dimension] = [dict(entry, name=name) for name, entry in totals[dimension].items()]
+    return document
+
+
+def _from_document(document):
+    totals = _empty_day(document['date'])
+    for field in ('count', 'gross', 'items'):
+        totals[field] = document.get(field, 0)
+    for dimension in DIMENSIONS:
+        for entry in document.get(dimension) or []:
+            totals[dimension][entry['name']] = {field: entry.get(field, 0) for field in ENTRY_FIELDS}
+    return totals
+
+
+def _day_query(day):
+    """Filter for the sales of one day, stored as text or as dates"""
+    start = datetime.strptime(day, '%Y-%m-%d')
+    end = start + timedelta(days=1)
+    return {'$or': [
+        {'date': {'$gte': day, '$lt': end.strftime('%Y-%m-%d')}},
+        {'date': {'$gte': start, '$lt': end}},
+    ]}
+
+
+def _write_days(collection, days):
+    requests = [ReplaceOne({'_id': day}, _to_document(totals), upsert=True) for day, totals in days.items()]
+    for start in range(0, len(requests), BATCH_SIZE):
+        collection.bulk_write(requests[start:start + BATCH_SIZE], ordered=False)
+
+
+def _products_categories(db):
+    products = db[MONGODB_COLLECTIONS['products']].find({}, {'id': 1, 'category': 1, 'type': 1})
+    return category_map(products)
+
+
+def rebuild(db):
+    """Recompute every day from the whole journal; returns how many were written"""
+    analytics = db[ANALYTICS_DAILY_COLLECTION]
+    journal = db[MONGODB_COLLECTIONS['sales_journal']]
+    latest = journal.find_one({'_id': {'$type': 'objectId'}}, {'_id': 1}, sort=[('_id', -1)])
+    last_id = latest['_id'] if latest else None
+    days = fold_sales(journal.find({}, SALE_PROJECTION), _products_categories(db))
+    _write_days(analytics, days)
+    analytics.delete_many({'_id': {'$nin': list(days) + [STATE_ID]}})
+    analytics.update_one({'_id': STATE_ID}, {'$set': {'last_id': last_id, 'refreshed_at': datetime.now()}}, upsert=True)
+    return len(days)
+
+
+def refresh(db):
+    """Fold in the sales recorded since the watermark; returns how many days were recomputed"""
+    analytics = db[ANALYTICS_DAILY_COLLECTION]
+    state = analytics.find_one({'_id': STATE_ID})
+    if not state or state.get('last_id') is None:
+        return rebuild(db)
+    last_id = state['last_id']
+    since = ObjectId.from_datetime(last_id.generation_time - timedelta(hours=ANALYTICS_LOOKBACK_HOURS))
+    journal = db[MONGODB_COLLECTIONS['sales_journal']]
+    changed = set()
+    for sale in journal.find({'_id': {'$gt': since}}, {'date': 1}):
+        day = sale_day(sale)
+        if day is not None:
+            changed.add(day)
+        last_id = max(last_id, sale['_id'])
+    recompute_days(db, changed)
+    analytics.update_one({'_id': STATE_ID}, {'$max': {'last_id': last_id}, '$set': {'refreshed_at': datetime.now()}})
+    return len(changed)
+
+
+def recompute_days(db, days):
+    """Fold the given days again from the journal, whatever their sales' _ids.
+
+    Checkouts replayed from an offline queue carry _ids from when they were
+    made, possibly before the watermark, so the replay recomputes their days.
+    """
+    if not days:
+        return
+    journal = db[MONGODB_COLLECTIONS['sales_journal']]
+    categories = _products_categories(db)
+    totals = {}
+    for day in days:
+        totals[day] = fold_sales(journal.find(_day_query(day), SALE_PROJECTION), categories).get(day) or _empty_day(day)
+    _write_days(db[ANALYTICS_DAILY_COLLECTION], totals)
+
+
+def _date_match(start_day=None, end_day=None):
+    query = {'$exists': True}
+    if start_day:
+        query['$gte'] = start_day
+    if end_day:
+        query['$lte'] = end_day
+    return {'$match': {'date': query}}
+
+
+def load_days(db, start_day=None, end_day=None):
+    """Stored day totals between two 'YYYY-MM-DD' days (inclusive), oldest first"""
+    documents = db[ANALYTICS_DAILY_COLLECTION].find(_date_match(start_day, end_day)['$match']).sort('date', 1)
+    return [_from_document(document) for document in documents]
+
+
+def combine(days):
+    """Totals over a list of day totals.
+
+    Returns {'count', 'gross', 'items', 'daily': {day: {'count', 'gross',
+    'items'}}} plus, per dimension, {name: {'count', 'quantity', 'revenue',
+    'days'}} where days is how many days the name appears on.
+    """
+    result = dict({'count': 0, 'gross': 0, 'items': 0, 'daily': {}}, **{dimension: {} for dimension in DIMENSIONS})
+    for totals in days:
+        for field in ('count', 'gross', 'items'):
+            result[field] += totals[field]
+        daily = result['daily'].setdefault(totals['date'], {'count': 0, 'gross': 0, 'items': 0})
+        for field in ('count', 'gross', 'items'):
+            daily[field] += totals[field]
+        for dimension in DIMENSIONS:
+            for name, entry in totals[dimension].items():
+                combined = result[dimension].setdefault(name, dict.fromkeys(ENTRY_FIELDS + ('days',), 0))
+                for field in ENTRY_FIELDS:
+                    combined[field] += entry[field]
+                combined['days'] += 1
+    return result
+
+
+def load_combined(db, start_day=None, end_day=None):
+    return combine(load_days(db, start_day, end_day))
+
+
+# Sales reports
+# Each report is an aggregation pipeline run on the store, so MongoDB does
+# the grouping and only the report rows are sent back, and a function giving
+# the same rows from day totals folded in Python (JSON-file mode). Ties are
+# ordered by name in both, so the two always agree.
+
+def _ranked(entries, field, limit=0, fields=None):
+    rows = [
+        dict({'name': name}, **{key: entry[key] for key in (fields or (field,))})
+        for name, entry in entries.items()
+    ]
+    rows.sort(key=lambda row: (-row[field], row['name']))
+    return rows[:limit] if limit else rows
+
+
+def _ranked_pipeline(dimension, field, limit=0, fields=None):
+    stages = [
+        {'$unwind': f'${dimension}'},
+        {'$group': dict({'_id': f'${dimension}.name'}, **{
+            key: {'$sum': 1 if key == 'days' else f'${dimension}.{key}'} for key in (fields or (field,))
+        })},
+        {'$sort': {field: -1, '_id': 1}},
+    ]
+    if limit:
+        stages.append({'$limit': limit})
+    stages.append({'$project': dict({'_id': 0, 'name': '$_id'}, **{key: 1 for key in (fields or (field,))})})
+    return stages
+
+
+def sales_summary(days):
+    """{'count', 'gross', 'items', 'categories', 'employees'}; the last two are
+    [{'name', 'revenue'}] rows, highest revenue first"""
+    combined = combine(days)
+    return {
+        'count': combined['count'],
+        'gross': combined['gross'],
+        'items': combined['items'],
+        'categories': _ranked(combined['categories'], 'revenue'),
+        'employees': _ranked(combined['employees'], 'revenue'),
+    }
+
+
+def aggregate_sales_summary(db, start_day=None, end_day=None):
+    """sales_summary() of the stored days in range, grouped by MongoDB"""
+    pipeline = [_date_match(start_day, end_day), {'$facet': {
+        'totals': [{'$group': {
+            '_id': None, 'count': {'$sum': '$count'}, 'gross': {'$sum': '$gross'}, 'items': {'$sum': '$items'},
+        }}],
+        'categories': _ranked_pipeline('categories', 'revenue'),
+        'employees': _ranked_pipeline('employees', 'revenue'),
+    }}]
+    result = next(db[ANALYTICS_DAILY_COLLECTION].aggregate(pipeline))
+    totals = result['totals'][0] if result['totals'] else {}
+    return {
+        'count': totals.get('count', 0),
+        'gross': totals.get('gross', 0),
+        'items': totals.get('items', 0),
+        'categories': result['categories'],
+        'employees': result['employees'],
+    }
+
+
+def sales_over_time(days):
+    """[{'date', 'count', 'gross', 'items'}] per day with sales, oldest first"""
+    return [
+        {'date': day, 'count': totals['count'], 'gross': totals['gross'], 'items': totals['items']}
+        for day, totals in sorted(combine(days)['daily'].items())
+    ]
+
+
+def aggregate_sales_over_time(db, start_day=None, end_day=None):
+    """sales_over_time() of the stored days in range, read by MongoDB"""
+    pipeline = [
+        _date_match(start_day, end_day),
+        {'$project': {'_id': 0, 'date': 1, 'count': 1, 'gross': 1, 'items': 1}},
+        {'$sort': {'date': 1}},
+    ]
+    return list(db[ANALYTICS_DAILY_COLLECTION].aggregate(pipeline))
+
+
+TOP_PRODUCT_FIELDS = ('quantity', 'revenue', 'days')
+
+
+def top_products(days, limit=0):
+    """[{'name', 'quantity', 'revenue', 'days'}], most sold first; days is
+    how many days the product sold on. limit=0 returns every product."""
+    return _ranked(combine(days)['products'], 'quantity', limit, TOP_PRODUCT_FIELDS)
+
+
+def aggregate_top_products(db, start_day=None, end_day=None, limit=0):
+    """top_products() of the stored days in range, grouped by MongoDB"""
+    pipeline = [_date_match(start_day, end_day)] + _ranked_pipeline('products', 'quantity', limit, TOP_PRODUCT_FIELDS)
+    return list(db[ANALYTICS_DAILY_COLLECTION].aggregate(pipeline))
+
+
+if __name__ == "__main__":
+    try:
+        client = MongoClient(MONGODB_URI)
+        written = rebuild(client[MONGODB_DB_NAME])
+        print(f"[MongoDB] Rebuilt {written} {ANALYTICS_DAILY_COLLECTION} documents")
+    except Exception as e:
+        print(f"[MongoDB] Error: {e}")
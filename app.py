@@ -13,7 +13,9 @@ from reporting_analytics import ReportingAnalytics
 from accounts_payable import ExpensesBillsManager
 from notifications_manager import NotificationsManager
 from theme import apply_theme, create_styled_frame, create_styled_label, create_styled_entry, create_styled_button
-from data_handler import load_credentials, import_from_excel, load_hookah_types, load_hookah_flavors
+from data_handler import load_credentials, import_from_excel, load_hookah_types, load_hookah_flavors, start_db_initialization, get_db_state, take_sync_failures
+from sync_queue import FAILED_FILE
+from constants import SYNC_RETRY_SECONDS
 
 class HookahShopApp:
     def __init__(self, root):
@@ -24,6 +26,9 @@ class HookahShopApp:
         # Apply theme
         apply_theme(self.root)
         
+        # Connect to the database in the background while the login screen shows
+        start_db_initialization()
+        
         # Initialize language
         self.current_language = "en"
         self.LANGUAGES = {
@@ -53,7 +58,10 @@ class HookahShopApp:
                 "invalid_credentials": "Invalid credentials",
                 "enter_credentials": "Please enter both username and password",
                 "today_stats": "Today's Statistics",
-                "sales": "Sales"
+                "sales": "Sales",
+                "db_connecting": "Connecting to database...",
+                "db_ready": "Database connected",
+                "db_degraded": "Database offline - working from local files"
             },
             "ar": {
                 "login": "تسجيل الدخول",
@@ -81,15 +89,27 @@ class HookahShopApp:
                 "invalid_credentials": "بيانات غير صحيحة",
                 "enter_credentials": "يرجى إدخال اسم المستخدم وكلمة المرور",
                 "today_stats": "إحصائيات اليوم",
-                "sales": "المبيعات"
+                "sales": "المبيعات",
+                "db_connecting": "جاري الاتصال بقاعدة البيانات...",
+                "db_ready": "قاعدة البيانات متصلة",
+                "db_degraded": "قاعدة البيانات غير متصلة - العمل من الملفات المحلية"
             }
         }
         
-        # Initialize screens
-        self.initialize_screens()
+        # Screens load data, so they are built after login, not before the first frame
+        self.screens_initialized = False
         
         # Show account selection screen
         self.show_account_selection()
+        
+        # Report offline changes that MongoDB rejects when they are replayed
+        self.check_sync_failures()
+    
+    def ensure_screens(self):
+        """Initialize the screens on first use"""
+        if not self.screens_initialized:
+            self.initialize_screens()
+            self.screens_initialized = True
     
     def initialize_screens(self):
         """Initialize all screens and their callbacks"""
@@ -194,6 +214,51 @@ class HookahShopApp:
             width=300
         )
         cashier_button.pack(pady=20)
+        
+        self.create_db_status_label(main_frame)
+    
+    def create_db_status_label(self, parent):
+        """Show the database connection state at the bottom of the screen"""
+        self.db_status_label = create_styled_label(parent, text="", style='small')
+        self.db_status_label.pack(side='bottom', pady=10)
+        self.update_db_status()
+    
+    def update_db_status(self):
+        """Refresh the database status label until the connection settles"""
+        label = getattr(self, 'db_status_label', None)
+        if label is None or not label.winfo_exists():
+            return
+        state = get_db_state()
+        defaults = {
+            'connecting': ("Connecting to database...", "جاري الاتصال بقاعدة البيانات..."),
+            'ready': ("Database connected", "قاعدة البيانات متصلة"),
+            'degraded': ("Database offline - working from local files", "قاعدة البيانات غير متصلة - العمل من الملفات المحلية")
+        }
+        label.configure(text=self.get_bilingual(f"db_{state}", *defaults[state]))
+        if state == 'connecting':
+            self.root.after(500, self.update_db_status)
+    
+    def check_sync_failures(self):
+        """Show the queued writes the database rejected, then check again later"""
+        failures = take_sync_failures()
+        if failures:
+            lines = []
+            for failure in failures:
+                if failure['kind'] == 'checkout':
+                    sale = failure['payload']['sale']
+                    lines.append(f"Sale {sale.get('id', '')} ({sale.get('date', '')}, ${sale.get('total', 0)}): {failure['error']}")
+                else:
+                    lines.append(f"{failure['kind']} on {failure['collection']}: {failure['error']}")
+            header = self.get_bilingual(
+                "sync_rejected",
+                "These offline changes were rejected by the database",
+                "رفضت قاعدة البيانات هذه التغييرات التي تمت دون اتصال"
+            )
+            messagebox.showerror(
+                self.get_bilingual("sync_failed", "Sync Failed", "فشل المزامنة"),
+                f"{header}:\n\n" + "\n".join(lines) + f"\n\n{FAILED_FILE}"
+            )
+        self.root.after(int(SYNC_RETRY_SECONDS * 1000), self.check_sync_failures)
     
     def show_login(self, account_type):
         """Show the login screen for specific account type"""
@@ -257,6 +322,8 @@ class HookahShopApp:
             command=self.show_account_selection
         )
         back_button.pack(pady=10)
+        
+        self.create_db_status_label(self.root)
     
     def process_login(self, username, password):
         """Process login attempt"""
@@ -269,6 +336,7 @@ class HookahShopApp:
         if account_type in valid_credentials:
             creds = valid_credentials[account_type]
             if username == creds['username'] and password == creds['password']:
+                self.current_user = username
                 self.show_main_menu()
                 return
             else:
@@ -285,6 +353,8 @@ class HookahShopApp:
     
     def show_main_menu(self):
         """Show the main menu based on account type"""
+        self.ensure_screens()
+        
         # Clear current frame
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -305,7 +375,7 @@ class HookahShopApp:
     
     def show_inventory_manager(self):
         """Show the inventory manager screen"""
-        self.inventory_manager.manage_inventory()
+        self.inventory_manager.refresh_inventory()
     
     def show_record_sale(self):
         """Show the record sale screen"""
@@ -314,6 +384,7 @@ class HookahShopApp:
             self.record_sale.back_callback = self.show_cashier_menu
         else:
             self.record_sale.back_callback = self.show_main_menu
+        self.record_sale.employee = getattr(self, 'current_user', None)
         self.record_sale.record_sale()
     
     def show_sales_records(self):
@@ -0,0 +1,91 @@
+import os
+import sys
+import logging
+import logging.handlers
+import threading
+from constants import (
+    LOG_LEVEL, LOG_MODULE_LEVELS, LOG_FILE, LOG_FILE_MAX_BYTES,
+    LOG_FILE_BACKUP_COUNT, LOG_DEBUG_SAMPLE_EVERY
+)
+
+# Project-wide logging
+# Modules call get_logger(__name__) and log with %-style arguments, so messages
+# below the configured level are never formatted. Levels come from .env:
+# LOG_LEVEL for everything, LOG_MODULE_LEVELS="data_handler=DEBUG,..." per
+# module. Records go to the console and to a rotating LOG_FILE.
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+class _DebugSampler(logging.Filter):
+    """Let through one in every N DEBUG records from each call site"""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self.counts = {}
+
+    def filter(self, record):
+        if self.every <= 1 or record.levelno > logging.DEBUG:
+            return True
+        # Shared by every handler: decide once per record
+        if not hasattr(record, 'sampled'):
+            site = (record.pathname, record.lineno)
+            count = self.counts.get(site, 0)
+            self.counts[site] = count + 1
+            record.sampled = count % self.every == 0
+        return record.sampled
+
+
+def _parse_module_levels(value):
+    """'data_handler=DEBUG,json_journal=WARNING' -> {name: level}"""
+    levels = {}
+    for entry in value.split(','):
+        if '=' not in entry:
+            continue
+        name, level = entry.split('=', 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Set up handlers once; safe to call from every module"""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL.upper())
+        formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+        handlers = [console]
+        if LOG_FILE:
+            log_dir = os.path.dirname(LOG_FILE)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                LOG_FILE, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT, encoding='utf-8'
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        sampler = _DebugSampler(LOG_DEBUG_SAMPLE_EVERY)
+        for handler in handlers:
+            handler.addFilter(sampler)
+            root.addHandler(handler)
+
+        for name, level in _parse_module_levels(LOG_MODULE_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+        # Third-party chatter stays at warnings unless asked for
+        for name in ('pymongo', 'PIL', 'matplotlib'):
+            if name not in _parse_module_levels(LOG_MODULE_LEVELS):
+                logging.getLogger(name).setLevel(logging.WARNING)
+        _configured = True
+
+
+def get_logger(name):
+    """Logger for a module, configuring logging on first use"""
+    configure_logging()
+    return logging.getLogger(name)
@@ -4,8 +4,11 @@ from theme import (
     create_styled_entry, create_styled_frame,
     create_styled_label
 )
-from data_handler import load_data
+from data_handler import get_sales_summary
 from datetime import datetime, date
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class CashierMenu:
     def __init__(self, root, current_language, languages, callbacks):
@@ -22,17 +25,11 @@ class CashierMenu:
     def get_today_sales_stats(self):
         """Get today's sales statistics"""
         try:
-            sales_data = load_data("sales") or []
             today = date.today().strftime("%Y-%m-%d")
-            
-            today_sales = [sale for sale in sales_data if sale.get('date', '').startswith(today)]
-            
-            total_sales = len(today_sales)
-            total_amount = sum(float(sale.get('total_amount', 0)) for sale in today_sales)
-            
-            return total_sales, total_amount
+            summary = get_sales_summary(today)
+            return summary['count'], summary['gross']
         except Exception as e:
-            print(f"Error getting sales stats: {e}")
+            logger.error("Error getting sales stats: %s", e)
             return 0, 0
 
     def create_cashier_menu(self):
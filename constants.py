@@ -1,4 +1,5 @@
 import os
+import platform
 from dotenv import load_dotenv
 # File names
 products_file = "hookah_products.xlsx"
@@ -28,6 +29,101 @@ MONGODB_COLLECTIONS = {
     "hookah_flavors": "hookah_flavors"
 }
 
+# Holds one {'_id': <collection>, 'seq': <last id>} document per collection
+COUNTERS_COLLECTION = "counters"
+# op_ids of replayed offline writes, so a replay never applies one twice
+SYNC_LOG_COLLECTION = "sync_log"
+# Step-by-step record of checkouts on servers without transactions, so a
+# checkout interrupted halfway is finished (once) on the next connection
+CHECKOUT_LOG_COLLECTION = "checkout_log"
+# Per day and terminal sales totals, kept up to date by every checkout
+SALES_DAILY_COLLECTION = "sales_daily"
+# Per day sales breakdown by product, category, employee and customer, read
+# by the reports and refreshed from the journal by analytics_store.refresh()
+ANALYTICS_DAILY_COLLECTION = "analytics_daily"
+
+# MongoDB indexes, applied idempotently by data_handler.ensure_indexes()
+# Each entry is (keys, options) as passed to pymongo's create_index
+MONGODB_INDEXES = {
+    "products": [
+        ([("barcode", 1)], {"unique": True, "partialFilterExpression": {"barcode": {"$gt": ""}}}),
+        ([("id", 1)], {}),
+        ([("name", 1)], {}),
+        ([("location", 1)], {}),
+    ],
+    "inventory": [
+        ([("id", 1)], {"unique": True}),
+        ([("name", 1)], {}),
+        ([("barcode", 1)], {}),
+        ([("location", 1)], {}),
+    ],
+    "store_products": [
+        ([("id", 1)], {}),
+        ([("location", 1)], {}),
+    ],
+    "sales_journal": [
+        ([("date", -1)], {}),
+        ([("id", 1)], {}),
+    ],
+    "checkout_log": [
+        ([("state", 1)], {}),
+    ],
+    "sales_daily": [
+        ([("date", 1)], {}),
+    ],
+    "analytics_daily": [
+        ([("date", 1)], {}),
+    ],
+    "suppliers": [
+        ([("id", 1)], {}),
+    ],
+    "customers": [
+        ([("id", 1)], {}),
+        ([("name", 1)], {}),
+    ],
+    "employees": [
+        ([("id", 1)], {}),
+    ],
+    "bills": [
+        ([("supplier_id", 1)], {}),
+        ([("date", -1)], {}),
+    ],
+}
+
+# Field types per collection, coerced once on ingest by schema.coerce_documents()
+# "number" stores whole values as int and fractions as float
+_STOCK_FIELDS = {
+    "quantity": "number",
+    "retail_quantity": "number",
+    "extra_retail_quantity": "number",
+    "carton_count": "number",
+    "carton_fraction": "float",
+    "units_per_carton": "number",
+    "price": "float",
+    "wholesale_supplier_price": "float",
+    "wholesale_sale_price": "float",
+    "retail_sale_price": "float",
+    "barcode": "str",
+}
+COLLECTION_SCHEMAS = {
+    "products": _STOCK_FIELDS,
+    "inventory": _STOCK_FIELDS,
+    "store_products": _STOCK_FIELDS,
+    "sales_journal": {"total": "float", "total_amount": "float"},
+    "bills": {"amount": "float", "paid_amount": "float", "remaining": "float"},
+    "expenses": {"amount": "float"},
+}
+
+# Fields searched by data_handler.query(text=...) per collection
+SEARCH_FIELDS = {
+    "products": ["name", "barcode", "flavor", "type"],
+    "inventory": ["name", "barcode", "flavor", "location"],
+    "store_products": ["name", "barcode", "flavor"],
+    "suppliers": ["name", "contact", "phone", "email"],
+    "customers": ["name", "phone1", "phone2", "city"],
+    "employees": ["name", "position"],
+}
+
 # Excel file paths
 EXCEL_FILES = {
     "products": os.path.join(EXCEL_DATA_PATH, "hookah_products.xlsx"),
@@ -46,6 +142,84 @@ load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "hookah_shop_db")
 
+# Connection tuning, all overridable from .env
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "3000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "3000"))
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "10"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+# Seconds between reconnect attempts while running from local files
+MONGODB_RETRY_SECONDS = float(os.getenv("MONGODB_RETRY_SECONDS", "30"))
+# How often the sync worker checks for queued offline writes
+SYNC_RETRY_SECONDS = float(os.getenv("SYNC_RETRY_SECONDS", "5"))
+
+# Collection cache refresh: "none", "poll" or "watch" (change stream, falls back to polling).
+# Only use "none" with a single terminal: other terminals' writes are never seen.
+DATA_CACHE_REFRESH = os.getenv("DATA_CACHE_REFRESH", "watch")
+DATA_CACHE_POLL_SECONDS = float(os.getenv("DATA_CACHE_POLL_SECONDS", "30"))
+
+# Excel exports triggered by saves within this window are written once
+EXCEL_EXPORT_DELAY_SECONDS = float(os.getenv("EXCEL_EXPORT_DELAY_SECONDS", "2"))
+
+# mongodb_data/ journals are folded into a snapshot after this many change records
+JOURNAL_COMPACT_EVERY = int(os.getenv("JOURNAL_COMPACT_EVERY", "500"))
+
+# Excel imports are streamed and written to the database this many rows at a time
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# How Excel rows that match an existing item are merged: "excel" (non-empty
+# cells overwrite) or "existing" (cells only fill fields that are empty)
+EXCEL_MERGE_POLICY = os.getenv("EXCEL_MERGE_POLICY", "excel")
+
+# Background data worker: reader threads and how often (ms) the Tk thread checks for results
+DATA_WORKER_THREADS = int(os.getenv("DATA_WORKER_THREADS", "4"))
+DATA_WORKER_POLL_MS = int(os.getenv("DATA_WORKER_POLL_MS", "16"))
+
+# Name of this till in the sales_daily rollup (defaults to the machine name)
+TERMINAL_ID = os.getenv("TERMINAL_ID") or platform.node() or "terminal"
+# Hours before the analytics watermark re-read on each refresh, so checkouts
+# replayed late by an offline terminal still reach the analytics store
+ANALYTICS_LOOKBACK_HOURS = float(os.getenv("ANALYTICS_LOOKBACK_HOURS", "48"))
+# Products listed by the top selling products report (0 for all of them)
+TOP_PRODUCTS_REPORT_LIMIT = int(os.getenv("TOP_PRODUCTS_REPORT_LIMIT", "50"))
+
+# Product search: fields matched by the search boxes, and how long (ms) typing
+# must pause before a search runs
+PRODUCT_SEARCH_FIELDS = ("name", "barcode", "flavor")
+SEARCH_DEBOUNCE_MS = int(os.getenv("SEARCH_DEBOUNCE_MS", "150"))
+
+# Product thumbnails: disk cache directory and how many images stay in memory
+THUMBNAIL_CACHE_PATH = os.getenv("THUMBNAIL_CACHE_PATH", os.path.join("images", "thumbnails"))
+THUMBNAIL_CACHE_SIZE = int(os.getenv("THUMBNAIL_CACHE_SIZE", "512"))
+
+# Logging: overall level, per-module overrides ("data_handler=DEBUG,json_journal=WARNING"),
+# rotating log file (empty to disable) and DEBUG sampling (log 1 in N per call site)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+LOG_FILE = os.getenv("LOG_FILE", os.path.join("logs", "hookah_shop.log"))
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_FILE_BACKUP_COUNT = int(os.getenv("LOG_FILE_BACKUP_COUNT", "3"))
+LOG_DEBUG_SAMPLE_EVERY = int(os.getenv("LOG_DEBUG_SAMPLE_EVERY", "1"))
+
+# Excel column header per field, in column order, where it differs from the field name
+EXCEL_COLUMN_HEADERS = {
+    "customers": {
+        "id": "رقم العميل",
+        "name": "اسم العميل",
+        "category": "فئة العميل",
+        "address": "العنوان",
+        "phone1": "تليفون 1",
+        "phone2": "تليفون 2",
+        "currency": "عملة الحساب",
+        "city": "المدينة",
+        "governorate": "المحافظة",
+        "country": "الدولة",
+        "representative": "المندوب",
+        "notes": "ملاحظات"
+    }
+}
+
+# Also export every collection as a sheet of this workbook (empty to disable)
+EXCEL_COMBINED_WORKBOOK = os.getenv("EXCEL_COMBINED_WORKBOOK", "")
+
 # Language strings
 LANGUAGES = {
     "en": {
@@ -2,174 +2,679 @@ from dotenv import load_dotenv
 load_dotenv()  # Load environment variables FIRST
 
 import os
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, errors, InsertOne, UpdateOne, DeleteOne, ReturnDocument
 from bson import ObjectId
 from constants import *
 from ui_elements import show_error, show_success
+import json_journal
+import sync_queue
+import schema
+import rebuild_sales_daily
+import analytics_store
+from app_logging import get_logger
 import pandas as pd
+from openpyxl import Workbook, load_workbook
 import atexit
 import json
+import hashlib
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox
 import re
 import shutil
+import math
+import copy
+import threading
+import time
+
+logger = get_logger(__name__)
 
 # MongoDB Connection Variables
 client = None
 db = None
+db_state = 'connecting'
+db_error = None
 
 def ensure_data_directories():
     """Ensure data directories exist"""
     os.makedirs(EXCEL_DATA_PATH, exist_ok=True)
     os.makedirs(MONGODB_DATA_PATH, exist_ok=True)
 
-def initialize_db():
-    """Initialize MongoDB connection"""
-    global client, db
+def initialize_db(notify=True):
+    """Initialize MongoDB connection
+
+    notify=False keeps error dialogs off background threads.
+    """
+    global client, db, db_state, db_error
     try:
         # Ensure data directories exist
         ensure_data_directories()
         
-        # Connect to MongoDB
-        client = MongoClient(MONGODB_URI)
-        db = client[MONGODB_DB_NAME]
+        # Connect to MongoDB with bounded timeouts so a dead server fails fast
+        new_client = MongoClient(
+            MONGODB_URI,
+            serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE
+        )
         
         # Test the connection
-        client.server_info()
-        print("[DEBUG] Successfully connected to MongoDB")
+        new_client.server_info()
+        client = new_client
+        db = client[MONGODB_DB_NAME]
+        logger.debug("Successfully connected to MongoDB")
         
         # Ensure all collections exist
         for collection_name in MONGODB_COLLECTIONS.values():
             ensure_collection(collection_name)
-            print(f"[DEBUG] Ensured collection exists: {collection_name}")
+            logger.debug("Ensured collection exists: %s", collection_name)
         
+        ensure_indexes()
+        
+        db_state, db_error = 'ready', None
         return True
     except errors.ConnectionFailure as e:
-        print(f"[ERROR] Could not connect to MongoDB: {str(e)}")
-        show_error(f"Could not connect to MongoDB: {str(e)}")
+        db_state, db_error = 'degraded', f"Could not connect to MongoDB: {str(e)}"
+        logger.error("Could not connect to MongoDB: %s", str(e))
+        if notify:
+            show_error(db_error)
         return False
     except Exception as e:
-        print(f"[ERROR] Database error: {str(e)}")
-        show_error(f"Database error: {str(e)}")
+        db_state, db_error = 'degraded', f"Database error: {str(e)}"
+        logger.error("Database error: %s", str(e))
+        if notify:
+            show_error(db_error)
         return False
 
+# Lazy, thread-backed initialization
+# The first caller starts the connection attempt on a worker thread; data
+# calls wait for that one attempt, then run against MongoDB ('ready') or the
+# local JSON files ('degraded') while reconnects are retried in the background.
+_db_init_lock = threading.Lock()
+_db_ready = threading.Event()
+_db_init_thread = None
+_db_last_attempt = 0.0
+
+def _background_initialize():
+    if initialize_db(notify=False):
+        # Initialize collections
+        collections = ['products', 'suppliers', 'employees', 'sales', 'hookah_types', 'hookah_flavors']
+        for collection in collections:
+            ensure_collection(collection)
+        start_cache_watcher()
+        invalidate_cache()
+        # Counters must be re-seeded past any ids handed out while offline
+        _seeded_counters.clear()
+        # Checkout recovery and the report rollups run on the sync worker,
+        # so screens can use the connection right away
+        _maintenance_due.set()
+        _notify_sync_worker()
+    _db_ready.set()
+
+def start_db_initialization():
+    """Start (or retry) connecting to MongoDB without blocking the caller"""
+    global _db_init_thread, _db_last_attempt
+    with _db_init_lock:
+        if db_state == 'ready' or (_db_init_thread is not None and _db_init_thread.is_alive()):
+            return
+        if _db_ready.is_set() and time.monotonic() - _db_last_attempt < MONGODB_RETRY_SECONDS:
+            return
+        _db_last_attempt = time.monotonic()
+        _db_init_thread = threading.Thread(target=_background_initialize, name="db-init", daemon=True)
+        _db_init_thread.start()
+    start_sync_worker()
+
+def ensure_db():
+    """Wait for the first connection attempt; True if MongoDB is usable"""
+    start_db_initialization()
+    _db_ready.wait()
+    return db is not None
+
+def get_db_state():
+    """'connecting', 'ready' or 'degraded' (working from local files)"""
+    return db_state
+
+# Offline-first writes
+# Every write lands in the local JSON journal first. It then goes to MongoDB,
+# or into sync_queue while the database is unreachable or older writes are
+# still waiting; the sync worker replays the queue in order once connected.
+_sync_condition = threading.Condition()
+_sync_thread = None
+_maintenance_due = threading.Event()
+
+def _go_offline(error):
+    """Switch to local-only mode after a write hit a network error"""
+    global client, db, db_state, db_error
+    logger.warning("Lost connection to MongoDB, queueing writes: %s", str(error))
+    old_client = client
+    client, db = None, None
+    db_state, db_error = 'degraded', str(error)
+    if old_client is not None:
+        old_client.close()
+
+def apply_operation(collection_name, kind, payload):
+    """Apply one write to MongoDB; shared by direct writes and queue replay"""
+    collection = db[collection_name]
+    if kind == 'save':
+        if payload.get('mode') == 'replace':
+            return replace_collection(collection, payload['data'])
+        if 'changes' in payload:
+            return apply_changes(collection, payload['changes'])
+        # Saves queued before changes were recorded: diff against a full read
+        return sync_collection(collection, payload['data'])
+    if kind == 'insert':
+        # Upsert on the client-assigned _id so replaying twice inserts once
+        document = payload['document']
+        fields = {k: v for k, v in document.items() if k != '_id'}
+        return collection.update_one({'_id': document['_id']}, {'$setOnInsert': fields}, upsert=True)
+    if kind == 'update':
+        return collection.update_one(payload['filter'], payload['update'])
+    if kind == 'delete':
+        return collection.delete_one(payload['filter'])
+    if kind == 'bulk':
+        # Ordered, so repeated rows for one document apply in sheet order
+        return collection.bulk_write(_bulk_requests(payload['operations']), ordered=True)
+    if kind == 'checkout':
+        return _apply_checkout(payload['sale'], payload['stock'])
+    raise ValueError(f"Unknown write operation: {kind}")
+
+def _bulk_requests(operations):
+    """Turn queued bulk operations into pymongo requests"""
+    requests = []
+    for operation in operations:
+        if operation['op'] == 'insert':
+            document = operation['document']
+            fields = {k: v for k, v in document.items() if k != '_id'}
+            requests.append(UpdateOne({'_id': document['_id']}, {'$setOnInsert': fields}, upsert=True))
+        elif operation['op'] == 'update':
+            requests.append(UpdateOne(operation['filter'], {'$set': operation['set']}))
+    return requests
+
+def write_or_queue(collection_name, kind, payload):
+    """Apply a write now, or queue it while offline.
+
+    Returns (queued, result); result is None when the write was queued.
+    """
+    if sync_queue.has_pending() or not ensure_db():
+        sync_queue.enqueue(collection_name, kind, payload)
+        _notify_sync_worker()
+        return True, None
+    try:
+        return False, apply_operation(collection_name, kind, payload)
+    except errors.ConnectionFailure as e:
+        _go_offline(e)
+        sync_queue.enqueue(collection_name, kind, payload)
+        _notify_sync_worker()
+        return True, None
+    except Exception:
+        # MongoDB rejected the write (e.g. a duplicate barcode): drop it locally too
+        _restore_local(_written_collections(collection_name, kind))
+        raise
+
+def _written_collections(collection_name, kind):
+    """Collections a write changes locally; a checkout also takes stock"""
+    if kind == 'checkout':
+        return [collection_name, MONGODB_COLLECTIONS['products']]
+    return [collection_name]
+
+def _restore_local(collection_names):
+    """Reset the cache and JSON journal of collections to what MongoDB holds"""
+    for collection_name in collection_names:
+        _cache_forget(collection_name)
+        if db is None:
+            continue
+        try:
+            documents = list(db[collection_name].find({}, {'_id': 0}))
+            json_journal.record_save(collection_name, documents)
+        except errors.PyMongoError as e:
+            logger.warning("Could not restore the local copy of %s: %s", collection_name, str(e))
+
+def drain_sync_queue():
+    """Replay queued writes in order; returns how many are still pending.
+
+    Each operation's op_id is recorded in SYNC_LOG_COLLECTION so a replay
+    interrupted after MongoDB applied it is not applied twice.
+    """
+    queued = sync_queue.pending()
+    # A queued replace overwrites every earlier save of its collection; diff
+    # saves only carry their own changes, so each of them is replayed
+    last_replace = {
+        operation['collection']: index for index, operation in enumerate(queued)
+        if operation['kind'] == 'save' and operation['payload'].get('mode') == 'replace'
+    }
+    rejected = set()
+    replayed_days = set()
+    for index, operation in enumerate(queued):
+        if db is None:
+            break
+        op_id = operation['op_id']
+        try:
+            sync_log = db[SYNC_LOG_COLLECTION]
+            superseded = operation['kind'] == 'save' and index < last_replace.get(operation['collection'], -1)
+            if not superseded and sync_log.find_one({'_id': op_id}) is None:
+                apply_operation(operation['collection'], operation['kind'], operation['payload'])
+                sync_log.update_one({'_id': op_id}, {'$setOnInsert': {'applied_at': datetime.now()}}, upsert=True)
+                if operation['kind'] == 'checkout':
+                    replayed_days.add(analytics_store.sale_day(operation['payload']['sale']))
+            sync_queue.acknowledge(op_id)
+        except errors.ConnectionFailure as e:
+            _go_offline(e)
+            break
+        except Exception as e:
+            # Kept in the failed file and reported by take_sync_failures()
+            logger.error("MongoDB rejected queued %s on %s: %s", operation['kind'], operation['collection'], str(e))
+            sync_queue.record_failure(operation, e)
+            rejected.update(_written_collections(operation['collection'], operation['kind']))
+    # Once nothing else is queued for them, local copies follow MongoDB again
+    _restore_local(rejected - sync_queue.pending_collections())
+    # Replayed sales may be older than the analytics watermark
+    replayed_days.discard(None)
+    if replayed_days and db is not None:
+        try:
+            analytics_store.recompute_days(db, replayed_days)
+        except errors.PyMongoError as e:
+            logger.warning("Could not update the analytics of replayed checkouts: %s", str(e))
+    remaining = len(sync_queue.pending())
+    if not remaining:
+        logger.debug("Sync queue drained")
+    return remaining
+
+def take_sync_failures():
+    """Queued writes MongoDB rejected since the last call, for the UI to report"""
+    return sync_queue.take_failures()
+
+def _run_maintenance():
+    """Upkeep after (re)connecting: finish interrupted checkouts, then the rollups"""
+    _maintenance_due.clear()
+    try:
+        recover_checkouts()
+        ensure_sales_daily()
+        refresh_analytics()
+    except Exception as e:
+        logger.error("Error during post-connect maintenance: %s", str(e))
+
+def _sync_worker():
+    while True:
+        with _sync_condition:
+            if not _maintenance_due.is_set():
+                _sync_condition.wait(SYNC_RETRY_SECONDS)
+        if _maintenance_due.is_set() and db is not None:
+            _run_maintenance()
+        if not sync_queue.has_pending():
+            continue
+        if db is None:
+            start_db_initialization()
+            continue
+        drain_sync_queue()
+
+def _notify_sync_worker():
+    with _sync_condition:
+        _sync_condition.notify()
+
+def start_sync_worker():
+    """Start the thread that replays queued writes"""
+    global _sync_thread
+    with _sync_condition:
+        if _sync_thread is None:
+            _sync_thread = threading.Thread(target=_sync_worker, name="sync-worker", daemon=True)
+            _sync_thread.start()
+
 def ensure_collection(collection_name):
     """Ensure a collection exists in MongoDB"""
     if db is not None and collection_name not in db.list_collection_names():
         db.create_collection(collection_name)
 
-def load_data(data_type):
-    """Load data from both MongoDB and JSON file with proper synchronization"""
-    if data_type not in MONGODB_COLLECTIONS:
-        print(f"[ERROR] Unknown data type: {data_type}")
-        return None
+def _index_name(keys):
+    """Default name MongoDB gives an index, e.g. 'date_-1'"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+def ensure_indexes():
+    """Create the indexes declared in MONGODB_INDEXES that do not exist yet.
 
+    Reports how long creation took and warns about any declared index that
+    is still missing afterwards (for example duplicates blocking a unique one).
+    """
+    if db is None:
+        return []
+    started = time.perf_counter()
+    created = []
+    missing = []
+    for collection_name, indexes in MONGODB_INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = set(collection.index_information())
+        except errors.PyMongoError as e:
+            logger.warning("Could not read indexes of %s: %s", collection_name, str(e))
+            continue
+        for keys, options in indexes:
+            name = options.get('name', _index_name(keys))
+            if name in existing:
+                continue
+            index_started = time.perf_counter()
+            try:
+                collection.create_index(keys, **options)
+                created.append(name)
+                logger.debug("Created index %s.%s in %.3fs", collection_name, name, time.perf_counter() - index_started)
+            except errors.PyMongoError as e:
+                missing.append(f"{collection_name}.{name}")
+                logger.warning("Missing index %s.%s: %s", collection_name, name, str(e))
+    logger.debug("Index check finished in %.3fs (%s created)", time.perf_counter() - started, len(created))
+    if missing:
+        logger.warning("%s declared indexes are missing, lookups on them will scan: %s", len(missing), ', '.join(missing))
+    return missing
+
+# In-process collection cache
+# Each collection is kept in memory next to a version counter that is bumped
+# on every write, so screens can reload freely and cheaply. The last loaded or
+# written documents also stay on as the collection's base after the cache
+# expires: diff saves compare against it instead of re-reading MongoDB.
+_cache_lock = threading.RLock()
+_collection_cache = {}
+_collection_bases = {}
+_collection_versions = {}
+_cache_watcher = None
+
+def get_collection_version(collection_name):
+    """Return the current version counter of a cached collection"""
+    with _cache_lock:
+        return _collection_versions.get(collection_name, 0)
+
+def _strip_object_ids(data):
+    """Copy documents without their MongoDB _id, the shape load_data returns"""
+    return [{k: copy.deepcopy(v) for k, v in item.items() if k != '_id'} for item in data]
+
+def _cache_get(collection_name):
+    """Return a cached collection as copied rows, or None on a miss.
+
+    Rows are shallow copies: callers may add, change or remove fields, but
+    must not mutate nested lists or dicts in place.
+    """
+    with _cache_lock:
+        data = _collection_cache.get(collection_name)
+        return [dict(item) for item in data] if data is not None else None
+
+def _cache_peek(collection_name):
+    """Return the cached rows themselves, for read-only scans, or None on a miss"""
+    with _cache_lock:
+        data = _collection_cache.get(collection_name)
+        return list(data) if data is not None else None
+
+def _cache_base(collection_name):
+    """Copied rows of the documents this process last loaded or wrote, or None"""
+    with _cache_lock:
+        data = _collection_bases.get(collection_name)
+        return [dict(item) for item in data] if data is not None else None
+
+def _cache_fill(collection_name, data, version):
+    """Store freshly loaded documents unless a write happened meanwhile"""
+    with _cache_lock:
+        if _collection_versions.get(collection_name, 0) == version:
+            _collection_cache[collection_name] = _collection_bases[collection_name] = _strip_object_ids(data)
+
+def _cache_write(collection_name, data):
+    """Write-through: replace the cached documents and bump the version"""
+    with _cache_lock:
+        _collection_cache[collection_name] = _collection_bases[collection_name] = _strip_object_ids(data)
+        _collection_versions[collection_name] = _collection_versions.get(collection_name, 0) + 1
+
+def _cache_append(collection_name, document):
+    """Write-through for a single inserted document"""
+    with _cache_lock:
+        # The cached list, when there is one, is the base list itself
+        if collection_name in _collection_bases:
+            _collection_bases[collection_name].extend(_strip_object_ids([document]))
+        _collection_versions[collection_name] = _collection_versions.get(collection_name, 0) + 1
+
+def _cache_decrement(collection_name, stock_changes):
+    """Write-through for checkout stock changes, matched on 'id' like the $inc"""
+    with _cache_lock:
+        cached = _collection_bases.get(collection_name)
+        if cached is not None:
+            by_id = {}
+            for change in stock_changes:
+                by_id.setdefault(str(change['id']), []).append(change)
+            for document in cached:
+                if not by_id:
+                    break
+                for change in by_id.pop(str(document.get('id')), ()):
+                    current = document.get(change['field'], 0)
+                    if isinstance(current, (int, float)) and not isinstance(current, bool):
+                        document[change['field']] = current - change['quantity']
+        _collection_versions[collection_name] = _collection_versions.get(collection_name, 0) + 1
+
+def invalidate_cache(collection_name=None):
+    """Drop one cached collection (or all of them) and bump its version"""
+    with _cache_lock:
+        names = [collection_name] if collection_name else list(_collection_cache)
+        for name in names:
+            _collection_cache.pop(name, None)
+            _collection_versions[name] = _collection_versions.get(name, 0) + 1
+
+def _cache_forget(collection_name):
+    """Drop the cache and the base of a collection whose local copy was wrong"""
+    with _cache_lock:
+        _collection_bases.pop(collection_name, None)
+    invalidate_cache(collection_name)
+
+def _watch_changes(poll_seconds):
+    """Keep the cache coherent with other terminals sharing the database.
+
+    Uses a MongoDB change stream when the server supports one (replica sets,
+    Atlas) and falls back to expiring the whole cache every poll_seconds.
+    """
+    while db is not None:
+        try:
+            with db.watch() as stream:
+                logger.debug("Cache watcher using MongoDB change stream")
+                for change in stream:
+                    collection_name = change.get('ns', {}).get('coll')
+                    if collection_name:
+                        invalidate_cache(collection_name)
+        except errors.OperationFailure:
+            break
+        except errors.PyMongoError as e:
+            logger.warning("Change stream interrupted: %s", str(e))
+            time.sleep(poll_seconds)
+    logger.debug("Cache watcher polling every %s seconds", poll_seconds)
+    while True:
+        time.sleep(poll_seconds)
+        invalidate_cache()
+
+def start_cache_watcher(mode=DATA_CACHE_REFRESH, poll_seconds=DATA_CACHE_POLL_SECONDS):
+    """Start the optional background refresh of the collection cache.
+
+    mode is 'watch' (change stream with polling fallback), 'poll' or 'none'.
+    """
+    global _cache_watcher
+    if mode == 'none' or _cache_watcher is not None:
+        return
+    if mode == 'watch':
+        target, args = _watch_changes, (poll_seconds,)
+    else:
+        def target():
+            while True:
+                time.sleep(poll_seconds)
+                invalidate_cache()
+        args = ()
+    _cache_watcher = threading.Thread(target=target, args=args, name="cache-watcher", daemon=True)
+    _cache_watcher.start()
+
+def _to_object_id(value):
+    """Convert a string _id back to ObjectId, return None if it is not one"""
+    if isinstance(value, ObjectId):
+        return value
     try:
-        # Initialize database if not already done
-        if db is None:
-            initialize_db()
+        return ObjectId(str(value))
+    except Exception:
+        return None
 
-        # Ensure collection exists
-        if db is not None:
-            ensure_collection(MONGODB_COLLECTIONS[data_type])
+def _values_equal(a, b):
+    """Compare two field values, treating NaN as equal to NaN"""
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_values_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_values_equal(x, y) for x, y in zip(a, b))
+    return a == b
 
-        # Try to load from MongoDB first
-        if db is not None:
-            collection = db[MONGODB_COLLECTIONS[data_type]]
-            data = list(collection.find())
-            # Convert ObjectId to string for JSON serialization
-            for item in data:
-                if '_id' in item:
-                    item['_id'] = str(item['_id'])
-            print(f"[DEBUG] Loaded {len(data)} items from MongoDB")
-            
-            # Save to JSON file for backup
-            filename = os.path.join(MONGODB_DATA_PATH, f"{MONGODB_COLLECTIONS[data_type]}.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-            print(f"[DEBUG] Saved {len(data)} items to {filename}")
-            
-            # Export to Excel for consistency
-            export_to_excel(data_type)
-            
-            return data
-        else:
-            # If MongoDB is not available, try to load from JSON
-            filename = os.path.join(MONGODB_DATA_PATH, f"{MONGODB_COLLECTIONS[data_type]}.json")
-            if os.path.exists(filename):
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                print(f"[DEBUG] Loaded {len(data)} items from {filename}")
-                
-                # Export to Excel for consistency
-                export_to_excel(data_type)
-                
-                return data
+def _content_key(item):
+    """Stable key for documents that carry neither _id nor id"""
+    return json.dumps(
+        {k: v for k, v in item.items() if k != '_id'},
+        sort_keys=True, default=str, ensure_ascii=False
+    )
+
+def replace_collection(collection, data):
+    """Clear a collection and insert all documents again (legacy save mode)"""
+    collection.delete_many({})
+    logger.debug("Cleared existing data from %s", collection.name)
+    if not data:
+        logger.debug("No data to save to MongoDB")
+        return
+    mongo_data = []
+    for item in data:
+        item_copy = item.copy()
+        if '_id' in item_copy:
+            object_id = _to_object_id(item_copy['_id'])
+            if object_id is None:
+                # Let MongoDB generate a new one
+                del item_copy['_id']
             else:
-                # If JSON doesn't exist, try to load from Excel (except for products)
-                if data_type == 'products':
-                    print(f"[DEBUG] No data files found for products, returning empty list")
-                    return []
-                excel_path = EXCEL_FILES[data_type]
-                if os.path.exists(excel_path):
-                    print(f"[DEBUG] Loading from Excel: {excel_path}")
-                    if data_type == 'customers':
-                        df = pd.read_excel(excel_path)
-                        excel_to_program = {
-                            "رقم العميل": "id",
-                            "اسم العميل": "name",
-                            "فئة العميل": "category",
-                            "العنوان": "address",
-                            "تليفون 1": "phone1",
-                            "تليفون 2": "phone2",
-                            "عملة الحساب": "currency",
-                            "المدينة": "city",
-                            "المحافظة": "governorate",
-                            "الدولة": "country",
-                            "المندوب": "representative",
-                            "ملاحظات": "notes"
-                        }
-                        df = df.rename(columns=excel_to_program)
-                        needed_fields = list(excel_to_program.values())
-                        df = df[needed_fields]
-                    else:
-                        df = pd.read_excel(excel_path)
-                    data = df.to_dict('records')
-                    print("[DEBUG] Imported customer data (first 3):", data[:3])
-                    
-                    # Save to JSON for future use
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=4, ensure_ascii=False)
-                    print(f"[DEBUG] Saved {len(data)} items to {filename}")
-                    
-                    return data
-                else:
-                    print(f"[DEBUG] No data files found, returning empty list")
-                    return []
-    except Exception as e:
-        print(f"[ERROR] Error loading data: {str(e)}")
-        import traceback
-        print(f"[TRACEBACK] {traceback.format_exc()}")
-        return []
+                item_copy['_id'] = object_id
+        mongo_data.append(item_copy)
+    # Insert data in batches to avoid memory issues
+    batch_size = 100
+    for i in range(0, len(mongo_data), batch_size):
+        collection.insert_many(mongo_data[i:i + batch_size])
+    logger.debug("Saved %s items to MongoDB %s collection", len(mongo_data), collection.name)
+
+def _stored_filter(doc):
+    """Filter selecting a stored document: by _id, else 'id', else its content"""
+    if doc.get('_id') is not None:
+        return {'_id': doc['_id']}
+    if doc.get('id') is not None:
+        return {'id': doc['id']}
+    return {k: v for k, v in doc.items() if k != '_id'}
+
+def diff_documents(existing, data):
+    """Build the bulk operations that turn the existing documents into data"""
+    return _change_requests(diff_changes(existing, data))
 
-def save_data(data_type, data):
-    """Save data to both MongoDB and JSON file"""
+def diff_changes(existing, data):
+    """List the changes that turn the existing documents into data.
+
+    Documents are matched by _id first, then by the application 'id' field,
+    then by their full content. Only new, changed and removed documents
+    produce a change. existing may come from MongoDB or from the cache
+    (without _id); changes then select documents by 'id' or content.
+
+    Changes are plain dicts ({'op': 'insert', 'document'}, {'op': 'update',
+    'filter', 'update'} or {'op': 'delete', 'filter'}), so a save can be
+    queued as exactly the edits it made.
+    """
+    by_object_id = {}
+    by_id = {}
+    by_content = {}
+    for index, doc in enumerate(existing):
+        if doc.get('_id') is not None:
+            by_object_id[str(doc['_id'])] = index
+        if doc.get('id') is not None:
+            by_id.setdefault(str(doc['id']), []).append(index)
+        else:
+            by_content.setdefault(_content_key(doc), []).append(index)
+
+    matched = set()
+
+    def take(index):
+        if index is None or index in matched:
+            return None
+        matched.add(index)
+        return existing[index]
+
+    operations = []
+    for item in data:
+        stored = None
+        if item.get('_id') is not None:
+            stored = take(by_object_id.get(str(item['_id'])))
+        if stored is None and item.get('id') is not None:
+            for candidate in by_id.get(str(item['id']), []):
+                stored = take(candidate)
+                if stored is not None:
+                    break
+        if stored is None and item.get('id') is None:
+            for candidate in by_content.get(_content_key(item), []):
+                stored = take(candidate)
+                if stored is not None:
+                    break
+
+        fields = {k: v for k, v in item.items() if k != '_id'}
+        if stored is None:
+            object_id = _to_object_id(item['_id']) if item.get('_id') is not None else None
+            if object_id is not None and str(object_id) not in by_object_id:
+                fields['_id'] = object_id
+            operations.append({'op': 'insert', 'document': fields})
+            continue
+
+        changed = {k: v for k, v in fields.items() if k not in stored or not _values_equal(stored[k], v)}
+        removed = {k: "" for k in stored if k != '_id' and k not in fields}
+        if changed or removed:
+            update = {}
+            if changed:
+                update['$set'] = changed
+            if removed:
+                update['$unset'] = removed
+            operations.append({'op': 'update', 'filter': _stored_filter(stored), 'update': update})
+
+    for index, doc in enumerate(existing):
+        if index not in matched:
+            operations.append({'op': 'delete', 'filter': _stored_filter(doc)})
+    return operations
+
+def _change_requests(changes):
+    """Turn diff_changes() output into pymongo requests"""
+    requests = []
+    for change in changes:
+        if change['op'] == 'insert':
+            requests.append(InsertOne(dict(change['document'])))
+        elif change['op'] == 'update':
+            requests.append(UpdateOne(change['filter'], change['update']))
+        else:
+            requests.append(DeleteOne(change['filter']))
+    return requests
+
+def apply_changes(collection, changes):
+    """Write diff_changes() output to the collection with one bulk_write"""
+    if not changes:
+        logger.debug("No changes to save to MongoDB %s collection", collection.name)
+        return
+    result = collection.bulk_write(_change_requests(changes), ordered=False)
+    logger.debug("Synced MongoDB %s collection: %s inserted, %s updated, %s deleted", collection.name, result.inserted_count, result.modified_count, result.deleted_count)
+
+def sync_collection(collection, data):
+    """Write only the documents of data that differ from the whole collection"""
+    apply_changes(collection, diff_changes(list(collection.find()), data))
+
+def save_data(data_type, data, mode='diff'):
+    """Save data to both MongoDB and JSON file
+
+    mode='diff' only writes the documents that changed since the last save,
+    mode='replace' clears the collection and re-inserts everything.
+    """
     if data_type not in MONGODB_COLLECTIONS:
-        print(f"[ERROR] Unknown data type for saving: {data_type}")
+        logger.error("Unknown data type for saving: %s", data_type)
         return False
 
     try:
-        # Initialize database if not already done
-        if db is None:
-            if not initialize_db():
-                print("[ERROR] Failed to initialize database")
-                return False
+        # Store numbers as numbers, whatever screen or file they came from
+        schema.coerce_documents(MONGODB_COLLECTIONS[data_type], data)
 
-        # Ensure collection exists
-        if db is not None:
-            ensure_collection(MONGODB_COLLECTIONS[data_type])
-            print(f"[DEBUG] Ensured collection exists: {MONGODB_COLLECTIONS[data_type]}")
+        # What data was edited from: this process's last load or write, else
+        # the local JSON copy offline screens read (taken before journaling)
+        base = _cache_base(MONGODB_COLLECTIONS[data_type])
+        if base is None and mode != 'replace':
+            base = _strip_object_ids(json_journal.load_collection(MONGODB_COLLECTIONS[data_type]))
 
         # Create a copy of data for JSON serialization
         json_data = []
@@ -181,139 +686,357 @@ def save_data(data_type, data):
                     item_copy['_id'] = str(item_copy['_id'])
             json_data.append(item_copy)
 
-        # Save to JSON file in MongoDB data path
-        filename = os.path.join(MONGODB_DATA_PATH, f"{MONGODB_COLLECTIONS[data_type]}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=4, ensure_ascii=False)
-        print(f"[DEBUG] Saved {len(json_data)} items to {filename}")
+        # Append the changed documents to the JSON journal in MongoDB data path
+        changes = json_journal.record_save(MONGODB_COLLECTIONS[data_type], json_data)
+        logger.debug("Journaled %s changes for %s", changes, MONGODB_COLLECTIONS[data_type])
         
-        # Save to MongoDB if connection is available
-        if db is not None:
-            collection = db[MONGODB_COLLECTIONS[data_type]]
-            # Clear existing data
-            collection.delete_many({})
-            print(f"[DEBUG] Cleared existing data from {MONGODB_COLLECTIONS[data_type]}")
-            
-            # Insert new data
-            if data:
-                # Convert string IDs back to ObjectId for MongoDB
-                mongo_data = []
-                for item in data:
-                    item_copy = item.copy()
-                    if '_id' in item_copy and isinstance(item_copy['_id'], str):
-                        try:
-                            item_copy['_id'] = ObjectId(item_copy['_id'])
-                        except:
-                            # If conversion fails, remove the _id field to let MongoDB generate a new one
-                            del item_copy['_id']
-                    mongo_data.append(item_copy)
-                
-                # Insert data in batches to avoid memory issues
-                batch_size = 100
-                for i in range(0, len(mongo_data), batch_size):
-                    batch = mongo_data[i:i + batch_size]
-                    collection.insert_many(batch)
-                    print(f"[DEBUG] Inserted batch of {len(batch)} items")
-                
-                print(f"[DEBUG] Saved {len(mongo_data)} items to MongoDB {MONGODB_COLLECTIONS[data_type]} collection")
-            else:
-                print("[DEBUG] No data to save to MongoDB")
+        _cache_write(MONGODB_COLLECTIONS[data_type], data)
         
-        # Export to Excel after saving to JSON and MongoDB
-        if export_to_excel(data_type):
-            print(f"[DEBUG] Successfully exported data to Excel")
+        # Save to MongoDB, or queue the save while offline. A diff save is
+        # queued as its own changes, so replaying it later leaves documents
+        # other terminals wrote meanwhile alone.
+        if mode == 'replace':
+            payload = {'data': data, 'mode': mode}
         else:
-            print(f"[WARNING] Failed to export data to Excel")
+            payload = {'changes': diff_changes(base, data), 'mode': mode}
+        queued, _ = write_or_queue(MONGODB_COLLECTIONS[data_type], 'save', payload)
+        if queued:
+            logger.debug("MongoDB unavailable, queued save of %s", MONGODB_COLLECTIONS[data_type])
+        
+        # Export to Excel in the background once the burst of saves settles
+        schedule_excel_export(data_type)
         
         return True
     except Exception as e:
-        print(f"[ERROR] Error saving data: {str(e)}")
-        import traceback
-        print(f"[TRACEBACK] {traceback.format_exc()}")
+        logger.exception("Error saving data: %s", str(e))
         return False
 
-def export_to_excel(data_type):
-    """Export data to Excel file"""
+# Background Excel export
+# Saves only mark a collection dirty; one worker thread rewrites the workbook
+# at most once per EXCEL_EXPORT_DELAY_SECONDS, off the Tk thread.
+_export_condition = threading.Condition()
+_export_write_lock = threading.Lock()
+_pending_exports = {}
+_export_thread = None
+
+def schedule_excel_export(data_type):
+    """Mark a collection dirty so the background exporter rewrites its workbook"""
+    global _export_thread
+    if data_type not in EXCEL_FILES:
+        return
+    with _export_condition:
+        _pending_exports.setdefault(data_type, time.monotonic())
+        if _export_thread is None:
+            _export_thread = threading.Thread(target=_export_worker, name="excel-exporter", daemon=True)
+            _export_thread.start()
+        _export_condition.notify()
+
+def _export_worker():
+    """Export each dirty collection once its coalescing window has passed"""
+    while True:
+        with _export_condition:
+            while True:
+                if not _pending_exports:
+                    _export_condition.wait()
+                    continue
+                data_type, marked_at = min(_pending_exports.items(), key=lambda entry: entry[1])
+                remaining = marked_at + EXCEL_EXPORT_DELAY_SECONDS - time.monotonic()
+                if remaining <= 0:
+                    del _pending_exports[data_type]
+                    break
+                _export_condition.wait(remaining)
+        _run_export(data_type)
+
+def _run_export(data_type):
+    with _export_write_lock:
+        if not export_to_excel(data_type):
+            logger.warning("Failed to export %s to Excel", data_type)
+        if EXCEL_COMBINED_WORKBOOK and not export_workbook():
+            logger.warning("Failed to export %s", EXCEL_COMBINED_WORKBOOK)
+
+def flush_excel_exports():
+    """Write every pending Excel export now (used on exit)"""
+    with _export_condition:
+        pending = list(_pending_exports)
+        _pending_exports.clear()
+    for data_type in pending:
+        _run_export(data_type)
+
+# Content hash of what was last written, per file (and per combined workbook),
+# so saves that leave a collection unchanged do not rewrite its workbook
+_export_hashes = {}
+
+def _excel_cell(value):
+    """Convert a field value to something openpyxl can store"""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+def _read_excel_header(excel_path):
+    """Header row of an existing workbook, or [] if there is none"""
+    if not os.path.exists(excel_path):
+        return []
+    try:
+        workbook = load_workbook(excel_path, read_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        return [str(column) for column in header if column is not None]
+    except Exception as e:
+        logger.warning("Could not read header of %s: %s", excel_path, str(e))
+        return []
+
+def _export_data(data_type):
+    data = load_data(data_type)
+    # تصدير المنتجات المعرفة فقط إذا كان نوع البيانات products
+    if data is not None and data_type == 'products':
+        data = [item for item in data if item.get('source', 'defined') != 'inventory']
+    return data
+
+def _export_table(data_type, data):
+    """Header row and value rows for a collection.
+
+    Columns keep the order of the existing workbook, then the
+    EXCEL_COLUMN_HEADERS order, then new fields as they first appear.
+    Fields listed in EXCEL_COLUMN_HEADERS are written under their mapped
+    header so import_from_excel can read them back.
+    """
+    headers = EXCEL_COLUMN_HEADERS.get(data_type, {})
+    to_field = {header: field for field, header in headers.items()}
+    fields = {field: None for field in headers}
+    for item in data:
+        for field in item:
+            if field != '_id':
+                fields.setdefault(field, None)
+    columns = [to_field.get(header, header) for header in _read_excel_header(EXCEL_FILES[data_type])]
+    columns = [field for field in dict.fromkeys(columns) if field in fields]
+    columns += [field for field in fields if field not in columns]
+    rows = [[_excel_cell(item.get(field)) for field in columns] for item in data]
+    return [headers.get(field, field) for field in columns], rows
+
+def _table_hash(header, rows):
+    digest = hashlib.sha1()
+    digest.update(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+    for row in rows:
+        digest.update(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+def _write_workbook(path, sheets):
+    """Write [(title, header, rows)] with a write-only workbook, replacing path atomically"""
+    workbook = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        sheet = workbook.create_sheet(title=title[:31])
+        if header:
+            sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+    tmp_path = f"{path}.tmp.xlsx"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+
+def export_to_excel(data_type, force=False):
+    """Export data to Excel file, skipping it if nothing changed since the last export"""
     if data_type not in EXCEL_FILES:
-        print(f"[ERROR] Unknown data type for Excel export: {data_type}")
+        logger.error("Unknown data type for Excel export: %s", data_type)
         return False
 
     try:
-        data = load_data(data_type)
+        data = _export_data(data_type)
         if data is None:
             return False
 
-        # تصدير المنتجات المعرفة فقط إذا كان نوع البيانات products
-        if data_type == 'products':
-            data = [item for item in data if item.get('source', 'defined') != 'inventory']
-
-        df = pd.DataFrame(data)
         excel_path = EXCEL_FILES[data_type]
-        df.to_excel(excel_path, index=False)
-        print(f"[DEBUG] Exported data to {excel_path}")
+        header, rows = _export_table(data_type, data)
+        table_hash = _table_hash(header, rows)
+        if not force and _export_hashes.get(excel_path) == table_hash and os.path.exists(excel_path):
+            return True
+        _write_workbook(excel_path, [('Sheet1', header, rows)])
+        _export_hashes[excel_path] = table_hash
+        logger.debug("Exported %s rows to %s", len(rows), excel_path)
         return True
     except Exception as e:
-        print(f"[ERROR] Error exporting to Excel: {str(e)}")
+        logger.error("Error exporting to Excel: %s", str(e))
         return False
 
-def merge_excel_data(data_type, excel_data):
-    """Merge Excel data with existing database data instead of replacing"""
+def export_workbook(path=EXCEL_COMBINED_WORKBOOK, data_types=None, force=False):
+    """Export several collections into one workbook, one sheet each, in one pass"""
+    try:
+        sheets = []
+        for data_type in data_types or EXCEL_FILES:
+            data = _export_data(data_type)
+            if data is None:
+                continue
+            header, rows = _export_table(data_type, data)
+            sheets.append((data_type, header, rows))
+        workbook_hash = tuple(_table_hash(header, rows) for _, header, rows in sheets)
+        if not force and _export_hashes.get(path) == workbook_hash and os.path.exists(path):
+            return True
+        _write_workbook(path, sheets)
+        _export_hashes[path] = workbook_hash
+        logger.debug("Exported %s sheets to %s", len(sheets), path)
+        return True
+    except Exception as e:
+        logger.error("Error exporting workbook: %s", str(e))
+        return False
+
+# Excel merge engine
+# Incoming rows are matched to existing items with pandas joins on normalized
+# keys (name, then barcode) instead of a Python loop per row.
+def _normalize_barcode(value):
+    """Barcodes read as numbers (123.0) or padded strings compare as text"""
+    return schema.normalize_barcode(value)
+
+def _merge_keys(frame):
+    """Normalized (name, barcode) key series for a frame of items"""
+    if 'name' in frame:
+        names = frame['name'].astype('string').str.strip().str.lower()
+        names = names.mask(names == '')
+    else:
+        names = pd.Series(pd.NA, index=frame.index, dtype='string')
+    if 'barcode' in frame:
+        barcodes = frame['barcode'].map(_normalize_barcode).astype('string')
+    else:
+        barcodes = pd.Series(pd.NA, index=frame.index, dtype='string')
+    return names, barcodes
+
+def _id_value_key(value):
+    """Application ids read as numbers (7.0), text or ints compare as text"""
+    if value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+        return pd.NA
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or pd.NA
+
+def _id_keys(frame):
+    """Normalized 'id' key series for a frame of items"""
+    if 'id' not in frame:
+        return pd.Series(pd.NA, index=frame.index, dtype='string')
+    return frame['id'].map(_id_value_key).astype('string')
+
+def _key_positions(keys):
+    """key -> position of the last item with that key"""
+    positions = pd.Series(range(len(keys)), index=keys.values)
+    positions = positions[positions.index.notna()]
+    return positions[~positions.index.duplicated(keep='last')]
+
+def merge_records(existing, incoming, data_type=None, policy=EXCEL_MERGE_POLICY):
+    """Match incoming rows against existing items.
+
+    Rows match an item by id, then by name (case-insensitive), then by
+    barcode, so a row whose id already exists is never added again. Several
+    rows for one item are combined, later non-empty values winning. With
+    policy "excel" non-empty incoming values overwrite the item; with
+    "existing" they only fill fields the item leaves empty. Rows that match
+    nothing are de-duplicated the same way and become new items; when
+    data_type is given they get IDs from one reserve_ids call.
+
+    Returns {'added': [rows], 'updated': [(item, changes)], 'unchanged': n}
+    without modifying existing.
+    """
+    result = {'added': [], 'updated': [], 'unchanged': 0}
+    if not incoming:
+        return result
+    rows = pd.DataFrame(incoming, dtype=object)
+    rows = rows.drop(columns=['_id'], errors='ignore')
+    # Blank cells never overwrite anything
+    rows = rows.mask(rows.isna() | rows.eq(''))
+    names, barcodes = _merge_keys(rows)
+    ids = _id_keys(rows)
+
+    matches = pd.Series(float('nan'), index=rows.index)
+    if existing:
+        existing_frame = pd.DataFrame(
+            [{'id': item.get('id'), 'name': item.get('name'), 'barcode': item.get('barcode')} for item in existing],
+            dtype=object
+        )
+        existing_names, existing_barcodes = _merge_keys(existing_frame)
+        by_id = ids.map(_key_positions(_id_keys(existing_frame)))
+        by_name = names.map(_key_positions(existing_names))
+        by_barcode = barcodes.map(_key_positions(existing_barcodes))
+        # A row with an id only matches by id: another item's name is not it
+        matches = by_id.where(ids.notna(), by_name.fillna(by_barcode))
+    matched = matches.notna()
+
+    if matched.any():
+        combined = rows[matched].groupby(matches[matched].astype(int), sort=False).last()
+        current = pd.DataFrame(
+            [existing[position] for position in combined.index], index=combined.index, dtype=object
+        ).reindex(columns=combined.columns)
+        current = current.mask(current.isna())
+        differs = combined.notna() & ~combined.eq(current)
+        if 'barcode' in combined:
+            differs['barcode'] &= combined['barcode'].map(_normalize_barcode) != current['barcode'].map(_normalize_barcode)
+        if policy == 'existing':
+            differs &= current.isna() | current.eq('')
+        changed = differs.any(axis=1)
+        for position, mask in differs[changed].iterrows():
+            changes = {column: combined.at[position, column] for column in combined.columns[mask.values]}
+            result['updated'].append((existing[position], changes))
+        result['unchanged'] = int((~changed).sum())
+
+    if (~matched).any():
+        new_rows = rows[~matched]
+        # Group repeated new items the same way: id, name, then barcode, else the row itself
+        group_keys = ('id:' + ids[~matched]).fillna(names[~matched]).fillna('barcode:' + barcodes[~matched])
+        group_keys = group_keys.fillna(pd.Series(new_rows.index, index=new_rows.index).map('row:{}'.format))
+        new_rows = new_rows.groupby(group_keys.values, sort=False).last()
+        added = new_rows.astype(object).where(new_rows.notna(), None).to_dict('records')
+        missing_ids = [row for row in added if row.get('id') is None]
+        if data_type and missing_ids:
+            next_id = reserve_ids(data_type, len(missing_ids))
+            if next_id is not None:
+                for offset, row in enumerate(missing_ids):
+                    row['id'] = next_id + offset
+        result['added'] = added
+    return result
+
+def _apply_merge(existing, result, defaults=None):
+    """Fold a merge_records result into existing and return its bulk operations"""
+    operations = []
+    for item, changes in result['updated']:
+        if item.get('id') is not None:
+            match = {'id': item['id']}
+        else:
+            match = {'name': item.get('name')}
+        operations.append({'op': 'update', 'filter': match, 'set': changes})
+        item.update(changes)
+    for row in result['added']:
+        for column, value in (defaults or {}).items():
+            row.setdefault(column, value)
+        operations.append({'op': 'insert', 'document': dict(row, _id=ObjectId())})
+        existing.append(row)
+    return operations
+
+def merge_excel_data(data_type, excel_data, policy=EXCEL_MERGE_POLICY):
+    """Merge Excel data with existing database data instead of replacing
+
+    Only changed and new items are written. Returns the change summary
+    {'added', 'updated', 'unchanged'}, or False on error.
+    """
     if data_type not in MONGODB_COLLECTIONS:
-        print(f"[ERROR] Unknown data type for merging: {data_type}")
+        logger.error("Unknown data type for merging: %s", data_type)
         return False
 
     try:
-        # Load existing data
         existing_data = load_data(data_type) or []
-        print(f"[DEBUG] Existing data count: {len(existing_data)}")
-        
-        # Create a dictionary of existing data by name and barcode for quick lookup
-        existing_by_name = {item.get('name', '').lower(): item for item in existing_data}
-        existing_by_barcode = {item.get('barcode', ''): item for item in existing_data}
-        
-        # Process Excel data
-        merged_data = existing_data.copy()
-        updated_count = 0
-        added_count = 0
-        
-        for excel_item in excel_data:
-            excel_name = (excel_item.get('name') or '').lower()
-            excel_barcode = excel_item.get('barcode', '')
-            
-            # Check if item exists by name or barcode
-            existing_item = None
-            if excel_name in existing_by_name:
-                existing_item = existing_by_name[excel_name]
-            elif excel_barcode and excel_barcode in existing_by_barcode:
-                existing_item = existing_by_barcode[excel_barcode]
-            
-            if existing_item:
-                # Update existing item with Excel data
-                for key, value in excel_item.items():
-                    if value is not None and value != '':
-                        existing_item[key] = value
-                updated_count += 1
-                print(f"[DEBUG] Updated existing item: {excel_item.get('name', 'Unknown')}")
-            else:
-                # Add new item
-                if 'id' not in excel_item:
-                    excel_item['id'] = get_next_id(data_type)
-                merged_data.append(excel_item)
-                added_count += 1
-                print(f"[DEBUG] Added new item: {excel_item.get('name', 'Unknown')}")
-        
-        # Save merged data
-        if save_data(data_type, merged_data):
-            print(f"[DEBUG] Successfully merged Excel data: {updated_count} updated, {added_count} added")
-            return True
-        else:
-            print(f"[ERROR] Failed to save merged data")
-            return False
-            
+        # Blank cells stay None so they never overwrite existing values
+        schema.coerce_documents(MONGODB_COLLECTIONS[data_type], excel_data, fill_blanks=False)
+        result = merge_records(existing_data, excel_data, data_type, policy)
+        operations = _apply_merge(existing_data, result)
+        if operations:
+            _write_import_chunk(MONGODB_COLLECTIONS[data_type], operations)
+            schedule_excel_export(data_type)
+        summary = {'added': len(result['added']), 'updated': len(result['updated']), 'unchanged': result['unchanged']}
+        logger.debug("Merged Excel data into %s: %s", data_type, summary)
+        return summary
     except Exception as e:
-        print(f"[ERROR] Error merging Excel data: {str(e)}")
-        import traceback
-        print(f"[TRACEBACK] {traceback.format_exc()}")
+        logger.exception("Error merging Excel data: %s", str(e))
         return False
 
 def clean_excel_data(data):
@@ -323,52 +1046,121 @@ def clean_excel_data(data):
                 row[k] = None
     return data
 
-def import_from_excel(data_type):
-    """Import data from Excel file and sync with database"""
+# Streaming Excel import
+# The sheet is read row by row (openpyxl read_only) and merged IMPORT_CHUNK_SIZE
+# rows at a time with one bulk write per chunk, so memory does not grow with
+# the size of the workbook.
+PRODUCT_REQUIRED_COLUMNS = ['name', 'type', 'flavor', 'quantity', 'sale_type', 'price', 'status', 'image_path', 'barcode']
+
+def _excel_value(value):
+    """Blank cells become None, like pandas NaN after clean_excel_data.
+
+    Lists and dicts, which _excel_cell writes as JSON text, are decoded.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, str) and value[:1] in ('[', '{'):
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return value
+        if isinstance(decoded, (list, dict)):
+            return decoded
+    return value
+
+def iter_excel_chunks(excel_path, chunk_size=IMPORT_CHUNK_SIZE, headers=None):
+    """Yield (rows_read, total_rows, rows) for the first sheet, chunk by chunk
+
+    headers optionally maps Excel column headers to field names.
+    """
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        total_rows = max((sheet.max_row or 1) - 1, 0)
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        headers = headers or {}
+        columns = [headers.get(str(column), str(column)) for column in header if column is not None]
+        positions = [index for index, column in enumerate(header) if column is not None]
+        chunk = []
+        rows_read = 0
+        for values in rows:
+            rows_read += 1
+            record = {
+                column: _excel_value(values[index]) if index < len(values) else None
+                for column, index in zip(columns, positions)
+            }
+            # Skip blank rows left behind by deleted entries
+            if all(value is None for value in record.values()):
+                continue
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield rows_read, max(total_rows, rows_read), chunk
+                chunk = []
+        if chunk or rows_read == 0:
+            yield rows_read, max(total_rows, rows_read), chunk
+    finally:
+        workbook.close()
+
+def _write_import_chunk(collection_name, operations):
+    """Journal a chunk locally, then bulk write it to MongoDB (or queue it)"""
+    for operation in operations:
+        if operation['op'] == 'insert':
+            schema.coerce_document(collection_name, operation['document'])
+    json_journal.record_bulk(collection_name, operations)
+    write_or_queue(collection_name, 'bulk', {'operations': operations})
+    invalidate_cache(collection_name)
+
+def import_from_excel(data_type, progress_callback=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import data from Excel file and sync with database
+
+    The sheet is streamed in chunks; progress_callback(rows_read, total_rows)
+    is called after each chunk is written.
+    """
     if data_type not in EXCEL_FILES:
-        print(f"[ERROR] Unknown data type for Excel import: {data_type}")
+        logger.error("Unknown data type for Excel import: %s", data_type)
         return False
 
     try:
-        # Initialize database if not already done
-        if db is None:
-            if not initialize_db():
-                print("[ERROR] Failed to initialize database")
-                return False
-
         excel_path = EXCEL_FILES[data_type]
-        required_cols = []
-        if data_type == 'products':
-            required_cols = ['name', 'type', 'flavor', 'quantity', 'sale_type', 'price', 'status', 'image_path', 'barcode']
+        collection_name = MONGODB_COLLECTIONS[data_type]
+        required_cols = PRODUCT_REQUIRED_COLUMNS if data_type == 'products' else []
         # إذا لم يوجد ملف الإكسيل أنشئه بالأعمدة المطلوبة
         if not os.path.exists(excel_path):
-            print(f"[DEBUG] Excel file not found: {excel_path}, creating new one.")
+            logger.debug("Excel file not found: %s, creating new one.", excel_path)
             df = pd.DataFrame(columns=required_cols)
             df.to_excel(excel_path, index=False)
-        # اقرأ البيانات
-        df = pd.read_excel(excel_path)
-        # إذا كان هناك أعمدة ناقصة أضفها
-        if data_type == 'products':
-            missing = [col for col in required_cols if col not in df.columns]
-            if missing:
-                for col in missing:
-                    df[col] = '' if col not in ['quantity', 'price'] else 0
-                df.to_excel(excel_path, index=False)
-                print(f"[DEBUG] Added missing columns to Excel: {missing}")
-        data = df.to_dict('records')
-        data = clean_excel_data(data)
-        print(f"[DEBUG] Read {len(data)} records from Excel")
-        # Merge Excel data with existing data instead of replacing
-        if merge_excel_data(data_type, data):
-            print(f"[DEBUG] Successfully imported and merged {len(data)} items from Excel")
-            return True
-        else:
-            print(f"[ERROR] Failed to merge imported data")
-            return False
+
+        existing_data = query(data_type)
+        summary = {'added': 0, 'updated': 0, 'unchanged': 0}
+        rows_read = 0
+        # الأعمدة الناقصة تأخذ قيمًا افتراضية في العناصر الجديدة فقط
+        defaults = {col: '' if col not in ['quantity', 'price'] else 0 for col in required_cols}
+        # Workbooks may use the mapped (e.g. Arabic) headers written by export_to_excel
+        headers = {header: field for field, header in EXCEL_COLUMN_HEADERS.get(data_type, {}).items()}
+        for rows_read, total_rows, rows in iter_excel_chunks(excel_path, chunk_size, headers):
+            schema.coerce_documents(collection_name, rows, fill_blanks=False)
+            result = merge_records(existing_data, rows, data_type)
+            # Later chunks see this chunk's items, so repeated rows merge
+            operations = _apply_merge(existing_data, result, defaults)
+            if operations:
+                _write_import_chunk(collection_name, operations)
+            summary['added'] += len(result['added'])
+            summary['updated'] += len(result['updated'])
+            summary['unchanged'] += result['unchanged']
+            if progress_callback:
+                progress_callback(rows_read, total_rows)
+
+        logger.debug("Imported %s Excel rows into %s: %s", rows_read, collection_name, summary)
+        if summary['added'] or summary['updated']:
+            schedule_excel_export(data_type)
+        return True
     except Exception as e:
-        print(f"[ERROR] Error importing from Excel: {str(e)}")
-        import traceback
-        print(f"[TRACEBACK] {traceback.format_exc()}")
+        logger.exception("Error importing from Excel: %s", str(e))
         return False
 
 def load_credentials():
@@ -390,68 +1182,37 @@ def save_credentials(username, password):
         return False
 
 def insert_document(collection_name, document):
-    """Insert a single document into a collection"""
-    if db is None:
-        show_error("Database connection not available")
-        return None
+    """Insert a single document into a collection (queued while offline)"""
     try:
-        collection = db[collection_name]
-        result = collection.insert_one(document)
-        return str(result.inserted_id)
+        # Assign the _id up front so a replayed insert stays idempotent
+        document.setdefault('_id', ObjectId())
+        schema.coerce_document(collection_name, document)
+        json_journal.record_insert(collection_name, document)
+        _cache_append(collection_name, document)
+        write_or_queue(collection_name, 'insert', {'document': document})
+        return str(document['_id'])
     except Exception as e:
         show_error(f"Error inserting document: {str(e)}")
         return None
 
 def update_document(collection_name, document_id, update_data):
-    """Update a document in a collection"""
-    if db is None:
-        show_error("Database connection not available")
-        return False
+    """Update a document in a collection (queued while offline)"""
     try:
-        collection = db[collection_name]
-        result = collection.update_one(
-            {'_id': ObjectId(document_id)},
-            {'$set': update_data}
+        schema.coerce_document(collection_name, update_data)
+        json_journal.record_update_where(collection_name, '_id', document_id, update_data)
+        queued, result = write_or_queue(
+            collection_name, 'update',
+            {'filter': {'_id': ObjectId(document_id)}, 'update': {'$set': update_data}}
         )
-        return result.modified_count > 0
+        invalidate_cache(collection_name)
+        return queued or result.modified_count > 0
     except Exception as e:
         show_error(f"Error updating document: {str(e)}")
         return False
 
-def delete_document(collection_name, document_id):
-    """Delete a document from both MongoDB and JSON file"""
-    if db is None:
-        show_error("Database connection not available")
-        return False
-    try:
-        # Delete from MongoDB
-        collection = db[collection_name]
-        result = collection.delete_one({'_id': ObjectId(document_id)})
-        
-        if result.deleted_count > 0:
-            # If deleted from MongoDB, update JSON file
-            data = list(collection.find())
-            # Convert ObjectId to string for JSON serialization
-            for item in data:
-                if '_id' in item:
-                    item['_id'] = str(item['_id'])
-            
-            filename = os.path.join(MONGODB_DATA_PATH, f"{collection_name}.json")
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=4)
-            
-            # Update Excel file
-            export_to_excel(collection_name)
-            
-            return True
-        return False
-    except Exception as e:
-        show_error(f"Error deleting document: {str(e)}")
-        return False
-
 def get_document(collection_name, document_id):
     """Get a single document by ID"""
-    if db is None:
+    if not ensure_db():
         show_error("Database connection not available")
         return None
     try:
@@ -464,51 +1225,353 @@ def get_document(collection_name, document_id):
         show_error(f"Error getting document: {str(e)}")
         return None
 
+# Checkout
+# A sale is one insert plus one $inc per stock line and one on its
+# SALES_DAILY_COLLECTION rollup, never a rewrite of the sales journal, so
+# checkout cost does not grow with the number of sales.
+# On a replica set all writes commit in one transaction. Elsewhere each step
+# is recorded in CHECKOUT_LOG_COLLECTION and made safe to repeat, so a
+# checkout cut off halfway is rolled forward (exactly once) on reconnect.
+CHECKOUT_MARKER_FIELD = '_checkouts'
+_transactions_supported = None
+
+def _stock_requests(stock_changes, op_id=None):
+    """$inc requests taking checkout lines out of stock.
+
+    Like the old in-memory update, only numeric (or missing) stock fields are
+    decremented. With op_id each product is tagged, so a repeat is a no-op.
+    """
+    requests = []
+    for change in stock_changes:
+        field = change['field']
+        query = {'id': change['id'], '$or': [{field: {'$type': 'number'}}, {field: {'$exists': False}}]}
+        update = {'$inc': {field: -change['quantity']}}
+        if op_id is not None:
+            query[CHECKOUT_MARKER_FIELD] = {'$ne': op_id}
+            update['$push'] = {CHECKOUT_MARKER_FIELD: op_id}
+        requests.append(UpdateOne(query, update))
+    return requests
+
+def _rollup_update(sale, op_id=None):
+    """(filter, update) adding a sale to its sales_daily document"""
+    rollup_id, day, terminal, increments = schema.sale_rollup(sale)
+    query = {'_id': rollup_id}
+    update = {'$inc': increments, '$setOnInsert': {'date': day, 'terminal': terminal}}
+    if op_id is not None:
+        query[CHECKOUT_MARKER_FIELD] = {'$ne': op_id}
+        update['$push'] = {CHECKOUT_MARKER_FIELD: op_id}
+    return query, update
+
+def _clear_checkout_marker(collection, query, op_id):
+    """Remove op_id from the checkout tags (and the field once empty)"""
+    marker = f"${CHECKOUT_MARKER_FIELD}"
+    collection.update_many(
+        dict(query, **{CHECKOUT_MARKER_FIELD: op_id}),
+        [
+            {'$set': {CHECKOUT_MARKER_FIELD: {'$setDifference': [marker, [op_id]]}}},
+            {'$set': {CHECKOUT_MARKER_FIELD: {'$cond': [{'$eq': [{'$size': marker}, 0]}, '$$REMOVE', marker]}}},
+        ]
+    )
+
+def _transactions_unavailable(error):
+    """True if an OperationFailure means the server cannot run transactions"""
+    return error.code == 20 or 'Transaction numbers are only allowed' in str(error)
+
+def _checkout_in_transaction(sale, stock_changes):
+    sales = db[MONGODB_COLLECTIONS['sales_journal']]
+    products = db[MONGODB_COLLECTIONS['products']]
+
+    def writes(session):
+        # The sale and its stock lines commit together, so if the sale is
+        # already there (a replayed checkout) everything is
+        if sales.find_one({'_id': sale['_id']}, {'_id': 1}, session=session) is not None:
+            return
+        sales.insert_one(dict(sale), session=session)
+        requests = _stock_requests(stock_changes)
+        if requests:
+            products.bulk_write(requests, ordered=False, session=session)
+        query, update = _rollup_update(sale)
+        db[SALES_DAILY_COLLECTION].update_one(query, update, upsert=True, session=session)
+
+    with client.start_session() as session:
+        session.with_transaction(writes)
+
+def _roll_forward_checkout(entry):
+    """Finish a logged checkout from the step it reached; every step is repeatable"""
+    log = db[CHECKOUT_LOG_COLLECTION]
+    products = db[MONGODB_COLLECTIONS['products']]
+    rollups = db[SALES_DAILY_COLLECTION]
+    op_id = entry['_id']
+    if entry['state'] == 'pending':
+        fields = {k: v for k, v in entry['sale'].items() if k != '_id'}
+        db[MONGODB_COLLECTIONS['sales_journal']].update_one({'_id': op_id}, {'$setOnInsert': fields}, upsert=True)
+        requests = _stock_requests(entry['stock'], op_id)
+        if requests:
+            products.bulk_write(requests, ordered=False)
+        query, update = _rollup_update(entry['sale'], op_id)
+        try:
+            rollups.update_one(query, update, upsert=True)
+        except errors.DuplicateKeyError:
+            # The tag made the filter miss an existing document: already counted
+            pass
+        log.update_one({'_id': op_id}, {'$set': {'state': 'applied'}})
+    if entry['state'] in ('pending', 'applied'):
+        # Drop the tags only after 'applied' is recorded, so a retry can never
+        # decrement the same stock or count the same sale twice
+        _clear_checkout_marker(products, {'id': {'$in': [change['id'] for change in entry['stock']]}}, op_id)
+        _clear_checkout_marker(rollups, {'_id': schema.sale_rollup(entry['sale'])[0]}, op_id)
+        log.update_one({'_id': op_id}, {'$set': {'state': 'done', 'completed_at': datetime.now()}})
+
+def _checkout_with_log(sale, stock_changes):
+    entry = db[CHECKOUT_LOG_COLLECTION].find_one_and_update(
+        {'_id': sale['_id']},
+        {'$setOnInsert': {'sale': sale, 'stock': stock_changes, 'state': 'pending', 'created_at': datetime.now()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    _roll_forward_checkout(entry)
+
+def _apply_checkout(sale, stock_changes):
+    """Write one checkout to MongoDB; returns 'transaction' or 'log'"""
+    global _transactions_supported
+    if _transactions_supported is not False:
+        try:
+            _checkout_in_transaction(sale, stock_changes)
+            _transactions_supported = True
+            return 'transaction'
+        except errors.OperationFailure as e:
+            if not _transactions_unavailable(e):
+                raise
+            _transactions_supported = False
+            logger.info("MongoDB does not support transactions here; using the checkout log")
+    _checkout_with_log(sale, stock_changes)
+    return 'log'
+
+def recover_checkouts():
+    """Roll forward logged checkouts a crash or lost connection left unfinished"""
+    if db is None:
+        return 0
+    recovered = 0
+    try:
+        for entry in db[CHECKOUT_LOG_COLLECTION].find({'state': {'$in': ['pending', 'applied']}}):
+            _roll_forward_checkout(entry)
+            recovered += 1
+    except errors.PyMongoError as e:
+        logger.warning("Could not finish logged checkouts: %s", str(e))
+    if recovered:
+        logger.warning("Finished %s interrupted checkouts", recovered)
+    return recovered
+
+def record_sale(sale, stock_changes):
+    """Record a sale and take its items out of stock.
+
+    stock_changes is a list of {'id': product id, 'field': 'quantity' or
+    'retail_quantity', 'quantity': n}. Queued as one write while offline.
+    Returns the sale.
+    """
+    sales_name = MONGODB_COLLECTIONS['sales_journal']
+    products_name = MONGODB_COLLECTIONS['products']
+    # Assign the _id up front: it is also the checkout's idempotency key
+    sale.setdefault('_id', ObjectId())
+    sale.setdefault('terminal', TERMINAL_ID)
+    schema.coerce_document(sales_name, sale)
+    json_journal.record_insert(sales_name, sale)
+    json_journal.record_bulk(products_name, [
+        {'op': 'update', 'filter': {'id': change['id']}, 'inc': {change['field']: -change['quantity']}}
+        for change in stock_changes
+    ])
+    _cache_append(sales_name, sale)
+    _cache_decrement(products_name, stock_changes)
+    write_or_queue(sales_name, 'checkout', {'sale': sale, 'stock': stock_changes})
+    schedule_excel_export('sales_journal')
+    if stock_changes:
+        schedule_excel_export('products')
+    return sale
+
+def _local_sales_daily(query):
+    """sales_daily documents computed from the local sales journal"""
+    rollups = {}
+    for sale in json_journal.load_collection(MONGODB_COLLECTIONS['sales_journal']):
+        rollup_id, day, terminal, increments = schema.sale_rollup(sale)
+        if 'date' in query and not query['date'].get('$gte', day) <= day <= query['date'].get('$lte', day):
+            continue
+        if 'terminal' in query and terminal != query['terminal']:
+            continue
+        document = rollups.setdefault(rollup_id, dict({'date': day, 'terminal': terminal}, **dict.fromkeys(schema.SALES_ROLLUP_FIELDS, 0)))
+        for field, amount in increments.items():
+            document[field] += amount
+    return list(rollups.values())
+
+def _checkouts_queued():
+    """True while checkouts made offline have not reached MongoDB yet"""
+    return MONGODB_COLLECTIONS['sales_journal'] in sync_queue.pending_collections()
+
+def get_sales_daily(start_day=None, end_day=None, terminal=None):
+    """Sales totals per day ('YYYY-MM-DD') from the sales_daily rollup.
+
+    Returns {day: {field: total}} summed over terminals unless terminal is
+    given. Reads the local journal instead while offline or while queued
+    checkouts have not reached MongoDB yet.
+    """
+    query = {}
+    if start_day or end_day:
+        query['date'] = {}
+        if start_day:
+            query['date']['$gte'] = start_day
+        if end_day:
+            query['date']['$lte'] = end_day
+    if terminal:
+        query['terminal'] = terminal
+    documents = None
+    if ensure_db() and not _checkouts_queued():
+        try:
+            documents = list(db[SALES_DAILY_COLLECTION].find(query, {CHECKOUT_MARKER_FIELD: 0}))
+        except errors.ConnectionFailure as e:
+            _go_offline(e)
+    if documents is None:
+        documents = _local_sales_daily(query)
+    days = {}
+    for document in documents:
+        totals = days.setdefault(document['date'], dict.fromkeys(schema.SALES_ROLLUP_FIELDS, 0))
+        for field in schema.SALES_ROLLUP_FIELDS:
+            totals[field] += document.get(field, 0)
+    return days
+
+def get_sales_summary(day=None, terminal=None):
+    """Sales totals for one day, or for all time when day is None"""
+    summary = dict.fromkeys(schema.SALES_ROLLUP_FIELDS, 0)
+    for totals in get_sales_daily(day, day, terminal).values():
+        for field, amount in totals.items():
+            summary[field] += amount
+    return summary
+
+def ensure_sales_daily():
+    """Build the rollup from the journal the first time it is found empty"""
+    try:
+        if db[SALES_DAILY_COLLECTION].estimated_document_count() == 0 \
+                and db[MONGODB_COLLECTIONS['sales_journal']].estimated_document_count() > 0:
+            written = rebuild_sales_daily.rebuild(db)
+            logger.info("Built %s sales_daily documents from the sales journal", written)
+    except errors.PyMongoError as e:
+        logger.warning("Could not build the sales_daily rollup: %s", str(e))
+
+def refresh_analytics():
+    """Bring the analytics store up to date with the sales journal"""
+    try:
+        days = analytics_store.refresh(db)
+        logger.debug("Analytics store refreshed (%s days recomputed)", days)
+    except errors.PyMongoError as e:
+        logger.warning("Could not refresh the analytics store: %s", str(e))
+
+def _local_analytics_days(start_day=None, end_day=None):
+    """Day totals folded from the local sales journal, oldest first"""
+    categories = analytics_store.category_map(load_data('products') or [])
+    sales = json_journal.load_collection(MONGODB_COLLECTIONS['sales_journal'])
+    return [
+        totals for day, totals in sorted(analytics_store.fold_sales(sales, categories).items())
+        if analytics_store.in_range(day, start_day, end_day)
+    ]
+
+def _analytics_report(aggregate, report, start_day=None, end_day=None, **options):
+    """aggregate(db, ...) on the refreshed analytics store, or report(days, ...)
+    over the local journal while offline or while checkouts are queued"""
+    if ensure_db() and not _checkouts_queued():
+        try:
+            analytics_store.refresh(db)
+            return aggregate(db, start_day, end_day, **options)
+        except errors.ConnectionFailure as e:
+            _go_offline(e)
+    return report(_local_analytics_days(start_day, end_day), **options)
+
+def get_analytics(start_day=None, end_day=None):
+    """Sales analytics between two 'YYYY-MM-DD' days (inclusive, open if None).
+
+    Returns analytics_store.combine() of the analytics store, refreshed first.
+    """
+    return _analytics_report(analytics_store.load_combined, analytics_store.combine, start_day, end_day)
+
+def get_sales_report(start_day=None, end_day=None):
+    """Sales totals with revenue by category and by employee (analytics_store.sales_summary)"""
+    return _analytics_report(analytics_store.aggregate_sales_summary, analytics_store.sales_summary, start_day, end_day)
+
+def get_sales_over_time(start_day=None, end_day=None):
+    """Sales per day (analytics_store.sales_over_time)"""
+    return _analytics_report(analytics_store.aggregate_sales_over_time, analytics_store.sales_over_time, start_day, end_day)
+
+def get_top_products(start_day=None, end_day=None, limit=0):
+    """Best selling products by quantity (analytics_store.top_products)"""
+    return _analytics_report(analytics_store.aggregate_top_products, analytics_store.top_products, start_day, end_day, limit=limit)
+
+def _max_numeric_id(documents):
+    """Highest numeric prefix of the 'id' field across documents"""
+    max_id = 0
+    for doc in documents:
+        item_id = doc.get('id')
+        if item_id is not None:
+            # Convert to string for regex matching
+            item_id_str = str(item_id)
+            # Extract numeric part
+            numeric_part_match = re.match(r'^\d+', item_id_str)
+            if numeric_part_match:
+                max_id = max(max_id, int(numeric_part_match.group()))
+    return max_id
+
+_seeded_counters = set()
+_offline_ids = {}
+
+def _seed_counter(collection_name):
+    """Raise the counter to the current max id once per connection.
+
+    $max keeps this safe when several terminals seed at the same time.
+    """
+    if collection_name in _seeded_counters:
+        return
+    documents = db[collection_name].find({'id': {'$exists': True}}, {'id': 1, '_id': 0})
+    db[COUNTERS_COLLECTION].update_one(
+        {'_id': collection_name},
+        {'$max': {'seq': max(_max_numeric_id(documents), _offline_ids.get(collection_name, 0))}},
+        upsert=True
+    )
+    _seeded_counters.add(collection_name)
+
+def _next_offline_id(collection_name, count=1):
+    """Best-effort id while offline: local max + 1, never repeated in this process"""
+    with _cache_lock:
+        local_max = _max_numeric_id(json_journal.load_collection(collection_name))
+        next_id = max(local_max, _offline_ids.get(collection_name, 0)) + 1
+        _offline_ids[collection_name] = next_id + count - 1
+        return next_id
+
 def get_next_id(data_type):
-    """Get the next available ID for a data type"""
+    """Get the next available ID for a data type from its atomic counter"""
+    return reserve_ids(data_type, 1)
+
+def reserve_ids(data_type, count):
+    """Reserve count consecutive IDs with one counter update; returns the first"""
     if data_type not in MONGODB_COLLECTIONS:
-        print(f"[ERROR] Unknown data type for ID generation: {data_type}")
+        logger.error("Unknown data type for ID generation: %s", data_type)
         return None
 
     try:
-        # Initialize database if not already done
-        if db is None:
-            if not initialize_db():
-                print("[ERROR] Failed to initialize database")
-                return None
+        collection_name = MONGODB_COLLECTIONS[data_type]
+        if not ensure_db():
+            return _next_offline_id(collection_name, count)
 
-        # Ensure collection exists
         if db is not None:
-            ensure_collection(MONGODB_COLLECTIONS[data_type])
-            collection = db[MONGODB_COLLECTIONS[data_type]]
-            
-            # Get all documents
-            documents = list(collection.find())
-            
-            if not documents:
-                # If no documents exist, start with ID 1
-                return 1
-            
-            # Get the highest ID
-            max_id = 0
-            for doc in documents:
-                item_id = doc.get('id')
-                if item_id is not None:
-                    # Convert to string for regex matching
-                    item_id_str = str(item_id)
-                    # Extract numeric part
-                    numeric_part_match = re.match(r'^\d+', item_id_str)
-                    if numeric_part_match:
-                        numeric_id = int(numeric_part_match.group())
-                        max_id = max(max_id, numeric_id)
-            
-            # Return next ID
-            return max_id + 1
+            _seed_counter(collection_name)
+            counter = db[COUNTERS_COLLECTION].find_one_and_update(
+                {'_id': collection_name},
+                {'$inc': {'seq': count}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return counter['seq'] - count + 1
             
+    except errors.ConnectionFailure as e:
+        _go_offline(e)
+        return _next_offline_id(MONGODB_COLLECTIONS[data_type], count)
     except Exception as e:
-        print(f"[ERROR] Error generating next ID: {str(e)}")
-        import traceback
-        print(f"[TRACEBACK] {traceback.format_exc()}")
+        logger.exception("Error generating next ID: %s", str(e))
         return None
 
 def format_date(date):
@@ -535,38 +1598,205 @@ def validate_data(data_type, data):
     
     return True
 
-def search_data(data_type, query):
+def _get_field(document, path):
+    """Read a possibly dotted field path, returning (found, value)"""
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+def _compare(value, operator, operand):
+    try:
+        if operator == '$gt':
+            return value > operand
+        if operator == '$gte':
+            return value >= operand
+        if operator == '$lt':
+            return value < operand
+        if operator == '$lte':
+            return value <= operand
+    except TypeError:
+        # MongoDB only compares values of the same type bracket
+        return False
+    return False
+
+def _match_field(found, value, condition):
+    if not (isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition)):
+        if isinstance(value, list) and not isinstance(condition, list):
+            return condition in value
+        return found and value == condition
+    for operator, operand in condition.items():
+        if operator == '$eq':
+            ok = found and value == operand
+        elif operator == '$ne':
+            ok = not found or value != operand
+        elif operator in ('$gt', '$gte', '$lt', '$lte'):
+            ok = found and value is not None and _compare(value, operator, operand)
+        elif operator == '$in':
+            ok = found and value in operand
+        elif operator == '$nin':
+            ok = not found or value not in operand
+        elif operator == '$exists':
+            ok = found == bool(operand)
+        elif operator == '$regex':
+            flags = re.IGNORECASE if 'i' in condition.get('$options', '') else 0
+            ok = found and isinstance(value, str) and re.search(operand, value, flags) is not None
+        elif operator == '$options':
+            ok = True
+        else:
+            raise ValueError(f"Unsupported query operator in JSON fallback: {operator}")
+        if not ok:
+            return False
+    return True
+
+def match_document(document, mongo_filter):
+    """Evaluate the subset of the MongoDB filter language used by query()"""
+    for key, condition in mongo_filter.items():
+        if key == '$and':
+            if not all(match_document(document, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(match_document(document, part) for part in condition):
+                return False
+        else:
+            found, value = _get_field(document, key)
+            if not _match_field(found, value, condition):
+                return False
+    return True
+
+def _sort_key(value):
+    # MongoDB order: missing/null, numbers, strings, everything else
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (3, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, str(value))
+
+def _project(document, projection):
+    include = {field for field, flag in projection.items() if flag and field != '_id'}
+    if include:
+        projected = {field: document[field] for field in include if field in document}
+        if projection.get('_id') and '_id' in document:
+            projected['_id'] = document['_id']
+        return projected
+    return {k: v for k, v in document.items() if projection.get(k, 1)}
+
+def _normalize_projection(projection):
+    """Accept a list of fields or a dict; hide _id unless asked for"""
+    if projection is None:
+        return {'_id': 0}
+    if not isinstance(projection, dict):
+        projection = {field: 1 for field in projection}
+    projection = dict(projection)
+    projection.setdefault('_id', 0)
+    return projection
+
+def _build_filter(data_type, filter, text, text_fields):
+    mongo_filter = dict(filter or {})
+    if text:
+        fields = text_fields or SEARCH_FIELDS.get(data_type, ['name'])
+        pattern = re.escape(text.strip())
+        text_filter = {'$or': [{field: {'$regex': pattern, '$options': 'i'}} for field in fields]}
+        mongo_filter = {'$and': [mongo_filter, text_filter]} if mongo_filter else text_filter
+    return mongo_filter
+
+def _query_documents(documents, mongo_filter, projection, sort, skip, limit):
+    """Apply filter/sort/skip/limit/projection in Python, mimicking MongoDB"""
+    results = [doc for doc in documents if match_document(doc, mongo_filter)] if mongo_filter else list(documents)
+    for field, direction in reversed(sort or []):
+        results.sort(key=lambda doc: _sort_key(_get_field(doc, field)[1]), reverse=direction < 0)
+    if skip:
+        results = results[skip:]
+    if limit:
+        results = results[:limit]
+    return [_project(doc, projection) for doc in results]
+
+def _fallback_documents(collection_name):
+    """Documents for Python-side queries: the cache, else the JSON journal
+    while offline or with local writes not replayed yet (like load_data).
+    Cached rows are not copied: _query_documents() returns new dicts."""
+    cached = _cache_peek(collection_name)
+    if cached is not None:
+        return cached
+    if not ensure_db() or collection_name in sync_queue.pending_collections():
+        return json_journal.load_collection(collection_name)
+    return None
+
+def query(data_type, filter=None, projection=None, sort=None, skip=0, limit=0, text=None, text_fields=None):
+    """Filtered, sorted and paginated read pushed down to MongoDB.
+
+    filter is a MongoDB filter document, projection a list of fields or a
+    projection dict, sort a list of (field, direction) pairs. text does a
+    case-insensitive substring search over text_fields (SEARCH_FIELDS by
+    default). Collections already in the cache, or the JSON files when
+    MongoDB is unavailable, are queried in Python with the same semantics.
+    """
+    collection_name = MONGODB_COLLECTIONS.get(data_type, data_type)
+    mongo_filter = _build_filter(data_type, filter, text, text_fields)
+    projection = _normalize_projection(projection)
+    try:
+        documents = _fallback_documents(collection_name)
+        if documents is not None:
+            return _query_documents(documents, mongo_filter, projection, sort, skip, limit)
+        if db is None:
+            return []
+        cursor = db[collection_name].find(mongo_filter, projection)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+    except Exception as e:
+        logger.error("Error querying %s: %s", collection_name, str(e))
+        return []
+
+def count_documents(data_type, filter=None, text=None, text_fields=None):
+    """Number of documents query() would return without skip/limit"""
+    collection_name = MONGODB_COLLECTIONS.get(data_type, data_type)
+    mongo_filter = _build_filter(data_type, filter, text, text_fields)
+    try:
+        documents = _fallback_documents(collection_name)
+        if documents is not None:
+            return sum(1 for doc in documents if match_document(doc, mongo_filter))
+        if db is None:
+            return 0
+        return db[collection_name].count_documents(mongo_filter)
+    except Exception as e:
+        logger.error("Error counting %s: %s", collection_name, str(e))
+        return 0
+
+def query_page(data_type, page, page_size, filter=None, projection=None, sort=None, text=None, text_fields=None):
+    """One page of results plus the total count, for paginated screens"""
+    items = query(
+        data_type, filter=filter, projection=projection, sort=sort,
+        skip=page * page_size, limit=page_size, text=text, text_fields=text_fields
+    )
+    return items, count_documents(data_type, filter=filter, text=text, text_fields=text_fields)
+
+def search_data(data_type, search_text):
     """Search data by query"""
-    data = load_data(data_type)
-    if not query:
-        return data
-    
-    results = []
-    query = query.lower()
-    
-    for item in data:
-        for value in item.values():
-            if isinstance(value, str) and query in value.lower():
-                results.append(item)
-                break
-    
-    return results
+    if not search_text:
+        return load_data(data_type)
+    return query(data_type, text=search_text)
 
 def filter_data(data_type, filters):
     """Filter data by criteria"""
-    data = load_data(data_type)
     if not filters:
-        return data
-    
-    results = data
-    for key, value in filters.items():
-        results = [item for item in results if item.get(key) == value]
-    
-    return results
+        return load_data(data_type)
+    return query(data_type, filter=filters)
 
 def close_connection():
-    """Close the MongoDB connection"""
+    """Flush pending Excel exports and close the MongoDB connection"""
     global client
+    flush_excel_exports()
     if client is not None:
         client.close()
 
@@ -585,12 +1815,12 @@ def import_excel_to_db(file_path, collection_name):
             collection.insert_many(data)
             return True
     except Exception as e:
-        print(f"Error importing data: {str(e)}")
+        logger.error("Error importing data: %s", str(e))
         return False
 
 def get_collection(collection_name):
     """Get a MongoDB collection"""
-    if db is None:
+    if not ensure_db():
         show_error("Database connection not available")
         return None
     try:
@@ -600,37 +1830,73 @@ def get_collection(collection_name):
         return None
 
 def load_data(collection_name):
-    """Load data from MongoDB collection"""
+    """Load data from MongoDB collection, served from the in-process cache when possible"""
+    cached = _cache_get(collection_name)
+    if cached is not None:
+        return cached
     try:
+        if not ensure_db() or collection_name in sync_queue.pending_collections():
+            # Offline, or local writes not replayed yet: serve the local JSON copy
+            return schema.coerce_documents(collection_name, json_journal.load_collection(collection_name))
         collection = get_collection(collection_name)
         if collection is not None:
+            version = get_collection_version(collection_name)
             # Get all documents and remove _id field
-            documents = list(collection.find({}, {'_id': 0}))
+            documents = schema.coerce_documents(collection_name, list(collection.find({}, {'_id': 0})))
+            _cache_fill(collection_name, documents, version)
+            # Keep the JSON backup current so offline reads see MongoDB's data
+            changes = json_journal.record_save(collection_name, documents)
+            logger.debug("Journaled %s changes to the %s JSON backup", changes, collection_name)
             return documents
     except Exception as e:
-        print(f"Error loading data: {str(e)}")
+        logger.error("Error loading data: %s", str(e))
     return []
 
+# Barcode index
+# barcode -> product, rebuilt only when the collection version changes, so a
+# scanner lookup is one normalization and one dict access.
+_barcode_indexes = {}
+
+def barcode_index(collection_name='products'):
+    """Return the {normalized barcode: document} map of a collection"""
+    version = get_collection_version(collection_name)
+    with _cache_lock:
+        cached = _barcode_indexes.get(collection_name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    index = {}
+    for document in load_data(collection_name) or []:
+        key = schema.normalize_barcode(document.get('barcode'))
+        if key is not None:
+            # First match wins, like the scans this replaces
+            index.setdefault(key, document)
+    with _cache_lock:
+        _barcode_indexes[collection_name] = (version, index)
+    return index
+
+def find_by_barcode(barcode, collection_name='products'):
+    """Look up a document by barcode; returns a copy, or None"""
+    key = schema.normalize_barcode(barcode)
+    if key is None:
+        return None
+    document = barcode_index(collection_name).get(key)
+    return dict(document) if document is not None else None
+
 def delete_document(collection_name, document_id):
-    """Delete a document from MongoDB collection"""
+    """Delete a document by its application 'id' (queued while offline)"""
     try:
-        collection = get_collection(collection_name)
-        if collection is not None:
-            result = collection.delete_one({'_id': document_id})
-            return result.deleted_count > 0
+        # load_data() strips _id, so 'id' is what callers have and what the journal keeps
+        json_journal.record_delete_where(collection_name, 'id', document_id)
+        queued, result = write_or_queue(collection_name, 'delete', {'filter': {'id': document_id}})
+        if queued or result.deleted_count > 0:
+            invalidate_cache(collection_name)
+            schedule_excel_export(collection_name)
+            return True
+        return False
     except Exception as e:
-        print(f"Error deleting document: {str(e)}")
+        logger.error("Error deleting document: %s", str(e))
     return False
 
-# Initialize database connection when module loads
-if initialize_db():
-    # Initialize collections
-    collections = ['products', 'suppliers', 'employees', 'sales', 'hookah_types', 'hookah_flavors']
-    for collection in collections:
-        ensure_collection(collection)
-else:
-    show_error("Failed to initialize database connection")
-
 # Close the connection when the program exits
 atexit.register(close_connection)
 
@@ -639,44 +1905,40 @@ def load_hookah_types():
     """Load hookah types from database or return default empty list"""
     try:
         # Try to load from database first
-        if db is not None:
+        if ensure_db():
             collection = db['hookah_types']
             types = list(collection.find({}, {'_id': 0}))
             return [item.get('name', '') for item in types if item.get('name')]
         
         # If not in database, try to load from JSON
-        filename = os.path.join(MONGODB_DATA_PATH, "hookah_types.json")
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [item.get('name', '') for item in data if item.get('name')]
+        if json_journal.exists("hookah_types"):
+            data = json_journal.load_collection("hookah_types")
+            return [item.get('name', '') for item in data if item.get('name')]
         
         # Return empty list if no data found
         return []
     except Exception as e:
-        print(f"[ERROR] Error loading hookah types: {str(e)}")
+        logger.error("Error loading hookah types: %s", str(e))
         return []
 
 def load_hookah_flavors():
     """Load hookah flavors from database or return default empty list"""
     try:
         # Try to load from database first
-        if db is not None:
+        if ensure_db():
             collection = db['hookah_flavors']
             flavors = list(collection.find({}, {'_id': 0}))
             return [item.get('name', '') for item in flavors if item.get('name')]
         
         # If not in database, try to load from JSON
-        filename = os.path.join(MONGODB_DATA_PATH, "hookah_flavors.json")
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [item.get('name', '') for item in data if item.get('name')]
+        if json_journal.exists("hookah_flavors"):
+            data = json_journal.load_collection("hookah_flavors")
+            return [item.get('name', '') for item in data if item.get('name')]
         
         # Return empty list if no data found
         return []
     except Exception as e:
-        print(f"[ERROR] Error loading hookah flavors: {str(e)}")
+        logger.error("Error loading hookah flavors: %s", str(e))
         return []
 
 def save_hookah_types(types_list):
@@ -693,13 +1955,11 @@ def save_hookah_types(types_list):
                 collection.insert_many(types_data)
         
         # Save to JSON
-        filename = os.path.join(MONGODB_DATA_PATH, "hookah_types.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(types_data, f, indent=4, ensure_ascii=False)
+        json_journal.record_save("hookah_types", types_data)
         
         return True
     except Exception as e:
-        print(f"[ERROR] Error saving hookah types: {str(e)}")
+        logger.error("Error saving hookah types: %s", str(e))
         return False
 
 def save_hookah_flavors(flavors_list):
@@ -716,13 +1976,11 @@ def save_hookah_flavors(flavors_list):
                 collection.insert_many(flavors_data)
         
         # Save to JSON
-        filename = os.path.join(MONGODB_DATA_PATH, "hookah_flavors.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(flavors_data, f, indent=4, ensure_ascii=False)
+        json_journal.record_save("hookah_flavors", flavors_data)
         
         return True
     except Exception as e:
-        print(f"[ERROR] Error saving hookah flavors: {str(e)}")
+        logger.error("Error saving hookah flavors: %s", str(e))
         return False
 
 def add_hookah_type(type_name):
@@ -734,7 +1992,7 @@ def add_hookah_type(type_name):
             return save_hookah_types(types_list)
         return True
     except Exception as e:
-        print(f"[ERROR] Error adding hookah type: {str(e)}")
+        logger.error("Error adding hookah type: %s", str(e))
         return False
 
 def add_hookah_flavor(flavor_name):
@@ -746,7 +2004,7 @@ def add_hookah_flavor(flavor_name):
             return save_hookah_flavors(flavors_list)
         return True
     except Exception as e:
-        print(f"[ERROR] Error adding hookah flavor: {str(e)}")
+        logger.error("Error adding hookah flavor: %s", str(e))
         return False
 
 def remove_hookah_type(type_name):
@@ -758,7 +2016,7 @@ def remove_hookah_type(type_name):
             return save_hookah_types(types_list)
         return True
     except Exception as e:
-        print(f"[ERROR] Error removing hookah type: {str(e)}")
+        logger.error("Error removing hookah type: %s", str(e))
         return False
 
 def remove_hookah_flavor(flavor_name):
@@ -770,5 +2028,5 @@ def remove_hookah_flavor(flavor_name):
             return save_hookah_flavors(flavors_list)
         return True
     except Exception as e:
-        print(f"[ERROR] Error removing hookah flavor: {str(e)}")
+        logger.error("Error removing hookah flavor: %s", str(e))
         return False
@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from constants import DATA_WORKER_THREADS, DATA_WORKER_POLL_MS
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Background data calls
+# load_data/save_data/export calls submitted here run off the Tk thread;
+# run_in_background() hands the result back to the Tk thread by polling the
+# future with root.after, since Tk widgets must only be touched from there.
+
+
+class DataWorker:
+    """Thread pool for data calls that returns futures.
+
+    Reads run on a small pool. Writes run one at a time on their own thread
+    so saves land in the order they were made, and a read waits for every
+    write submitted before it (a screen reloading after a save sees it).
+    """
+
+    def __init__(self, max_workers=DATA_WORKER_THREADS):
+        self._readers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="data-reader")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-writer")
+        self._lock = threading.Lock()
+        self._last_write = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a read in the background; returns a Future"""
+        with self._lock:
+            last_write = self._last_write
+
+        def run():
+            if last_write is not None:
+                wait([last_write])
+            return fn(*args, **kwargs)
+
+        return self._readers.submit(run)
+
+    def submit_write(self, fn, *args, **kwargs):
+        """Queue a write behind earlier writes; returns a Future"""
+        with self._lock:
+            future = self._writer.submit(fn, *args, **kwargs)
+            self._last_write = future
+        future.add_done_callback(_log_failure)
+        return future
+
+    def shutdown(self, wait_for_writes=True):
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown(wait=wait_for_writes)
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Background write failed: %s", future.exception())
+
+
+def when_done(root, future, on_done=None, on_error=None, poll_ms=DATA_WORKER_POLL_MS):
+    """Call on_done(result) or on_error(exception) on the Tk thread once future finishes"""
+    def check():
+        if not future.done():
+            root.after(poll_ms, check)
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                logger.error("Background task failed: %s", error)
+        elif on_done:
+            on_done(future.result())
+    root.after(0, check)
+
+
+def run_in_background(root, fn, *args, on_done=None, on_error=None, loading_message=None, write=False, **kwargs):
+    """Run fn on the data worker, optionally behind a loading overlay.
+
+    on_done/on_error are called on the Tk thread. Returns the Future.
+    """
+    future = (data_worker.submit_write if write else data_worker.submit)(fn, *args, **kwargs)
+    loading = None
+    if loading_message:
+        from ui_elements import create_loading_screen
+        loading = create_loading_screen(root, loading_message)
+
+    def close_loading():
+        if loading is not None and loading.winfo_exists():
+            loading.destroy()
+
+    def done(result):
+        close_loading()
+        if on_done:
+            on_done(result)
+
+    def failed(error):
+        close_loading()
+        if on_error:
+            on_error(error)
+        else:
+            logger.error("Background task failed: %s", error)
+
+    when_done(root, future, done, failed)
+    return future
+
+
+data_worker = DataWorker()
@@ -2,12 +2,16 @@ import customtkinter as ctk
 from tkinter import ttk, messagebox
 from ui_elements import show_error, show_success
 from data_handler import load_data, save_data, get_next_id, import_from_excel
+from data_worker import run_in_background
 from theme import (
     COLORS, FONTS, create_styled_button,
     create_styled_entry, create_styled_frame,
     create_styled_label, create_styled_option_menu
 )
 import tkinter as tk
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class InventoryManager:
     def __init__(self, root, current_language, languages, back_callback, store_manager_instance=None):
@@ -25,26 +29,47 @@ class InventoryManager:
         self.store_manager_instance = store_manager_instance
 
     def refresh_inventory(self):
-        """Refresh the inventory list from database and update display"""
-        try:
-            # Load inventory from database first
-            self.inventory = load_data("inventory") or []
-            print(f"[DEBUG] Loaded inventory count: {len(self.inventory)}")
-            print(f"[DEBUG] Loaded inventory: {self.inventory}")
-            
-            # تحديث القائمة المنسدلة فقط إذا كانت نافذة الإضافة مفتوحة
-            if self.add_item_dialog and self.product_menu:
-                inventory_names = [item['name'] for item in self.inventory]
-                self.product_menu.configure(values=inventory_names)
-            
-            # Refresh the display
-            self.manage_inventory()
-            
-        except Exception as e:
-            import traceback
-            traceback_str = traceback.format_exc()
-            print(f"[TRACEBACK] {traceback_str}")
-            show_error(f"Error refreshing inventory: {str(e)}", self.current_language)
+        """Reload the inventory in the background, then update the display"""
+        run_in_background(
+            self.root, load_data, "inventory",
+            on_done=self._on_inventory_loaded,
+            on_error=self._on_inventory_load_failed,
+            loading_message=self.get_bilingual("loading", "Loading...", "جاري التحميل...")
+        )
+
+    def _on_inventory_loaded(self, inventory):
+        self.inventory = inventory or []
+        logger.debug("Loaded inventory count: %s", len(self.inventory))
+
+        # تحديث القائمة المنسدلة فقط إذا كانت نافذة الإضافة مفتوحة
+        if self.add_item_dialog and self.product_menu:
+            inventory_names = [item['name'] for item in self.inventory]
+            self.product_menu.configure(values=inventory_names)
+
+        # Refresh the display
+        self.manage_inventory()
+
+    def _on_inventory_load_failed(self, error):
+        logger.error("Error refreshing inventory: %s", error)
+        show_error(f"Error refreshing inventory: {str(error)}", self.current_language)
+
+    def save_inventory(self):
+        """Save the inventory on the data worker so the UI does not wait for it"""
+        run_in_background(
+            self.root, save_data, "inventory", [dict(item) for item in self.inventory],
+            on_done=self._on_inventory_saved,
+            on_error=self._on_inventory_save_failed,
+            write=True
+        )
+
+    def _on_inventory_saved(self, saved):
+        # save_data reports failures by returning False
+        if not saved:
+            self._on_inventory_save_failed(self.get_bilingual("save_failed", "The inventory could not be saved", "تعذر حفظ المخزون"))
+
+    def _on_inventory_save_failed(self, error):
+        logger.error("Error saving inventory: %s", error)
+        show_error(f"Error saving inventory: {str(error)}", self.current_language)
 
     def manage_inventory(self):
         """Create a modern inventory management interface"""
@@ -896,7 +921,7 @@ class InventoryManager:
                     existing_item['retail_sale_price'] = retail_sale_price
                     existing_item['extra_retail_quantity'] = extra_retail_quantity
                     existing_item['retail_quantity'] = retail_quantity
-                    save_data("inventory", self.inventory)
+                    self.save_inventory()
                     choice_dialog.destroy()
                     dialog.destroy()
                     self.manage_inventory()
@@ -927,7 +952,7 @@ class InventoryManager:
                         'retail_quantity': retail_quantity
                     }
                     self.inventory.append(new_item)
-                    save_data("inventory", self.inventory)
+                    self.save_inventory()
                     choice_dialog.destroy()
                     dialog.destroy()
                     self.manage_inventory()
@@ -985,7 +1010,7 @@ class InventoryManager:
             'retail_quantity': retail_quantity
         }
         self.inventory.append(new_item)
-        save_data("inventory", self.inventory)
+        self.save_inventory()
         dialog.destroy()
         self.manage_inventory()
         show_success(self.get_bilingual("item_added", "Item added successfully", "تمت إضافة العنصر بنجاح"), self.current_language)
@@ -1017,7 +1042,7 @@ class InventoryManager:
             'extra_retail_quantity': extra_retail_quantity,
             'retail_quantity': retail_quantity
         })
-        save_data("inventory", self.inventory)
+        self.save_inventory()
         dialog.destroy()
         self.manage_inventory()
         show_success(self.get_bilingual("item_updated", "Item updated successfully", "تم تحديث العنصر بنجاح"), self.current_language)
@@ -1027,7 +1052,7 @@ class InventoryManager:
     def delete_item(self, item):
         """Delete an inventory item"""
         self.inventory.remove(item)
-        save_data("inventory", self.inventory)
+        self.save_inventory()
         self.manage_inventory()
         show_success(self.get_bilingual("item_deleted", "Item deleted successfully", "تم حذف العنصر بنجاح"), self.current_language)
 
@@ -1063,7 +1088,7 @@ class InventoryManager:
         if not confirm:
             return
         self.inventory = [item for item in self.inventory if item.get('id') not in self.selected_items]
-        save_data("inventory", self.inventory)
+        self.save_inventory()
         self.selected_items.clear()
         show_success(self.get_bilingual("items_deleted", "Selected items deleted successfully", "تم حذف العناصر المحددة بنجاح"), self.current_language)
         self.manage_inventory()
@@ -1078,15 +1103,46 @@ class InventoryManager:
         self.manage_inventory()
 
     def import_from_excel(self):
-        from data_handler import import_from_excel
-        if import_from_excel("inventory"):
+        """Import the inventory workbook on the data worker, showing its progress"""
+        from ui_elements import create_loading_screen, set_loading_progress
+        loading = create_loading_screen(self.root, self.get_bilingual("importing", "Importing...", "جاري الاستيراد..."))
+        progress = {}
+
+        def record_progress(done, total):
+            # Called on the data worker; show_progress draws it on the Tk thread
+            progress['latest'] = (done, total)
+
+        def show_progress():
+            if not loading.winfo_exists():
+                return
+            if 'latest' in progress:
+                done, total = progress['latest']
+                set_loading_progress(loading, done, total, f"{done} / {total}")
+            self.root.after(100, show_progress)
+
+        def import_and_reload():
+            if not import_from_excel("inventory", progress_callback=record_progress):
+                return None
             # Reload inventory data after import
-            self.inventory = load_data("inventory") or []
+            return load_data("inventory") or []
+
+        def imported(inventory):
+            loading.destroy()
+            if inventory is None:
+                show_error(self.get_bilingual("import_failed", "Failed to import data", "فشل في استيراد البيانات"), self.current_language)
+                return
+            self.inventory = inventory
             self.manage_inventory()
             show_success(self.get_bilingual("import_success", "Data imported successfully", "تم استيراد البيانات بنجاح"), self.current_language)
-        else:
+
+        def failed(error):
+            loading.destroy()
+            logger.error("Error importing inventory: %s", error)
             show_error(self.get_bilingual("import_failed", "Failed to import data", "فشل في استيراد البيانات"), self.current_language)
 
+        run_in_background(self.root, import_and_reload, on_done=imported, on_error=failed, write=True)
+        show_progress()
+
     def refresh_from_products(self):
         products = load_data("products") or []
         updated = False
@@ -1104,7 +1160,7 @@ class InventoryManager:
                     item['category'] = item['type']
                     updated = True
         if updated:
-            save_data("inventory", self.inventory)
+            self.save_inventory()
         self.manage_inventory()
 
     def goto_previous_page(self):
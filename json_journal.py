@@ -0,0 +1,279 @@
+import os
+import json
+import copy
+import threading
+from constants import MONGODB_DATA_PATH, JOURNAL_COMPACT_EVERY
+from app_logging import get_logger
+
+# Append-only JSON storage for mongodb_data/
+# Every collection is a snapshot (<collection>.json, a plain JSON list) plus a
+# journal (<collection>.journal.jsonl) of insert/update/delete records written
+# since the snapshot. Saves append only the changed documents; the journal is
+# folded into a new snapshot every JOURNAL_COMPACT_EVERY records.
+
+logger = get_logger(__name__)
+_lock = threading.RLock()
+_states = {}          # collection name -> {key: (document, serialized)}
+_journal_sizes = {}   # collection name -> records in the journal file
+
+
+def snapshot_path(collection_name):
+    return os.path.join(MONGODB_DATA_PATH, f"{collection_name}.json")
+
+
+def journal_path(collection_name):
+    return os.path.join(MONGODB_DATA_PATH, f"{collection_name}.journal.jsonl")
+
+
+def _serialize(document):
+    return json.dumps(document, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def _plain(document):
+    """JSON round-trip a document, keeping its field order"""
+    return json.loads(json.dumps(document, default=str, ensure_ascii=False))
+
+
+def _document_keys(data):
+    """Key documents by id, then _id, then content; repeats get a #n suffix"""
+    seen = {}
+    keys = []
+    for document in data:
+        if document.get('id') is not None:
+            base = f"id:{document['id']}"
+        elif document.get('_id') is not None:
+            base = f"_id:{document['_id']}"
+        else:
+            base = f"content:{_serialize(document)}"
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        keys.append(base if count == 0 else f"{base}#{count}")
+    return keys
+
+
+def _fsync_write(path, text, mode):
+    with open(path, mode, encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _apply(state, record):
+    op = record.get('op')
+    if op in ('insert', 'update'):
+        document = record['doc']
+        state[record['key']] = (document, _serialize(document))
+    elif op == 'delete':
+        state.pop(record['key'], None)
+
+
+def _load_state(collection_name):
+    """Replay snapshot + journal into an ordered key -> document map"""
+    state = {}
+    path = snapshot_path(collection_name)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for key, document in zip(_document_keys(data), data):
+            state[key] = (document, _serialize(document))
+    records = 0
+    path = journal_path(collection_name)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-append
+                    logger.warning("Skipping unreadable journal record in %s", path)
+                    continue
+                _apply(state, record)
+                records += 1
+    _journal_sizes[collection_name] = records
+    return state
+
+
+def _get_state(collection_name):
+    if collection_name not in _states:
+        _states[collection_name] = _load_state(collection_name)
+    return _states[collection_name]
+
+
+def exists(collection_name):
+    """True if there is any stored data for the collection"""
+    return os.path.exists(snapshot_path(collection_name)) or os.path.exists(journal_path(collection_name))
+
+
+def load_collection(collection_name):
+    """Return the current documents of a collection (snapshot + journal)"""
+    with _lock:
+        return [copy.deepcopy(document) for document, _ in _get_state(collection_name).values()]
+
+
+def _append(collection_name, records):
+    if not records:
+        return
+    os.makedirs(MONGODB_DATA_PATH, exist_ok=True)
+    lines = ''.join(json.dumps(record, default=str, ensure_ascii=False) + '\n' for record in records)
+    _fsync_write(journal_path(collection_name), lines, 'a')
+    _journal_sizes[collection_name] = _journal_sizes.get(collection_name, 0) + len(records)
+    if _journal_sizes[collection_name] >= JOURNAL_COMPACT_EVERY:
+        compact(collection_name)
+
+
+def record_save(collection_name, data):
+    """Journal the difference between the stored collection and data.
+
+    Returns the number of change records written.
+    """
+    with _lock:
+        state = _get_state(collection_name)
+        new_state = {}
+        records = []
+        for key, document in zip(_document_keys(data), data):
+            document = _plain(document)
+            serialized = _serialize(document)
+            new_state[key] = (document, serialized)
+            if key not in state:
+                records.append({'op': 'insert', 'key': key, 'doc': document})
+            elif state[key][1] != serialized:
+                records.append({'op': 'update', 'key': key, 'doc': document})
+        for key in state:
+            if key not in new_state:
+                records.append({'op': 'delete', 'key': key})
+        _states[collection_name] = new_state
+        _append(collection_name, records)
+        return len(records)
+
+
+def record_insert(collection_name, document):
+    """Journal a single inserted document"""
+    with _lock:
+        state = _get_state(collection_name)
+        key = _document_keys([document])[0]
+        base, suffix = key, 0
+        while key in state:
+            suffix += 1
+            key = f"{base}#{suffix}"
+        record = {'op': 'insert', 'key': key, 'doc': _plain(document)}
+        _apply(state, record)
+        _append(collection_name, [record])
+
+
+def record_delete_where(collection_name, field, value):
+    """Journal the deletion of every document whose field equals value"""
+    with _lock:
+        state = _get_state(collection_name)
+        records = [
+            {'op': 'delete', 'key': key}
+            for key, (document, _) in state.items()
+            if str(document.get(field)) == str(value)
+        ]
+        for record in records:
+            _apply(state, record)
+        _append(collection_name, records)
+        return len(records)
+
+
+def record_update_where(collection_name, field, value, changes):
+    """Journal setting changes on every document whose field equals value"""
+    with _lock:
+        state = _get_state(collection_name)
+        records = [
+            {'op': 'update', 'key': key, 'doc': _plain(dict(document, **changes))}
+            for key, (document, _) in state.items()
+            if str(document.get(field)) == str(value)
+        ]
+        for record in records:
+            _apply(state, record)
+        _append(collection_name, records)
+        return len(records)
+
+
+def record_bulk(collection_name, operations):
+    """Journal a batch of inserts and field-matched updates in one append.
+
+    operations use the same shape as the 'bulk' MongoDB write:
+    {'op': 'insert', 'document': doc} or
+    {'op': 'update', 'filter': {field: value}, 'set': changes}.
+    An update may also carry 'inc': {field: amount}, applied like MongoDB's
+    $inc to numeric (or missing) fields.
+    """
+    with _lock:
+        state = _get_state(collection_name)
+        indexes = {}  # field -> str(value) -> [keys], built once per batch
+        records = []
+
+        def keys_where(field, value):
+            if field not in indexes:
+                index = {}
+                for key, (document, _) in state.items():
+                    index.setdefault(str(document.get(field)), []).append(key)
+                indexes[field] = index
+            return indexes[field].get(str(value), [])
+
+        for operation in operations:
+            if operation['op'] == 'insert':
+                document = _plain(operation['document'])
+                key = _document_keys([document])[0]
+                base, suffix = key, 0
+                while key in state:
+                    suffix += 1
+                    key = f"{base}#{suffix}"
+                record = {'op': 'insert', 'key': key, 'doc': document}
+                for field, index in indexes.items():
+                    index.setdefault(str(document.get(field)), []).append(key)
+                _apply(state, record)
+                records.append(record)
+            elif operation['op'] == 'update':
+                (field, value), = operation['filter'].items()
+                for key in list(keys_where(field, value)):
+                    old_document = state[key][0]
+                    changes = dict(operation.get('set', {}))
+                    for inc_field, amount in operation.get('inc', {}).items():
+                        current = old_document.get(inc_field, 0)
+                        if isinstance(current, (int, float)) and not isinstance(current, bool):
+                            changes[inc_field] = current + amount
+                    record = {'op': 'update', 'key': key, 'doc': _plain(dict(old_document, **changes))}
+                    # Keep the batch indexes right if a matched field changes
+                    for indexed_field, index in indexes.items():
+                        old_value = str(old_document.get(indexed_field))
+                        new_value = str(record['doc'].get(indexed_field))
+                        if old_value != new_value:
+                            index[old_value].remove(key)
+                            index.setdefault(new_value, []).append(key)
+                    _apply(state, record)
+                    records.append(record)
+        _append(collection_name, records)
+        return len(records)
+
+
+def write_snapshot(collection_name, data):
+    """Atomically replace the snapshot with data and start an empty journal"""
+    with _lock:
+        os.makedirs(MONGODB_DATA_PATH, exist_ok=True)
+        path = snapshot_path(collection_name)
+        tmp_path = f"{path}.tmp"
+        _fsync_write(tmp_path, json.dumps(data, indent=4, default=str, ensure_ascii=False), 'w')
+        os.replace(tmp_path, path)
+        # Replaying the old journal over the new snapshot is harmless (records
+        # are idempotent), so a crash before this point loses nothing
+        if os.path.exists(journal_path(collection_name)):
+            os.remove(journal_path(collection_name))
+        state = {}
+        for key, document in zip(_document_keys(data), data):
+            document = _plain(document)
+            state[key] = (document, _serialize(document))
+        _states[collection_name] = state
+        _journal_sizes[collection_name] = 0
+
+
+def compact(collection_name):
+    """Fold the journal into a fresh snapshot"""
+    with _lock:
+        data = load_collection(collection_name)
+        write_snapshot(collection_name, data)
+        logger.debug("Compacted %s journal into snapshot (%s items)", collection_name, len(data))
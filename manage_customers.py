@@ -4,6 +4,9 @@ from theme import create_styled_frame, create_styled_label, create_styled_button
 # Import data handling functions
 from data_handler import load_data, save_data, get_next_id, import_from_excel
 from ui_elements import show_error, show_success
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class CustomerManager:
     def __init__(self, root, current_language, languages, back_callback):
@@ -134,16 +137,16 @@ class CustomerManager:
 
     def load_customers(self):
         """Load customer data from the database"""
-        print("[DEBUG] Loading customer data...")
+        logger.debug("Loading customer data...")
         self.customers = load_data('customers') or []
-        print(f"[DEBUG] Loaded {len(self.customers)} customers")
+        logger.debug("Loaded %s customers", len(self.customers))
 
 
     def save_customers(self):
         """Save customer data to the database"""
-        print("[DEBUG] Saving customer data...")
+        logger.debug("Saving customer data...")
         save_data('customers', self.customers)
-        print("[DEBUG] Customer data saved")
+        logger.debug("Customer data saved")
 
     def display_customers(self, customers_to_display=None):
         """Display the list of customers in the scrollable frame"""
@@ -577,18 +580,18 @@ class CustomerManager:
         try:
             # Import data from Excel before loading from DB
             if import_from_excel('customers'):
-                print("[DEBUG] Successfully imported customers from Excel")
+                logger.debug("Successfully imported customers from Excel")
             else:
-                print("[DEBUG] No Excel data to import or import failed")
+                logger.debug("No Excel data to import or import failed")
             # Load customers from database
             self.customers = load_data("customers") or []
-            print(f"[DEBUG] Loaded customers count: {len(self.customers)}")
+            logger.debug("Loaded customers count: %s", len(self.customers))
             # Refresh the display
             self.display_customers()
         except Exception as e:
             import traceback
             traceback_str = traceback.format_exc()
-            print(f"[TRACEBACK] {traceback_str}")
+            logger.error("%s", traceback_str)
             from ui_elements import show_error
             show_error(f"Error refreshing customers: {str(e)}", self.current_language)
 
@@ -7,6 +7,9 @@ from theme import (
     create_styled_entry, create_styled_frame,
     create_styled_label
 )
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class ManageEmployees:
     def __init__(self, root, current_language, languages, back_callback):
@@ -21,14 +24,13 @@ class ManageEmployees:
         try:
             # Import data from Excel before loading from JSON
             if import_from_excel('employees'):
-                print("[DEBUG] Successfully imported data from Excel")
+                logger.debug("Successfully imported data from Excel")
             else:
-                print("[DEBUG] No Excel data to import or import failed")
+                logger.debug("No Excel data to import or import failed")
 
             # Load employees from database
             self.employees = load_data("employees") or []
-            print(f"[DEBUG] Loaded employees count: {len(self.employees)}")
-            print(f"[DEBUG] Loaded employees: {self.employees}")
+            logger.debug("Loaded employees count: %s", len(self.employees))
             
             # Refresh the display
             self.manage_employees()
@@ -36,7 +38,7 @@ class ManageEmployees:
         except Exception as e:
             import traceback
             traceback_str = traceback.format_exc()
-            print(f"[TRACEBACK] {traceback_str}")
+            logger.error("%s", traceback_str)
             show_error(f"Error refreshing employees: {str(e)}", self.current_language)
 
     def manage_employees(self):
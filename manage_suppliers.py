@@ -5,6 +5,7 @@ from data_handler import (
     insert_document, update_document, delete_document,
     load_data, save_data, get_next_id
 )
+from schema import as_number
 from theme import (
     COLORS, FONTS, create_styled_button,
     create_styled_entry, create_styled_frame,
@@ -561,15 +562,13 @@ class ManageSuppliers:
         for row, bill in enumerate(supplier_bills, 1):
             for col, (key, _) in enumerate(headers):
                 val = bill.get(key, '')
-                if key == 'amount' or key == 'paid_amount' or key == 'remaining':
-                    try:
-                        val = f"{float(val):.2f}"
-                    except:
-                        pass
+                # Bill amounts are floats once loaded (schema.coerce_documents)
+                if key in ('amount', 'paid_amount', 'remaining') and isinstance(val, (int, float)):
+                    val = f"{val:.2f}"
                 cell = create_styled_label(table, text=val, style='body')
                 cell.grid(row=row, column=col, padx=10, pady=5, sticky='w')
         # إجمالي المتبقي
-        total_remaining = sum(float(b.get('remaining', 0) or 0) for b in supplier_bills)
+        total_remaining = sum(as_number(b.get('remaining', 0)) for b in supplier_bills)
         total_label = create_styled_label(frame, text=f"{self.get_bilingual('total_remaining', 'Total Remaining', 'إجمالي المتبقي')}: {total_remaining:.2f}", style='heading')
         total_label.pack(pady=10)
 
@@ -1,9 +1,10 @@
 import os
-import json
 import openpyxl
+import json_journal
+import schema
 
 EXCEL_PATH = os.path.join('excel_data', 'hookah_inventory.xlsx')
-JSON_PATH = os.path.join('mongodb_data', 'inventory.json')
+COLLECTION_NAME = 'inventory'
 
 # --- Excel Migration ---
 def migrate_excel():
@@ -32,11 +33,10 @@ def migrate_excel():
 
 # --- JSON (MongoDB) Migration ---
 def migrate_json():
-    if not os.path.exists(JSON_PATH):
-        print(f"JSON file not found: {JSON_PATH}")
+    if not json_journal.exists(COLLECTION_NAME):
+        print(f"JSON file not found: {json_journal.snapshot_path(COLLECTION_NAME)}")
         return
-    with open(JSON_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = json_journal.load_collection(COLLECTION_NAME)
     changed = 0
     for item in data:
         if 'quantity' in item and ('carton_count' not in item or not item['carton_count']):
@@ -45,9 +45,8 @@ def migrate_json():
         if 'retail_quantity' in item and ('units_per_carton' not in item or not item['units_per_carton']):
             item['units_per_carton'] = item['retail_quantity']
             changed += 1
-    with open(JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"[JSON] Migrated {changed} fields in {JSON_PATH}")
+    json_journal.write_snapshot(COLLECTION_NAME, schema.coerce_documents(COLLECTION_NAME, data))
+    print(f"[JSON] Migrated {changed} fields in {json_journal.snapshot_path(COLLECTION_NAME)}")
 
 if __name__ == "__main__":
     migrate_excel()
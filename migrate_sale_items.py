@@ -0,0 +1,53 @@
+from pymongo import MongoClient, UpdateOne
+from constants import MONGODB_URI, MONGODB_DB_NAME, MONGODB_COLLECTIONS
+import json_journal
+import schema
+
+# One-time migration: rewrite sales_journal line items that embed the whole
+# product document ({'product': {...}, 'quantity', 'sale_type'}) into the
+# compact shape (product_id, name, sale_type, quantity, unit_price,
+# line_total). Safe to run again; compact items are left alone.
+
+COLLECTION = MONGODB_COLLECTIONS["sales_journal"]
+BATCH_SIZE = 500
+
+def _needs_migration(sale):
+    return any('product' in item for item in sale.get('items') or [])
+
+# --- JSON Migration ---
+def migrate_json():
+    if not json_journal.exists(COLLECTION):
+        return
+    data = json_journal.load_collection(COLLECTION)
+    changed = 0
+    for sale in data:
+        if _needs_migration(sale):
+            sale['items'] = schema.sale_items(sale)
+            changed += 1
+    if changed:
+        json_journal.write_snapshot(COLLECTION, data)
+    print(f"[JSON] Compacted items of {changed} sales in {json_journal.snapshot_path(COLLECTION)}")
+
+# --- MongoDB Migration ---
+def migrate_mongo(db):
+    collection = db[COLLECTION]
+    requests = []
+    changed = 0
+    for sale in collection.find({'items.product': {'$exists': True}}, {'items': 1}):
+        requests.append(UpdateOne({'_id': sale['_id']}, {'$set': {'items': schema.sale_items(sale)}}))
+        if len(requests) >= BATCH_SIZE:
+            changed += collection.bulk_write(requests, ordered=False).modified_count
+            requests = []
+    if requests:
+        changed += collection.bulk_write(requests, ordered=False).modified_count
+    print(f"[MongoDB] Compacted items of {changed} sales in {COLLECTION}")
+
+if __name__ == "__main__":
+    migrate_json()
+    try:
+        client = MongoClient(MONGODB_URI)
+        db = client[MONGODB_DB_NAME]
+        migrate_mongo(db)
+    except Exception as e:
+        print(f"[MongoDB] Error: {e}")
+    print("Sale item migration completed.")
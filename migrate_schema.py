@@ -0,0 +1,61 @@
+from pymongo import MongoClient, UpdateOne
+from constants import MONGODB_URI, MONGODB_DB_NAME, COLLECTION_SCHEMAS
+import json_journal
+import schema
+
+# One-time migration: coerce the typed fields of existing documents
+# (MongoDB and the mongodb_data/ JSON files) to COLLECTION_SCHEMAS.
+# Safe to run again; documents that already match are left alone.
+
+BATCH_SIZE = 500
+
+# --- JSON Migration ---
+def migrate_json(collection_name):
+    if not json_journal.exists(collection_name):
+        return
+    data = json_journal.load_collection(collection_name)
+    changed = 0
+    for item in data:
+        before = {field: item[field] for field in COLLECTION_SCHEMAS[collection_name] if field in item}
+        schema.coerce_document(collection_name, item)
+        if any(type(item[field]) is not type(value) or item[field] != value for field, value in before.items()):
+            changed += 1
+    if changed:
+        json_journal.write_snapshot(collection_name, data)
+    print(f"[JSON] Coerced {changed} documents in {json_journal.snapshot_path(collection_name)}")
+
+# --- MongoDB Migration ---
+def migrate_mongo(db, collection_name):
+    fields = COLLECTION_SCHEMAS[collection_name]
+    collection = db[collection_name]
+    projection = {field: 1 for field in fields}
+    requests = []
+    changed = 0
+    for document in collection.find({'$or': [{field: {'$exists': True}} for field in fields]}, projection):
+        updates = {}
+        for field, value in document.items():
+            if field == '_id':
+                continue
+            coerced = schema.coerce_field(collection_name, field, value)
+            if type(coerced) is not type(value) or coerced != value:
+                updates[field] = coerced
+        if updates:
+            requests.append(UpdateOne({'_id': document['_id']}, {'$set': updates}))
+        if len(requests) >= BATCH_SIZE:
+            changed += collection.bulk_write(requests, ordered=False).modified_count
+            requests = []
+    if requests:
+        changed += collection.bulk_write(requests, ordered=False).modified_count
+    print(f"[MongoDB] Coerced {changed} documents in {collection_name}")
+
+if __name__ == "__main__":
+    for name in COLLECTION_SCHEMAS:
+        migrate_json(name)
+    try:
+        client = MongoClient(MONGODB_URI)
+        db = client[MONGODB_DB_NAME]
+        for name in COLLECTION_SCHEMAS:
+            migrate_mongo(db, name)
+    except Exception as e:
+        print(f"[MongoDB] Error: {e}")
+    print("Schema migration completed.")
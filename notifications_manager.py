@@ -6,7 +6,11 @@ from theme import create_styled_frame, create_styled_label, create_styled_button
 from data_handler import load_data # Import load_data
 from ui_elements import show_success, show_error
 from datetime import datetime, timedelta # Import for date calculations
-import statistics # For dynamic low stock threshold
+from schema import sale_items, as_number
+from analytics_engine import InventoryColumns
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class NotificationsManager:
     def __init__(self, root, current_language, languages, back_callback, callbacks):
@@ -31,13 +35,9 @@ class NotificationsManager:
     def _calculate_low_stock_threshold(self):
         """Calculate a dynamic low stock threshold based on inventory median quantity"""
         self.inventory_data = load_data('inventory') or []
-        quantities = [int(item.get('quantity', 0)) for item in self.inventory_data if item.get('quantity')]
-        if quantities:
-            self.low_stock_threshold = max(1, int(statistics.median(quantities) * 0.25))
-            print(f"[DEBUG] Calculated dynamic low stock threshold: {self.low_stock_threshold}")
-        else:
-            self.low_stock_threshold = 10 # Fallback to default
-            print(f"[DEBUG] No inventory data, using default low stock threshold: {self.low_stock_threshold}")
+        # Tolerates quantities that are missing or not numbers (10 without stock data)
+        self.low_stock_threshold = InventoryColumns(self.inventory_data).low_stock_threshold()
+        logger.debug("Calculated dynamic low stock threshold: %s", self.low_stock_threshold)
 
     def check_low_stock(self):
         """Check inventory for items below the low stock threshold"""
@@ -46,8 +46,9 @@ class NotificationsManager:
 
         for item in self.inventory_data:
             try:
-                quantity = int(item.get('quantity', 0))
-                retail_quantity = int(item.get('retail_quantity', 0))
+                # Stock fields are coerced on load; as_number covers what did not parse
+                quantity = as_number(item.get('quantity', 0))
+                retail_quantity = as_number(item.get('retail_quantity', 0))
                 item_name = item.get('name', self.LANGUAGES[self.current_language].get("unnamed_item", "Unnamed Item"))
                 
                 # Check wholesale quantity
@@ -145,9 +146,8 @@ class NotificationsManager:
         # Group sales by product
         product_sales = {}
         for sale in sales_data:
-            items = sale.get('items', [])
-            for item in items:
-                product_name = item.get('product_name', 'Unknown Product')
+            for item in sale_items(sale):
+                product_name = item.get('name') or 'Unknown Product'
                 quantity = int(item.get('quantity', 0))
                 if product_name in product_sales:
                     product_sales[product_name] += quantity
@@ -221,7 +221,7 @@ class NotificationsManager:
 
     def generate_alerts(self):
         """Generate a combined list of all active alerts"""
-        print("[DEBUG] Generating alerts...")
+        logger.debug("Generating alerts...")
         low_stock = self.check_low_stock()
         upcoming_bills = self.check_upcoming_bills() # Check bills due in next 7 days
         high_sales = self.check_high_sales_products() # Check high sales products
@@ -236,7 +236,7 @@ class NotificationsManager:
             x.get('timestamp', ''), 
         ), reverse=True)
         
-        print(f"[DEBUG] Generated {len(self.active_alerts)} active alerts")
+        logger.debug("Generated %s active alerts", len(self.active_alerts))
         return self.active_alerts
 
     def create_notifications_interface(self):
@@ -379,7 +379,7 @@ class NotificationsManager:
 
     def handle_alert_click(self, alert):
         """Handle click event on an alert"""
-        print(f"[DEBUG] Alert clicked: {alert.get('type')}")
+        logger.debug("Alert clicked: %s", alert.get('type'))
         alert_type = alert.get('type', '').lower()
 
         if alert_type == 'low_stock':
@@ -387,13 +387,13 @@ class NotificationsManager:
             if 'manage_inventory' in self.callbacks:
                 self.callbacks['manage_inventory']()
             else:
-                print("[ERROR] Inventory Manager callback not available.")
+                logger.error("Inventory Manager callback not available.")
         elif alert_type == 'upcoming_bill':
             # Navigate to Expenses and Bills
             if 'expenses_bills' in self.callbacks:
                 self.callbacks['expenses_bills']()
             else:
-                print("[ERROR] Expenses and Bills callback not available.")
+                logger.error("Expenses and Bills callback not available.")
         # Add handling for other alert types here in the future 
 
     def refresh_notifications(self):
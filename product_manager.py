@@ -1,10 +1,10 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
-from ui_elements import show_error, show_success
+from ui_elements import show_error, show_success, debounce
 from data_handler import (
     insert_document, update_document, delete_document,
-    load_data, save_data, get_next_id, import_from_excel,
+    load_data, save_data, get_next_id, import_from_excel, find_by_barcode, get_collection_version,
     load_hookah_types, save_hookah_types, add_hookah_type, remove_hookah_type,
     load_hookah_flavors, save_hookah_flavors, add_hookah_flavor, remove_hookah_flavor
 )
@@ -15,8 +15,14 @@ from theme import (
 )
 import os
 from datetime import datetime
-from PIL import Image
 import json
+from constants import SEARCH_DEBOUNCE_MS
+from product_search import search_products
+from thumbnails import get_thumbnail, prefetch, LIST_SIZE, PREVIEW_SIZE
+from data_worker import when_done
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class ProductManager:
     def __init__(self, root, current_language, languages, back_callback, hookah_types=None, hookah_flavors=None, record_sale_instance=None):
@@ -27,6 +33,10 @@ class ProductManager:
         self.hookah_types = hookah_types or []
         self.hookah_flavors = hookah_flavors or []
         self.products = load_data("products") or []
+        # Search results shown instead of all products; saves always use self.products
+        self.search_query = ''
+        self.search_results = None
+        self.search_version = None  # products version the results were found in
         self.record_sale_instance = record_sale_instance
         self.current_page = 0
         self.products_per_page = 20
@@ -36,14 +46,15 @@ class ProductManager:
         try:
             # Import data from Excel before loading from JSON
             if import_from_excel('products'):
-                print("[DEBUG] Successfully imported data from Excel")
+                logger.debug("Successfully imported data from Excel")
             else:
-                print("[DEBUG] No Excel data to import or import failed")
+                logger.debug("No Excel data to import or import failed")
 
             # Load products from database
             self.products = load_data("products") or []
-            print(f"[DEBUG] Loaded products count: {len(self.products)}")
-            print(f"[DEBUG] Loaded products: {self.products}")
+            self.search_query = ''
+            self.search_results = None
+            logger.debug("Loaded products count: %s", len(self.products))
             
             # Refresh the display
             self.manage_products()
@@ -51,7 +62,7 @@ class ProductManager:
         except Exception as e:
             import traceback
             traceback_str = traceback.format_exc()
-            print(f"[TRACEBACK] {traceback_str}")
+            logger.error("%s", traceback_str)
             show_error(f"Error refreshing products: {str(e)}", self.current_language)
 
     def manage_products(self):
@@ -137,7 +148,7 @@ class ProductManager:
             textvariable=self.search_var
         )
         search_entry.pack(side='left', padx=20, pady=20, fill='x', expand=True)
-        self.search_var.trace_add('write', lambda *args: self.filter_products())
+        self.search_var.trace_add('write', debounce(search_entry, SEARCH_DEBOUNCE_MS, self.filter_products))
         
         filter_button = create_styled_button(
             search_frame,
@@ -201,7 +212,7 @@ class ProductManager:
             header.grid(row=0, column=i, padx=10, pady=10, sticky='w')
         
         # فلترة المنتجات لتشمل المتاحة والجارية
-        filtered_products = [p for p in self.products if str(p.get('status', '')).strip().lower() in ['active', 'available'] and p.get('source', 'defined') != 'inventory']
+        filtered_products = [p for p in self.displayed_products() if str(p.get('status', '')).strip().lower() in ['active', 'available'] and p.get('source', 'defined') != 'inventory']
         total_products = len(filtered_products)
         total_pages = max(1, (total_products + self.products_per_page - 1) // self.products_per_page)
         start_idx = self.current_page * self.products_per_page
@@ -210,14 +221,11 @@ class ProductManager:
         for i, product in enumerate(page_products, 1 + start_idx):
             image_path = str(product.get('image_path', '')) if product.get('image_path') is not None else ''
             if image_path and os.path.exists(image_path):
-                try:
-                    img = Image.open(image_path)
-                    img.thumbnail((50, 50))
-                    img_tk = ctk.CTkImage(light_image=img, dark_image=img, size=(50, 50))
+                img_tk = get_thumbnail(image_path, LIST_SIZE)
+                if img_tk is not None:
                     image_label = ctk.CTkLabel(scrollable_table, image=img_tk, text="")
                     image_label.image = img_tk
-                except Exception as e:
-                    print(f"[ERROR] Could not load product image {image_path}: {e}")
+                else:
                     image_label = create_styled_label(scrollable_table, text=self.LANGUAGES[self.current_language].get("error_loading_image", "Error loading image"), style='small')
             else:
                 image_label = create_styled_label(scrollable_table, text=self.LANGUAGES[self.current_language].get("no_image", "No Image"), style='small')
@@ -715,13 +723,9 @@ class ProductManager:
         self.edit_image_preview.pack(pady=(10, 10))
         # Display existing image if available
         if self.selected_image_path and os.path.exists(str(self.selected_image_path)):
-            try:
-                img = Image.open(str(self.selected_image_path))
-                img.thumbnail((100, 100)) # Resize for preview
-                img_tk = ctk.CTkImage(light_image=img, dark_image=img, size=(100, 100))
+            img_tk = get_thumbnail(str(self.selected_image_path), PREVIEW_SIZE)
+            if img_tk is not None:
                 self.edit_image_preview.configure(image=img_tk, text="")
-            except Exception as e:
-                print(f"[ERROR] Could not load image for preview: {e}")
 
         # Location (Dropdown)
         location_label = create_styled_label(
@@ -851,32 +855,35 @@ class ProductManager:
                 # Copy the file
                 import shutil
                 shutil.copy2(file_path, destination_path)
-                print(f"[DEBUG] Copied image from {file_path} to {destination_path}")
+                logger.debug("Copied image from %s to %s", file_path, destination_path)
 
                 # Store the relative path (or just the filename) in the product data
                 # Let's store the relative path from the workspace root
                 relative_path = os.path.relpath(destination_path, os.getcwd())
                 self.selected_image_path = relative_path
 
-                # Update the label and preview in the currently open dialog (add or edit)
-                try:
-                    img = Image.open(file_path)
-                    img.thumbnail((100, 100)) # Resize for preview
-                    img_tk = ctk.CTkImage(light_image=img, dark_image=img, size=(100, 100))
+                # Update the label in the currently open dialog (add or edit)
+                if hasattr(self, 'add_image_path_label') and self.add_image_path_label.winfo_exists():
+                    self.add_image_path_label.configure(text=os.path.basename(relative_path))
+                    preview = getattr(self, 'add_image_preview', None)
+                elif hasattr(self, 'edit_image_path_label') and self.edit_image_path_label.winfo_exists():
+                    self.edit_image_path_label.configure(text=os.path.basename(relative_path))
+                    preview = getattr(self, 'edit_image_preview', None)
+                else:
+                    preview = None
 
-                    if hasattr(self, 'add_image_path_label') and self.add_image_path_label.winfo_exists():
-                         self.add_image_path_label.configure(text=os.path.basename(relative_path))
-                         if hasattr(self, 'add_image_preview') and self.add_image_preview.winfo_exists():
-                             self.add_image_preview.configure(image=img_tk, text="")
+                # Scale the list and preview thumbnails off the Tk thread,
+                # then show the preview once it is ready
+                def show_preview(path):
+                    img_tk = get_thumbnail(path, PREVIEW_SIZE)
+                    if preview is not None and preview.winfo_exists() and img_tk is not None:
+                        preview.configure(image=img_tk, text="")
 
-                    elif hasattr(self, 'edit_image_path_label') and self.edit_image_path_label.winfo_exists():
-                         self.edit_image_path_label.configure(text=os.path.basename(relative_path))
-                         if hasattr(self, 'edit_image_preview') and self.edit_image_preview.winfo_exists():
-                              self.edit_image_preview.configure(image=img_tk, text="")
+                def preview_failed(error):
+                    logger.error("Could not create image preview: %s", error)
+                    show_error(f"Error creating image preview: {str(error)}", self.current_language)
 
-                except Exception as e:
-                     print(f"[ERROR] Could not create image preview: {e}")
-                     show_error(f"Error creating image preview: {str(e)}", self.current_language) # Show error to user as well
+                when_done(self.root, prefetch(relative_path), show_preview, preview_failed)
 
                 show_success(self.LANGUAGES[self.current_language].get("image_selected_success", "Image selected successfully."), self.current_language)
 
@@ -982,34 +989,39 @@ class ProductManager:
         """فلترة المنتجات حسب البحث في الاسم أو الباركود أو الطعم، وإذا كان البحث يطابق باركود منتج يظهر المنتج فقط"""
         query = getattr(self, 'search_var', None)
         if query is not None:
-            query = query.get().strip().lower()
+            query = query.get().strip()
         else:
             return
-        all_products = load_data("products") or []
-        if query:
-            # إذا كان البحث يطابق باركود منتج بالضبط
-            product_by_barcode = next((p for p in all_products if str(p.get('barcode', '')).lower() == query), None)
-            if product_by_barcode:
-                self.products = [product_by_barcode]
-            else:
-                self.products = [
-                    p for p in all_products
-                    if query in str(p.get('name', '')).lower()
-                    or query in str(p.get('barcode', '')).lower()
-                    or query in str(p.get('flavor', '')).lower()
-                ]
-        else:
-            self.products = all_products
+        self.search_query = query
+        self.run_search()
         self.current_page = 0
         self.manage_products()
 
+    def run_search(self):
+        """Find the products matching self.search_query"""
+        query = self.search_query
+        self.search_version = get_collection_version('products')
+        # إذا كان البحث يطابق باركود منتج بالضبط
+        product_by_barcode = find_by_barcode(query) if query else None
+        if product_by_barcode:
+            self.search_results = [product_by_barcode]
+        else:
+            self.search_results = search_products(query) if query else None
+
+    def displayed_products(self):
+        """The search results while a search is active, else all products"""
+        if self.search_query and self.search_version != get_collection_version('products'):
+            # Products were added, edited or sold since the search ran
+            self.run_search()
+        return self.search_results if self.search_results is not None else self.products
+
     def get_bilingual(self, key, default_en, default_ar):
         en = self.LANGUAGES['en'].get(key, default_en)
         ar = self.LANGUAGES['ar'].get(key, default_ar)
         return f"{en} / {ar}"
 
     def goto_next_page(self):
-        filtered_products = [p for p in self.products if str(p.get('status', '')).strip().lower() in ['active', 'available'] and p.get('source', 'defined') != 'inventory']
+        filtered_products = [p for p in self.displayed_products() if str(p.get('status', '')).strip().lower() in ['active', 'available'] and p.get('source', 'defined') != 'inventory']
         total_products = len(filtered_products)
         total_pages = max(1, (total_products + self.products_per_page - 1) // self.products_per_page)
         if self.current_page < total_pages - 1:
@@ -0,0 +1,134 @@
+import re
+import threading
+from constants import PRODUCT_SEARCH_FIELDS
+from data_handler import load_data, get_collection_version
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Product search
+# Name, barcode and flavor are normalized once per product and indexed by
+# character trigrams. A query only checks the products holding all of its
+# trigrams, and a query that extends the previous one only re-checks the
+# previous results, so typing stays fast on large catalogs.
+
+# Arabic diacritics and tatweel, dropped before matching
+_ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+# Letter variants typed interchangeably, and Arabic-Indic/Persian digits
+_FOLD = str.maketrans({
+    **dict.fromkeys('أإآٱ', 'ا'), 'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+    **{digit: str(value % 10) for value, digit in enumerate('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹')},
+})
+GRAM_SIZE = 3
+
+
+def normalize_text(value):
+    """Search form of a field or query: case-folded, Arabic letters unified"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = _ARABIC_MARKS.sub('', str(value)).translate(_FOLD).casefold()
+    return ' '.join(text.split())
+
+
+def _grams(text):
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _product_keys(products):
+    """Stable key per product: its id (or barcode), with a #n suffix for repeats"""
+    seen = {}
+    keys = []
+    for position, product in enumerate(products):
+        base = product.get('id')
+        if base is None:
+            base = product.get('barcode') or f"#{position}"
+        base = str(base)
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        keys.append(base if count == 0 else f"{base}#{count}")
+    return keys
+
+
+class ProductSearchIndex:
+    """Substring search over a product list, matching like `query in field`"""
+
+    def __init__(self, fields=PRODUCT_SEARCH_FIELDS):
+        self.fields = fields
+        self._entries = {}   # key -> (position, product, normalized field texts)
+        self._postings = {}  # trigram -> set of keys
+        self._last = (None, None)
+
+    def update(self, products):
+        """Sync with a new product list; only changed products are re-indexed"""
+        entries = {}
+        for position, (key, product) in enumerate(zip(_product_keys(products), products)):
+            texts = tuple(normalize_text(product.get(field)) for field in self.fields)
+            old = self._entries.get(key)
+            if old is None or old[2] != texts:
+                if old is not None:
+                    self._unindex(key, old[2])
+                self._index(key, texts)
+            entries[key] = (position, product, texts)
+        for key, old in self._entries.items():
+            if key not in entries:
+                self._unindex(key, old[2])
+        self._entries = entries
+        self._last = (None, None)
+
+    def _index(self, key, texts):
+        for text in texts:
+            for gram in _grams(text):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def _unindex(self, key, texts):
+        for text in texts:
+            for gram in _grams(text):
+                keys = self._postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[gram]
+
+    def _candidates(self, query):
+        last_query, last_keys = self._last
+        if last_query is not None and last_query in query:
+            # Anything matching the longer query matched the previous one
+            return last_keys
+        if len(query) < GRAM_SIZE:
+            return list(self._entries)
+        postings = sorted((self._postings.get(gram, set()) for gram in _grams(query)), key=len)
+        keys = set.intersection(*postings) if postings else set()
+        return sorted(keys, key=lambda key: self._entries[key][0])
+
+    def search(self, query):
+        """Copies of the products whose fields contain query, in catalog order"""
+        query = normalize_text(query)
+        if not query:
+            self._last = (None, None)
+            return [dict(product) for _, product, _ in self._entries.values()]
+        keys = [
+            key for key in self._candidates(query)
+            if any(query in text for text in self._entries[key][2])
+        ]
+        self._last = (query, keys)
+        return [dict(self._entries[key][1]) for key in keys]
+
+
+_lock = threading.Lock()
+_indexes = {}  # collection name -> (version, ProductSearchIndex)
+
+
+def search_products(query, collection_name='products'):
+    """Search a product collection, syncing its index when the data changed"""
+    with _lock:
+        version = get_collection_version(collection_name)
+        index_version, index = _indexes.get(collection_name, (None, None))
+        if index is None:
+            index = ProductSearchIndex()
+        if index_version != version:
+            index.update(load_data(collection_name) or [])
+            _indexes[collection_name] = (version, index)
+            logger.debug("Search index for %s synced at version %s", collection_name, version)
+        return index.search(query)
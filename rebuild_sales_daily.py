@@ -0,0 +1,36 @@
+from pymongo import MongoClient, ReplaceOne
+from constants import MONGODB_URI, MONGODB_DB_NAME, MONGODB_COLLECTIONS, SALES_DAILY_COLLECTION
+import schema
+
+# Rebuild the sales_daily rollup from the full sales_journal.
+# Checkouts keep the rollup current with $inc; run this once for history
+# recorded before the rollup existed, or to repair it. Run it while no
+# terminal is checking out, or their increments may be overwritten.
+
+BATCH_SIZE = 500
+
+def rebuild(db):
+    """Recompute every sales_daily document; returns how many were written"""
+    totals = {}
+    projection = {'date': 1, 'total': 1, 'total_amount': 1, 'items': 1, 'terminal': 1}
+    for sale in db[MONGODB_COLLECTIONS["sales_journal"]].find({}, projection):
+        rollup_id, day, terminal, increments = schema.sale_rollup(sale)
+        if rollup_id not in totals:
+            totals[rollup_id] = dict({'date': day, 'terminal': terminal}, **dict.fromkeys(schema.SALES_ROLLUP_FIELDS, 0))
+        for field, amount in increments.items():
+            totals[rollup_id][field] += amount
+
+    collection = db[SALES_DAILY_COLLECTION]
+    requests = [ReplaceOne({'_id': rollup_id}, document, upsert=True) for rollup_id, document in totals.items()]
+    for start in range(0, len(requests), BATCH_SIZE):
+        collection.bulk_write(requests[start:start + BATCH_SIZE], ordered=False)
+    collection.delete_many({'_id': {'$nin': list(totals)}})
+    return len(totals)
+
+if __name__ == "__main__":
+    try:
+        client = MongoClient(MONGODB_URI)
+        written = rebuild(client[MONGODB_DB_NAME])
+        print(f"[MongoDB] Rebuilt {written} sales_daily documents")
+    except Exception as e:
+        print(f"[MongoDB] Error: {e}")
@@ -1,12 +1,22 @@
 import customtkinter as ctk
 # Import necessary styled functions from theme
-from theme import create_styled_frame, create_styled_label, create_styled_button, COLORS, FONTS
+from theme import create_styled_frame, create_styled_label, create_styled_button, create_styled_entry, COLORS, FONTS
 # Import data handling functions
-from data_handler import load_data#, save_data
+from data_handler import (
+    load_data, get_sales_summary, get_analytics, get_sales_report, get_sales_over_time, get_top_products
+)#, save_data
+from data_worker import run_in_background
+from ui_elements import show_error
 from collections import defaultdict # Import defaultdict
 from datetime import datetime, timedelta # Import datetime for date parsing
-import statistics
+from schema import SALES_ROLLUP_FIELDS
+from constants import TOP_PRODUCTS_REPORT_LIMIT
+import analytics_store
+from analytics_engine import InventoryColumns, DailySeries, CustomerColumns
 import json
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 # Try to import matplotlib, if not available, use text-based charts
 try:
@@ -18,7 +28,7 @@ try:
     MATPLOTLIB_AVAILABLE = True
 except ImportError:
     MATPLOTLIB_AVAILABLE = False
-    print("Warning: matplotlib not available. Using text-based charts instead.")
+    logger.warning("matplotlib not available. Using text-based charts instead.")
 
 class ReportingAnalytics:
     def __init__(self, root, current_language, languages, back_callback):
@@ -27,16 +37,17 @@ class ReportingAnalytics:
         self.LANGUAGES = languages
         self.back_callback = back_callback
 
-        # Initialize data
+        # Data is loaded on the data worker when the screen is opened
         self.frame = None
-        try:
-            self.sales_data = load_data('sales_records.json') or []
-            self.inventory_data = load_data('inventory.json') or []
-            self.customer_data = load_data('customers.json') or []
-        except Exception:
-            self.sales_data = []
-            self.inventory_data = []
-            self.customer_data = []
+        self.inventory_data = []
+        self.customer_data = []
+        # Inventory and daily sales as arrays for the KPIs (analytics_engine)
+        self.inventory_columns = InventoryColumns([])
+        self.daily_series = DailySeries({})
+        # Sales come pre-aggregated: all-time totals from the sales_daily
+        # rollup and the last 30 days from the analytics store
+        self.sales_summary = dict.fromkeys(SALES_ROLLUP_FIELDS, 0)
+        self.recent_analytics = analytics_store.combine([])
 
         # Calculate dynamic thresholds based on data
         self.calculate_thresholds()
@@ -45,81 +56,90 @@ class ReportingAnalytics:
         self.dashboard_data = {}
         self.update_dashboard_data()
 
+    def load_report_data(self):
+        """Load the inventory and customer data the reports are built from"""
+        return (
+            load_data('inventory') or [],
+            load_data('customers') or []
+        )
+
+    def load_analytics(self, callback, load=get_analytics, date_range=(None, None), **options):
+        """Run load(start_day, end_day) on the data worker (all time by default), then call callback with the result"""
+        run_in_background(
+            self.root, load, *date_range,
+            on_done=callback,
+            on_error=lambda error: show_error(f"Error loading analytics: {str(error)}", self.current_language),
+            loading_message="Loading...",
+            **options
+        )
+
+    def report_date_range(self):
+        """(start_day, end_day) typed above the reports, None for a blank side; None if a date is invalid"""
+        days = []
+        for entry in (self.report_start_entry, self.report_end_entry):
+            day = entry.get().strip()
+            if day:
+                try:
+                    datetime.strptime(day, '%Y-%m-%d')
+                except ValueError:
+                    show_error(self.LANGUAGES[self.current_language].get("invalid_date_format", "Invalid date format. Please use YYYY-MM-DD."), self.current_language)
+                    return None
+            days.append(day or None)
+        return tuple(days)
+
     def calculate_thresholds(self):
         """Calculate dynamic thresholds based on inventory data"""
-        quantities = [int(item.get('quantity', 0)) for item in self.inventory_data if item.get('quantity')]
-        if quantities:
-            # Set low stock threshold to 25% of the median quantity
-            self.low_stock_threshold = max(1, int(statistics.median(quantities) * 0.25))
-        else:
-            self.low_stock_threshold = 10  # Default fallback
+        # 25% of the median stocked quantity
+        self.low_stock_threshold = self.inventory_columns.low_stock_threshold()
 
     def update_dashboard_data(self):
         """Update dashboard KPIs and metrics"""
-        # Sales KPIs
-        total_sales = sum(
-            sum(float(item.get('price', 0)) * int(item.get('quantity', 0)) 
-            for item in sale.get('items', [])
-        ) for sale in self.sales_data
+        self.dashboard_data = self.compute_dashboard_data(
+            self.inventory_columns, self.daily_series, self.customer_data, self.low_stock_threshold,
+            self.sales_summary, self.recent_analytics
         )
+
+    def compute_dashboard_data(self, inventory, daily_series, customer_data, low_stock_threshold,
+                               sales_summary, recent_analytics):
+        """Dashboard KPIs for the given data; touches no widgets, so it can run on the data worker.
+
+        inventory and daily_series are the analytics_engine columns of the
+        inventory and of recent_analytics (the last 30 days of the analytics
+        store); sales_summary is the all-time sales_daily summary.
+        """
+        # Sales KPIs
+        total_sales = sales_summary['gross']
+        sale_count = sales_summary['count']
         
-        # Calculate daily sales for last 30 days
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        daily_sales = defaultdict(float)
-        
-        for sale in self.sales_data:
-            try:
-                sale_date = datetime.fromisoformat(sale.get('date', ''))
-                if start_date <= sale_date <= end_date:
-                    date_str = sale_date.strftime('%Y-%m-%d')
-                    daily_sales[date_str] += sum(
-                        float(item.get('price', 0)) * int(item.get('quantity', 0))
-                        for item in sale.get('items', [])
-                    )
-            except (ValueError, TypeError):
-                continue
+        # Daily sales for the last 30 days
+        daily_sales = {day: totals['gross'] for day, totals in recent_analytics['daily'].items()}
         
         # Inventory KPIs
-        total_inventory_value = sum(
-            float(item.get('price', 0)) * int(item.get('quantity', 0))
-            for item in self.inventory_data
-        )
-        
-        low_stock_count = sum(
-            1 for item in self.inventory_data
-            if int(item.get('quantity', 0)) < self.low_stock_threshold
-        )
-        
-        out_of_stock_count = sum(
-            1 for item in self.inventory_data
-            if int(item.get('quantity', 0)) == 0
-        )
+        total_inventory_value = inventory.total_value()
+        in_stock_count, low_stock_count, out_of_stock_count = inventory.stock_counts(low_stock_threshold)
         
         # Customer KPIs
-        total_customers = len(self.customer_data)
-        active_customers = len(set(
-            sale.get('customer', '') for sale in self.sales_data
-            if sale.get('customer')
-        ))
+        total_customers = len(customer_data)
+        # Customers who bought something in the last 30 days
+        active_customers = sum(1 for name in recent_analytics['customers'] if name != 'Unknown')
         
         # Additional KPIs
-        total_products = len(self.inventory_data)
-        avg_order_value = total_sales / len(self.sales_data) if self.sales_data else 0
+        total_products = len(inventory)
+        avg_order_value = total_sales / sale_count if sale_count else 0
         
         # Calculate profit margin (simplified - assuming 30% margin)
         estimated_profit = total_sales * 0.3
         
-        # Store dashboard data
-        self.dashboard_data = {
+        return {
             'total_sales': total_sales,
-            'daily_sales': dict(daily_sales),
+            'daily_sales': daily_sales,
             'total_inventory_value': total_inventory_value,
+            'in_stock_count': in_stock_count,
             'low_stock_count': low_stock_count,
             'out_of_stock_count': out_of_stock_count,
             'total_customers': total_customers,
             'active_customers': active_customers,
-            'avg_daily_sales': sum(daily_sales.values()) / 30 if daily_sales else 0,
+            'avg_daily_sales': daily_series.total() / 30,
             'total_products': total_products,
             'avg_order_value': avg_order_value,
             'estimated_profit': estimated_profit
@@ -181,11 +201,10 @@ class ReportingAnalytics:
         analytics_tab = self.tab_view.add("📈 Analytics")
         self.create_analytics_tab(analytics_tab)
 
+        self.refresh_dashboard()
+
     def create_dashboard_tab(self, parent):
         """Create the main dashboard with KPIs and charts"""
-        # Update dashboard data
-        self.update_dashboard_data()
-        
         # KPI Cards Frame
         kpi_frame = create_styled_frame(parent, style='card')
         kpi_frame.pack(fill='x', padx=20, pady=20)
@@ -420,7 +439,7 @@ class ReportingAnalytics:
             # Prepare data for pie chart
             categories = ['In Stock', 'Low Stock', 'Out of Stock']
             counts = [
-                len([item for item in self.inventory_data if int(item.get('quantity', 0)) >= self.low_stock_threshold]),
+                self.dashboard_data['in_stock_count'],
                 self.dashboard_data['low_stock_count'],
                 self.dashboard_data['out_of_stock_count']
             ]
@@ -461,7 +480,7 @@ class ReportingAnalytics:
         chart_text.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Generate text-based chart
-        in_stock = len([item for item in self.inventory_data if int(item.get('quantity', 0)) >= self.low_stock_threshold])
+        in_stock = self.dashboard_data['in_stock_count']
         low_stock = self.dashboard_data['low_stock_count']
         out_of_stock = self.dashboard_data['out_of_stock_count']
         total = in_stock + low_stock + out_of_stock
@@ -498,6 +517,24 @@ class ReportingAnalytics:
         self.reports_area_frame = ctk.CTkScrollableFrame(parent, orientation='vertical')
         self.reports_area_frame.pack(fill='both', expand=True, padx=20, pady=20)
 
+        # Date range of the sales reports; a blank side is open-ended
+        range_frame = create_styled_frame(self.reports_area_frame, style='card')
+        range_frame.pack(pady=10)
+        create_styled_label(
+            range_frame,
+            text=self.LANGUAGES[self.current_language].get("from_date", "From (YYYY-MM-DD)"),
+            style='body'
+        ).pack(side='left', padx=(20, 5), pady=10)
+        self.report_start_entry = create_styled_entry(range_frame, width=120)
+        self.report_start_entry.pack(side='left', padx=5, pady=10)
+        create_styled_label(
+            range_frame,
+            text=self.LANGUAGES[self.current_language].get("to_date", "To (YYYY-MM-DD)"),
+            style='body'
+        ).pack(side='left', padx=(20, 5), pady=10)
+        self.report_end_entry = create_styled_entry(range_frame, width=120)
+        self.report_end_entry.pack(side='left', padx=(5, 20), pady=10)
+
         # Sales Summary Report
         generate_sales_button = create_styled_button(
             self.reports_area_frame,
@@ -639,8 +676,33 @@ class ReportingAnalytics:
         self.analytics_results_text.pack(fill='both', expand=True, padx=20, pady=20)
 
     def refresh_dashboard(self):
-        """Refresh dashboard data and update display"""
-        self.update_dashboard_data()
+        """Reload the data and KPIs on the data worker, then update the display"""
+        run_in_background(
+            self.root, self._load_dashboard,
+            on_done=self._on_dashboard_loaded,
+            on_error=lambda error: show_error(f"Error refreshing dashboard: {str(error)}", self.current_language),
+            loading_message="Loading..."
+        )
+
+    def _load_dashboard(self):
+        inventory_data, customer_data = self.load_report_data()
+        inventory = InventoryColumns(inventory_data)
+        low_stock_threshold = inventory.low_stock_threshold()
+        end_date = datetime.now()
+        sales_summary = get_sales_summary()
+        recent_analytics = get_analytics((end_date - timedelta(days=30)).strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        daily_series = DailySeries(recent_analytics['daily'])
+        dashboard_data = self.compute_dashboard_data(
+            inventory, daily_series, customer_data, low_stock_threshold, sales_summary, recent_analytics
+        )
+        return (inventory_data, inventory, daily_series, customer_data, low_stock_threshold,
+                sales_summary, recent_analytics, dashboard_data)
+
+    def _on_dashboard_loaded(self, result):
+        (self.inventory_data, self.inventory_columns, self.daily_series, self.customer_data,
+         self.low_stock_threshold, self.sales_summary, self.recent_analytics, self.dashboard_data) = result
+        if self.frame is None or not self.frame.winfo_exists():
+            return
         # Recreate the dashboard tab
         dashboard_tab = self.tab_view.get("📊 Dashboard")
         for widget in dashboard_tab.winfo_children():
@@ -650,42 +712,20 @@ class ReportingAnalytics:
     def generate_trend_analysis(self):
         """Generate advanced sales trend analysis"""
         # Calculate trends
-        daily_sales = self.dashboard_data['daily_sales']
-        if not daily_sales:
+        series = self.daily_series
+        if not len(series):
             self.show_analytics_result("No sales data available for trend analysis.")
             return
         
-        # Calculate moving average
-        dates = sorted(daily_sales.keys())
-        sales_values = [daily_sales[date] for date in dates]
-        
-        # Simple moving average (7-day)
-        moving_avg = []
-        for i in range(len(sales_values)):
-            start_idx = max(0, i - 6)
-            avg = sum(sales_values[start_idx:i+1]) / (i - start_idx + 1)
-            moving_avg.append(avg)
-        
-        # Calculate growth rate
-        if len(sales_values) >= 2:
-            growth_rate = ((sales_values[-1] - sales_values[0]) / sales_values[0]) * 100
-        else:
-            growth_rate = 0
-        
-        # Calculate volatility
-        if len(sales_values) > 1:
-            volatility = statistics.stdev(sales_values)
-            avg_sales = sum(sales_values) / len(sales_values)
-            volatility_percentage = (volatility / avg_sales) * 100 if avg_sales > 0 else 0
-        else:
-            volatility_percentage = 0
+        growth_rate = series.growth_rate()
+        volatility_percentage = series.volatility()
         
         # Generate insights
         analysis = f"📈 SALES TREND ANALYSIS\n{'='*50}\n\n"
-        analysis += f"📊 Period: {len(dates)} days\n"
-        analysis += f"💰 Total Sales: ${sum(sales_values):.2f}\n"
+        analysis += f"📊 Period: {len(series)} days\n"
+        analysis += f"💰 Total Sales: ${series.total():.2f}\n"
         analysis += f"📈 Growth Rate: {growth_rate:.1f}%\n"
-        analysis += f"📊 Average Daily Sales: ${sum(sales_values)/len(sales_values):.2f}\n"
+        analysis += f"📊 Average Daily Sales: ${series.mean():.2f}\n"
         analysis += f"📈 Volatility: {volatility_percentage:.1f}%\n\n"
         
         # Trend interpretation
@@ -705,8 +745,8 @@ class ReportingAnalytics:
             analysis += "📊 HIGH VOLATILITY: Significant sales fluctuations\n"
         
         # Predictions
-        if len(sales_values) >= 7:
-            recent_avg = sum(sales_values[-7:]) / 7
+        if len(series) >= 7:
+            recent_avg = series.trailing_mean(7)
             analysis += f"\n🔮 PREDICTIONS:\n"
             analysis += f"• Next 7 days estimated sales: ${recent_avg * 7:.2f}\n"
             if growth_rate > 0:
@@ -732,10 +772,8 @@ class ReportingAnalytics:
     def generate_inventory_forecast(self):
         """Generate inventory forecasting insights"""
         # Analyze inventory patterns
-        low_stock_items = [item for item in self.inventory_data 
-                          if int(item.get('quantity', 0)) < self.low_stock_threshold]
-        out_of_stock_items = [item for item in self.inventory_data 
-                             if int(item.get('quantity', 0)) == 0]
+        inventory = self.inventory_columns
+        _, low_stock_count, out_of_stock_count = inventory.stock_counts(self.low_stock_threshold)
         
         # Calculate inventory turnover (simplified)
         total_inventory_value = self.dashboard_data['total_inventory_value']
@@ -747,19 +785,11 @@ class ReportingAnalytics:
             turnover_ratio = 0
         
         # Calculate inventory efficiency metrics
-        total_items = sum(int(item.get('quantity', 0)) for item in self.inventory_data)
-        avg_item_value = total_inventory_value / len(self.inventory_data) if self.inventory_data else 0
+        total_items = inventory.total_quantity()
+        avg_item_value = total_inventory_value / len(inventory) if len(inventory) else 0
         
         # Analyze product categories
-        category_analysis = defaultdict(lambda: {'count': 0, 'value': 0, 'quantity': 0})
-        for item in self.inventory_data:
-            category = item.get('category', 'Uncategorized')
-            quantity = int(item.get('quantity', 0))
-            price = float(item.get('price', 0))
-            
-            category_analysis[category]['count'] += 1
-            category_analysis[category]['value'] += quantity * price
-            category_analysis[category]['quantity'] += quantity
+        category_analysis = inventory.by_category()
         
         # Generate forecast
         forecast = f"🔮 INVENTORY FORECAST\n{'='*50}\n\n"
@@ -767,8 +797,8 @@ class ReportingAnalytics:
         forecast += f"🔄 Inventory Turnover Ratio: {turnover_ratio:.2f}\n"
         forecast += f"📊 Total Items: {total_items}\n"
         forecast += f"💰 Average Item Value: ${avg_item_value:.2f}\n"
-        forecast += f"⚠️ Low Stock Items: {len(low_stock_items)}\n"
-        forecast += f"❌ Out of Stock Items: {len(out_of_stock_items)}\n\n"
+        forecast += f"⚠️ Low Stock Items: {low_stock_count}\n"
+        forecast += f"❌ Out of Stock Items: {out_of_stock_count}\n\n"
         
         # Category analysis
         forecast += f"📈 CATEGORY ANALYSIS:\n"
@@ -786,13 +816,9 @@ class ReportingAnalytics:
             forecast += "\n🔴 LOW TURNOVER: Inventory may be overstocked\n"
         
         # Demand forecasting
-        if len(self.sales_data) > 0:
-            # Calculate demand based on sales history
-            total_items_sold = sum(
-                sum(int(item.get('quantity', 0)) for item in sale.get('items', []))
-                for sale in self.sales_data
-            )
-            avg_daily_demand = total_items_sold / 30 if self.sales_data else 0
+        if len(self.daily_series) > 0:
+            # Calculate demand based on the last 30 days of sales
+            avg_daily_demand = float(self.daily_series.items.sum()) / 30
             
             forecast += f"\n🔮 DEMAND FORECASTING:\n"
             forecast += f"• Average daily demand: {avg_daily_demand:.1f} items\n"
@@ -813,10 +839,10 @@ class ReportingAnalytics:
         
         # Recommendations
         forecast += f"\n💡 RECOMMENDATIONS:\n"
-        if len(out_of_stock_items) > 0:
-            forecast += f"• Restock {len(out_of_stock_items)} out-of-stock items\n"
-        if len(low_stock_items) > 0:
-            forecast += f"• Monitor {len(low_stock_items)} low-stock items\n"
+        if out_of_stock_count > 0:
+            forecast += f"• Restock {out_of_stock_count} out-of-stock items\n"
+        if low_stock_count > 0:
+            forecast += f"• Monitor {low_stock_count} low-stock items\n"
         if turnover_ratio < 1:
             forecast += "• Consider reducing inventory levels\n"
         if turnover_ratio > 3:
@@ -831,8 +857,11 @@ class ReportingAnalytics:
         
         self.show_analytics_result(forecast)
 
-    def generate_customer_insights(self):
+    def generate_customer_insights(self, analytics=None):
         """Generate customer behavior insights"""
+        if analytics is None:
+            self.load_analytics(self.generate_customer_insights)
+            return
         # Analyze customer data
         total_customers = self.dashboard_data['total_customers']
         active_customers = self.dashboard_data['active_customers']
@@ -844,40 +873,16 @@ class ReportingAnalytics:
             retention_rate = 0
         
         # Analyze customer purchase patterns
-        customer_purchases = defaultdict(int)
-        customer_spending = defaultdict(float)
-        customer_visits = defaultdict(int)
-        
-        for sale in self.sales_data:
-            customer = sale.get('customer', 'Unknown')
-            if 'items' in sale:
-                sale_total = 0
-                for item in sale['items']:
-                    quantity = int(item.get('quantity', 0))
-                    price = float(item.get('price', 0))
-                    customer_purchases[customer] += quantity
-                    sale_total += quantity * price
-                customer_spending[customer] += sale_total
-                customer_visits[customer] += 1
+        customers = CustomerColumns(analytics['customers'])
         
         # Categorize customers
-        frequent_customers = sum(1 for purchases in customer_purchases.values() if purchases > 10)
-        regular_customers = sum(1 for purchases in customer_purchases.values() if 5 <= purchases <= 10)
-        occasional_customers = sum(1 for purchases in customer_purchases.values() if purchases < 5)
+        frequent_customers, regular_customers, occasional_customers = customers.purchase_segments()
         
         # Calculate customer value metrics
-        if customer_spending:
-            avg_customer_value = sum(customer_spending.values()) / len(customer_spending)
-            max_customer_value = max(customer_spending.values())
-            min_customer_value = min(customer_spending.values())
-        else:
-            avg_customer_value = max_customer_value = min_customer_value = 0
+        avg_customer_value, max_customer_value, min_customer_value = customers.value_stats()
         
         # Customer lifetime value analysis
-        high_value_customers = sum(1 for spending in customer_spending.values() if spending > avg_customer_value * 2)
-        medium_value_customers = sum(1 for spending in customer_spending.values() 
-                                   if avg_customer_value * 0.5 <= spending <= avg_customer_value * 2)
-        low_value_customers = sum(1 for spending in customer_spending.values() if spending < avg_customer_value * 0.5)
+        high_value_customers, medium_value_customers, low_value_customers = customers.value_segments(avg_customer_value)
         
         # Generate insights
         insights = f"👥 CUSTOMER INSIGHTS\n{'='*50}\n\n"
@@ -906,9 +911,8 @@ class ReportingAnalytics:
             insights += "🔴 LOW RETENTION: Need to improve customer retention\n"
         
         # Purchase frequency analysis
-        avg_visits = 0  # Initialize with default value
-        if customer_visits:
-            avg_visits = sum(customer_visits.values()) / len(customer_visits)
+        avg_visits = customers.average_visits()
+        if len(customers):
             insights += f"📊 Average Visits per Customer: {avg_visits:.1f}\n"
             
             if avg_visits > 3:
@@ -925,7 +929,7 @@ class ReportingAnalytics:
             insights += f"📈 Customer Acquisition Rate: {acquisition_rate:.1f}%\n"
         
         # Predictions
-        if len(customer_spending) > 0:
+        if len(customers) > 0:
             insights += f"\n🔮 CUSTOMER PREDICTIONS:\n"
             insights += f"• Projected monthly revenue: ${avg_customer_value * active_customers:.2f}\n"
             if retention_rate > 60:
@@ -942,10 +946,10 @@ class ReportingAnalytics:
         if frequent_customers < total_customers * 0.2:
             insights += "• Focus on customer engagement\n"
             insights += "• Develop VIP customer program\n"
-        if high_value_customers < len(customer_spending) * 0.1:
+        if high_value_customers < len(customers) * 0.1:
             insights += "• Target high-value customer acquisition\n"
             insights += "• Premium service offerings\n"
-        if customer_visits and avg_visits < 2:
+        if len(customers) and avg_visits < 2:
             insights += "• Implement customer retention strategies\n"
             insights += "• Regular follow-up communications\n"
         
@@ -963,73 +967,46 @@ class ReportingAnalytics:
         ar = self.LANGUAGES['ar'].get(key, default_ar)
         return f"{en} / {ar}"
 
-    def generate_sales_summary_report(self):
+    def generate_sales_summary_report(self, report=None):
         """Generates and displays a comprehensive sales summary report."""
-        total_sales = 0
-        total_items_sold = 0
-        sales_by_category = defaultdict(float)
-        sales_by_employee = defaultdict(float)
-
-        for sale in self.sales_data:
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        category = item.get('category', 'Uncategorized')
-                        employee = sale.get('employee', 'Unknown')
-                        
-                        total_sales += price * quantity
-                        total_items_sold += quantity
-                        sales_by_category[category] += price * quantity
-                        sales_by_employee[employee] += price * quantity
-                    except (ValueError, TypeError):
-                        continue
+        if report is None:
+            date_range = self.report_date_range()
+            if date_range is not None:
+                self.load_analytics(self.generate_sales_summary_report, get_sales_report, date_range)
+            return
+        total_sales = report['gross']
+        total_items_sold = report['items']
 
         # Calculate average sale value
-        avg_sale = total_sales / len(self.sales_data) if self.sales_data else 0
+        avg_sale = total_sales / report['count'] if report['count'] else 0
 
         report_text = f"{self.get_bilingual('total_sales', 'Total Sales', 'المبيعات الكلية')}: ${total_sales:.2f}\n"
         report_text += f"{self.get_bilingual('total_items_sold', 'Total Items Sold', 'عدد الصنف المباع')}: {total_items_sold}\n"
         report_text += f"{self.get_bilingual('average_sale', 'Average Sale Value', 'متوسط قيمة المبيعات')}: ${avg_sale:.2f}\n\n"
         
         report_text += f"{self.get_bilingual('sales_by_category', 'Sales by Category', 'المبيعات بالفئة')}:\n"
-        for category, amount in sorted(sales_by_category.items(), key=lambda x: x[1], reverse=True):
-            report_text += f"{category}: ${amount:.2f}\n"
+        for row in report['categories']:
+            report_text += f"{row['name']}: ${row['revenue']:.2f}\n"
 
         report_text += f"\n{self.get_bilingual('sales_by_employee', 'Sales by Employee', 'المبيعات بالموظف')}:\n"
-        for employee, amount in sorted(sales_by_employee.items(), key=lambda x: x[1], reverse=True):
-            report_text += f"{employee}: ${amount:.2f}\n"
+        for row in report['employees']:
+            report_text += f"{row['name']}: ${row['revenue']:.2f}\n"
 
         self.sales_report_results_label.configure(text=report_text)
 
     def generate_inventory_summary_report(self):
         """Generates and displays a comprehensive inventory summary report."""
-        total_items = 0
-        total_value = 0
-        low_stock_items = []
-        out_of_stock_items = []
-        category_summary = defaultdict(lambda: {'count': 0, 'value': 0})
-
-        for item in self.inventory_data:
-            try:
-                quantity = int(item.get('quantity', 0))
-                price = float(item.get('price', 0))
-                category = item.get('category', 'Uncategorized')
-                
-                total_items += quantity
-                total_value += quantity * price
-                
-                category_summary[category]['count'] += quantity
-                category_summary[category]['value'] += quantity * price
-
-                if quantity < self.low_stock_threshold:
-                    low_stock_items.append(f"{item.get('name', 'Unnamed Item')} ({quantity})")
-                if quantity == 0:
-                    out_of_stock_items.append(item.get('name', 'Unnamed Item'))
-
-            except (ValueError, TypeError):
-                continue
+        # Columns built with the report data, one row per inventory item
+        inventory = self.inventory_columns
+        total_items = inventory.total_quantity()
+        total_value = inventory.total_value()
+        category_summary = {
+            category: {'count': data['quantity'], 'value': data['value']}
+            for category, data in inventory.by_category().items()
+        }
+        stock = list(zip((item.get('name', 'Unnamed Item') for item in self.inventory_data), inventory.quantity.tolist()))
+        low_stock_items = [f"{name} ({int(quantity)})" for name, quantity in stock if quantity < self.low_stock_threshold]
+        out_of_stock_items = [name for name, quantity in stock if quantity == 0]
 
         report_text = f"{self.get_bilingual('total_items', 'Total Items in Inventory', 'عدد الصنف في المخزن')}: {total_items}\n"
         report_text += f"{self.get_bilingual('total_value', 'Total Inventory Value', 'قيمة المخزن الكلية')}: ${total_value:.2f}\n\n"
@@ -1048,24 +1025,16 @@ class ReportingAnalytics:
 
         self.inventory_report_results_label.configure(text=report_text)
 
-    def generate_customer_summary_report(self):
+    def generate_customer_summary_report(self, analytics=None):
         """Generates and displays a comprehensive customer summary report."""
+        if analytics is None:
+            self.load_analytics(self.generate_customer_summary_report)
+            return
         total_customers = len(self.customer_data)
         customers_by_category = defaultdict(int)
-        total_purchases = 0
-        customer_purchases = defaultdict(int)
-
-        # Count purchases per customer
-        for sale in self.sales_data:
-            customer = sale.get('customer', 'Unknown')
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        quantity = int(item.get('quantity', 0))
-                        customer_purchases[customer] += quantity
-                        total_purchases += quantity
-                    except (ValueError, TypeError):
-                        continue
+        total_purchases = analytics['items']
+        # Items bought per customer
+        customer_purchases = {name: entry['quantity'] for name, entry in analytics['customers'].items()}
 
         # Categorize customers based on purchase frequency
         for customer, purchases in customer_purchases.items():
@@ -1086,30 +1055,15 @@ class ReportingAnalytics:
 
         self.customer_report_results_label.configure(text=report_text)
 
-    def generate_sales_over_time_report(self):
+    def generate_sales_over_time_report(self, report=None):
         """Generates and displays sales aggregated by date with trends."""
-        sales_by_date = defaultdict(float)
-        daily_items = defaultdict(int)
-
-        for sale in self.sales_data:
-            sale_date_str = sale.get('date')
-            if not sale_date_str:
-                continue
-
-            try:
-                sale_date = datetime.fromisoformat(sale_date_str).strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        sales_by_date[sale_date] += price * quantity
-                        daily_items[sale_date] += quantity
-                    except (ValueError, TypeError):
-                        continue
+        if report is None:
+            date_range = self.report_date_range()
+            if date_range is not None:
+                self.load_analytics(self.generate_sales_over_time_report, get_sales_over_time, date_range)
+            return
+        sales_by_date = {row['date']: row['gross'] for row in report}
+        daily_items = {row['date']: row['items'] for row in report}
 
         # Calculate trends
         dates = sorted(sales_by_date.keys())
@@ -1140,37 +1094,21 @@ class ReportingAnalytics:
         self.sales_over_time_report_text.insert('1.0', report_text)
         self.sales_over_time_report_text.configure(state='disabled')
 
-    def generate_top_selling_products_report(self):
+    def generate_top_selling_products_report(self, report=None):
         """Generates and displays a report of top selling products with trends."""
-        product_sales = defaultdict(lambda: {'quantity': 0, 'revenue': 0, 'dates': set()})
-        
-        for sale in self.sales_data:
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        name = item.get('name', 'Unnamed Item')
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        date = sale.get('date', '')
-                        
-                        product_sales[name]['quantity'] += quantity
-                        product_sales[name]['revenue'] += price * quantity
-                        if date:
-                            product_sales[name]['dates'].add(date.split()[0])  # Get just the date part
-                    except (ValueError, TypeError):
-                        continue
-
-        # Sort products by quantity sold
-        sorted_products = sorted(
-            product_sales.items(),
-            key=lambda x: x[1]['quantity'],
-            reverse=True
-        )
+        if report is None:
+            date_range = self.report_date_range()
+            if date_range is not None:
+                self.load_analytics(self.generate_top_selling_products_report, get_top_products, date_range,
+                                    limit=TOP_PRODUCTS_REPORT_LIMIT)
+            return
 
         report_lines = [f"{self.get_bilingual('top_selling_products', 'Top Selling Products', 'المبيعات الأعلى')}:"]
         
-        for name, data in sorted_products:
-            days_sold = len(data['dates'])
+        # Products come most sold first
+        for data in report:
+            name = data['name']
+            days_sold = data['days']
             avg_daily_sales = data['quantity'] / days_sold if days_sold > 0 else 0
             
             report_lines.append(f"\n{name}:")
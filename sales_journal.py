@@ -1,13 +1,17 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from ui_elements import show_error, show_success
-from data_handler import load_data, save_data, import_from_excel
+from data_handler import load_data, save_data, import_from_excel, get_sales_summary
 from theme import (
     COLORS, FONTS, create_styled_button,
     create_styled_entry, create_styled_frame,
     create_styled_label
 )
 from datetime import datetime
+from schema import sale_items
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class ViewSalesRecords:
     def __init__(self, root, current_language, languages, back_callback):
@@ -15,21 +19,20 @@ class ViewSalesRecords:
         self.current_language = current_language
         self.LANGUAGES = languages
         self.back_callback = back_callback
-        self.sales = load_data("sales") or []
+        self.sales = load_data("sales_journal") or []
 
     def refresh_sales(self):
         """Refresh the sales list from database and update display"""
         try:
             # Import data from Excel before loading from JSON
             if import_from_excel('sales_journal'):
-                print("[DEBUG] Successfully imported data from Excel")
+                logger.debug("Successfully imported data from Excel")
             else:
-                print("[DEBUG] No Excel data to import or import failed")
+                logger.debug("No Excel data to import or import failed")
 
             # Load sales from database
-            self.sales = load_data("sales") or []
-            print(f"[DEBUG] Loaded sales count: {len(self.sales)}")
-            print(f"[DEBUG] Loaded sales: {self.sales}")
+            self.sales = load_data("sales_journal") or []
+            logger.debug("Loaded sales count: %s", len(self.sales))
             
             # Refresh the display
             self.view_sales()
@@ -37,7 +40,7 @@ class ViewSalesRecords:
         except Exception as e:
             import traceback
             traceback_str = traceback.format_exc()
-            print(f"[TRACEBACK] {traceback_str}")
+            logger.error("%s", traceback_str)
             show_error(f"Error refreshing sales: {str(e)}", self.current_language)
 
     def view_sales(self):
@@ -83,9 +86,10 @@ class ViewSalesRecords:
         summary_frame.pack(fill='x', padx=20, pady=(0, 20))
         
         # Calculate summary data
-        total_sales = len(self.sales)
-        today_sales = len([s for s in self.sales if s.get('date', '').startswith(str(datetime.now().date()))])
-        total_revenue = sum(s.get('total', 0) for s in self.sales)
+        all_time = get_sales_summary()
+        total_sales = all_time['count']
+        today_sales = get_sales_summary(str(datetime.now().date()))['count']
+        total_revenue = all_time['gross']
         avg_sale = total_revenue / total_sales if total_sales > 0 else 0
         
         # Create summary cards
@@ -167,7 +171,8 @@ class ViewSalesRecords:
             date_label.grid(row=i, column=0, padx=10, pady=10, sticky='w')
             
             # Items
-            items_text = ", ".join(f"{item['product']['name']} (x{item['quantity']})" for item in sale.get('items', []))
+            items = sale_items(sale)
+            items_text = ", ".join(f"{item['name']} (x{item['quantity']})" for item in items)
             items_label = create_styled_label(
                 scrollable_table,
                 text=items_text,
@@ -176,7 +181,7 @@ class ViewSalesRecords:
             items_label.grid(row=i, column=1, padx=10, pady=10, sticky='w')
             
             # Total quantity
-            total_quantity = sum(item['quantity'] for item in sale.get('items', []))
+            total_quantity = sum(item['quantity'] for item in items)
             quantity_label = create_styled_label(
                 scrollable_table,
                 text=str(total_quantity),
@@ -264,11 +269,11 @@ class ViewSalesRecords:
             header.grid(row=0, column=i, padx=10, pady=10, sticky='w')
         
         # Items list
-        for i, item in enumerate(sale.get('items', []), 1):
+        for i, item in enumerate(sale_items(sale), 1):
             # Item name
             name_label = create_styled_label(
                 items_frame,
-                text=item['product']['name'],
+                text=item['name'],
                 style='body'
             )
             name_label.grid(row=i, column=0, padx=10, pady=10, sticky='w')
@@ -284,7 +289,7 @@ class ViewSalesRecords:
             # Price
             price_label = create_styled_label(
                 items_frame,
-                text=f"${item['product']['price']:.2f}",
+                text=f"${item['unit_price']:.2f}",
                 style='body'
             )
             price_label.grid(row=i, column=2, padx=10, pady=10, sticky='w')
@@ -292,7 +297,7 @@ class ViewSalesRecords:
             # Subtotal
             subtotal_label = create_styled_label(
                 items_frame,
-                text=f"${item['product']['price'] * item['quantity']:.2f}",
+                text=f"${item['line_total']:.2f}",
                 style='body'
             )
             subtotal_label.grid(row=i, column=3, padx=10, pady=10, sticky='w')
@@ -0,0 +1,172 @@
+import math
+from constants import COLLECTION_SCHEMAS
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Type coercion on ingest
+# Numbers arrive as strings from Excel and entry fields, as floats (or NaN)
+# from pandas and as ints from dialogs. Documents are coerced to the types in
+# COLLECTION_SCHEMAS when they are written, and again when they are loaded
+# (documents written before coercion existed), so readers can do plain
+# arithmetic instead of re-parsing every field in their loops. as_number()
+# covers the values that still do not parse.
+
+# Arabic-Indic and Persian digits, plus the Arabic decimal/thousands separators
+_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹٫٬', '01234567890123456789.,')
+
+
+def _is_blank(value):
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+def _parse_number(value):
+    """float for a number or numeric string; raises ValueError otherwise"""
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().translate(_DIGITS).replace(',', '')
+    return float(text)
+
+
+def _to_str(value):
+    # Barcodes and phone numbers read as numbers: 123.0 -> "123"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def normalize_barcode(value):
+    """Comparison key for a barcode, or None if blank.
+
+    Numeric cells (123.0), padded or spaced strings, Arabic digits and
+    leading zeros on all-digit codes all reduce to the same key.
+    """
+    if _is_blank(value):
+        return None
+    key = ''.join(_to_str(value).translate(_DIGITS).split()).casefold()
+    if key.isdigit():
+        key = key.lstrip('0') or '0'
+    return key or None
+
+
+def coerce_value(kind, value, fill_blanks=True):
+    """Coerce one value to a schema type ("int", "float", "number" or "str").
+
+    Blank numeric values become 0 when fill_blanks is set and None otherwise.
+    Values that cannot be parsed are returned unchanged.
+    """
+    if _is_blank(value):
+        if kind == 'str':
+            return '' if fill_blanks else None
+        return 0 if fill_blanks else None
+    if kind == 'str':
+        return _to_str(value)
+    try:
+        number = _parse_number(value)
+    except (TypeError, ValueError):
+        return value
+    if math.isnan(number) or math.isinf(number):
+        return 0 if fill_blanks else None
+    if kind == 'float':
+        return number
+    if kind == 'int' or number.is_integer():
+        return int(number)
+    return number
+
+
+def coerce_field(collection_name, field, value, fill_blanks=True):
+    """Coerce one field value by the collection's schema (unchanged if it has none)"""
+    kind = COLLECTION_SCHEMAS.get(collection_name, {}).get(field)
+    return value if kind is None else coerce_value(kind, value, fill_blanks)
+
+
+def coerce_document(collection_name, document, fill_blanks=True):
+    """Coerce the schema fields present in a document, in place"""
+    fields = COLLECTION_SCHEMAS.get(collection_name)
+    if not fields:
+        return document
+    for field, kind in fields.items():
+        if field not in document:
+            continue
+        value = document[field]
+        coerced = coerce_value(kind, value, fill_blanks)
+        if coerced is value and kind != 'str' and not isinstance(value, (int, float)):
+            logger.debug("Could not coerce %s.%s=%r to %s", collection_name, field, value, kind)
+        document[field] = coerced
+    return document
+
+
+def coerce_documents(collection_name, documents, fill_blanks=True):
+    """Coerce every document of a collection in place; returns the list"""
+    if collection_name in COLLECTION_SCHEMAS:
+        for document in documents:
+            coerce_document(collection_name, document, fill_blanks)
+    return documents
+
+
+# Sale line items
+# sales_journal items store a snapshot of what was sold, not the whole
+# product document. Older sales embed the cart entry ({'product': {...},
+# 'quantity', 'sale_type'}); sale_items() reads both shapes.
+SALE_ITEM_FIELDS = ('product_id', 'name', 'sale_type', 'quantity', 'unit_price', 'line_total')
+
+
+def as_number(value):
+    """value as an int or float, 0 when blank or not a number"""
+    number = coerce_value('number', value)
+    return number if isinstance(number, (int, float)) and not isinstance(number, bool) else 0
+
+
+def compact_sale_item(item):
+    """Compact line item from a cart entry or an older stored item"""
+    if 'product' not in item and 'unit_price' in item:
+        return item
+    product = item.get('product') or {}
+    quantity = as_number(item.get('quantity', 0))
+    unit_price = float(as_number(product.get('price', item.get('price', 0))))
+    return {
+        'product_id': product.get('id', item.get('product_id', item.get('id'))),
+        'name': product.get('name', item.get('name', item.get('product_name', ''))),
+        'sale_type': item.get('sale_type'),
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'line_total': unit_price * quantity,
+    }
+
+
+def sale_items(sale):
+    """A sale's line items in the compact shape, whichever shape is stored"""
+    return [compact_sale_item(item) for item in sale.get('items') or []]
+
+
+# Daily sales rollup
+# One sales_daily document per day and terminal holds these running totals,
+# so screens showing today's or all-time sales read a few small documents
+# instead of the whole journal.
+SALES_ROLLUP_FIELDS = (
+    'count', 'gross', 'items',
+    'wholesale_amount', 'wholesale_items', 'retail_amount', 'retail_items',
+)
+
+
+def sale_rollup(sale):
+    """(document _id, day, terminal, increments) a sale adds to sales_daily"""
+    day = str(sale.get('date', ''))[:10]
+    terminal = sale.get('terminal') or 'unknown'
+    items = sale_items(sale)
+    increments = dict.fromkeys(SALES_ROLLUP_FIELDS, 0)
+    increments['count'] = 1
+    total = sale.get('total', sale.get('total_amount'))
+    increments['gross'] = as_number(total) if total is not None else sum(item['line_total'] for item in items)
+    for item in items:
+        increments['items'] += item['quantity']
+        if item['sale_type'] in ('wholesale', 'retail'):
+            increments[f"{item['sale_type']}_amount"] += item['line_total']
+            increments[f"{item['sale_type']}_items"] += item['quantity']
+    return f"{day}|{terminal}", day, terminal, increments
@@ -8,6 +8,9 @@ from theme import (
 from tkcalendar import DateEntry
 from datetime import datetime
 import tkinter as tk
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class StoreManager:
     def __init__(self, root, current_language, languages, back_callback):
@@ -33,7 +36,7 @@ class StoreManager:
                 inventory_names = [item['name'] for item in self.inventory if item.get('name', '').strip()]
                 self.add_inventory_menu.configure(values=inventory_names)
             except Exception as e:
-                print(f"[WARNING] Failed to update dropdown: {e}")
+                logger.warning("Failed to update dropdown: %s", e)
                 self.add_inventory_dialog = None
                 self.add_inventory_menu = None
         else:
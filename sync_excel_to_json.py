@@ -1,17 +1,18 @@
 import os
-import json
 import openpyxl
+import json_journal
+import schema
 
 EXCEL_PATH = os.path.join('excel_data', 'hookah_inventory.xlsx')
-JSON_PATH = os.path.join('mongodb_data', 'inventory.json')
+COLLECTION_NAME = 'inventory'
 
 # --- Sync Excel to JSON ---
 def sync_excel_to_json():
     if not os.path.exists(EXCEL_PATH):
         print(f"Excel file not found: {EXCEL_PATH}")
         return
-    if not os.path.exists(JSON_PATH):
-        print(f"JSON file not found: {JSON_PATH}")
+    if not json_journal.exists(COLLECTION_NAME):
+        print(f"JSON file not found: {json_journal.snapshot_path(COLLECTION_NAME)}")
         return
     # Load Excel
     wb = openpyxl.load_workbook(EXCEL_PATH)
@@ -26,13 +27,12 @@ def sync_excel_to_json():
             item_id = str(row[id_idx-1].value)
             carton_count = row[c_idx-1].value if c_idx else None
             units_per_carton = row[u_idx-1].value if u_idx else None
-            excel_data[item_id] = {
+            excel_data[item_id] = schema.coerce_document(COLLECTION_NAME, {
                 'carton_count': carton_count,
                 'units_per_carton': units_per_carton
-            }
+            }, fill_blanks=False)
     # Load JSON
-    with open(JSON_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = json_journal.load_collection(COLLECTION_NAME)
     updated = 0
     for item in data:
         item_id = str(item.get('id'))
@@ -47,9 +47,8 @@ def sync_excel_to_json():
                 changed = True
             if changed:
                 updated += 1
-    with open(JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"[Sync] Updated {updated} items in {JSON_PATH} from Excel.")
+    json_journal.write_snapshot(COLLECTION_NAME, schema.coerce_documents(COLLECTION_NAME, data))
+    print(f"[Sync] Updated {updated} items in {json_journal.snapshot_path(COLLECTION_NAME)} from Excel.")
 
 if __name__ == "__main__":
     sync_excel_to_json() 
\ No newline at end of file
@@ -1,19 +1,17 @@
-import os
-import json
 from pymongo import MongoClient
 from constants import MONGODB_URI, MONGODB_DB_NAME
+import json_journal
+import schema
 
-JSON_PATH = os.path.join('mongodb_data', 'inventory.json')
 COLLECTION_NAME = 'inventory'
 
 # --- Sync JSON to MongoDB ---
 def sync_json_to_mongo():
-    if not os.path.exists(JSON_PATH):
-        print(f"JSON file not found: {JSON_PATH}")
+    if not json_journal.exists(COLLECTION_NAME):
+        print(f"JSON file not found: {json_journal.snapshot_path(COLLECTION_NAME)}")
         return
     # Load JSON
-    with open(JSON_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = schema.coerce_documents(COLLECTION_NAME, json_journal.load_collection(COLLECTION_NAME))
     # Connect to MongoDB
     client = MongoClient(MONGODB_URI)
     db = client[MONGODB_DB_NAME]
@@ -0,0 +1,112 @@
+import os
+import uuid
+import threading
+from datetime import datetime
+from bson import json_util
+from constants import MONGODB_DATA_PATH
+from app_logging import get_logger
+
+# Durable queue of MongoDB writes made while the database was unreachable.
+# Operations are appended (fsync'd) to _sync_queue.jsonl with an idempotency
+# key; once replayed they are acknowledged with an {"ack": op_id} line and
+# the file is dropped when nothing is left pending.
+
+QUEUE_FILE = os.path.join(MONGODB_DATA_PATH, "_sync_queue.jsonl")
+FAILED_FILE = os.path.join(MONGODB_DATA_PATH, "_sync_failed.jsonl")
+
+logger = get_logger(__name__)
+_lock = threading.RLock()
+_pending = None  # op_id -> operation, in queue order
+_failures = []   # rejected operations not yet reported to the user
+
+
+def _append_line(path, record):
+    os.makedirs(MONGODB_DATA_PATH, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json_util.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _load():
+    global _pending
+    if _pending is not None:
+        return _pending
+    _pending = {}
+    if os.path.exists(QUEUE_FILE):
+        with open(QUEUE_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json_util.loads(line)
+                except ValueError:
+                    logger.warning("Skipping unreadable sync queue record in %s", QUEUE_FILE)
+                    continue
+                if 'ack' in record:
+                    _pending.pop(record['ack'], None)
+                else:
+                    _pending[record['op_id']] = record
+    return _pending
+
+
+def enqueue(collection_name, kind, payload):
+    """Durably queue one write; returns the queued operation"""
+    operation = {
+        'op_id': uuid.uuid4().hex,
+        'collection': collection_name,
+        'kind': kind,
+        'payload': payload,
+        'queued_at': datetime.now().isoformat()
+    }
+    with _lock:
+        _append_line(QUEUE_FILE, operation)
+        _load()[operation['op_id']] = operation
+    logger.debug("Queued %s on %s for sync (%s pending)", kind, collection_name, len(_pending))
+    return operation
+
+
+def pending():
+    """Operations still waiting to be replayed, oldest first"""
+    with _lock:
+        return list(_load().values())
+
+
+def has_pending():
+    with _lock:
+        return bool(_load())
+
+
+def pending_collections():
+    with _lock:
+        return {operation['collection'] for operation in _load().values()}
+
+
+def acknowledge(op_id):
+    """Mark an operation as replayed"""
+    with _lock:
+        queue = _load()
+        if queue.pop(op_id, None) is None:
+            return
+        if queue:
+            _append_line(QUEUE_FILE, {'ack': op_id})
+        elif os.path.exists(QUEUE_FILE):
+            os.remove(QUEUE_FILE)
+
+
+def record_failure(operation, error):
+    """Move an operation that MongoDB rejects out of the queue"""
+    with _lock:
+        failure = dict(operation, error=str(error))
+        _append_line(FAILED_FILE, failure)
+        _failures.append(failure)
+        acknowledge(operation['op_id'])
+
+
+def take_failures():
+    """Rejected operations recorded since the last call, oldest first"""
+    with _lock:
+        failures = list(_failures)
+        del _failures[:]
+        return failures
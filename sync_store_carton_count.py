@@ -1,7 +1,8 @@
-import json
 import math
+import json_journal
+import schema
 
-STORE_PRODUCTS_PATH = 'mongodb_data/store_products.json'
+STORE_PRODUCTS_COLLECTION = 'store_products'
 
 def fix_nan(val):
     # Replace NaN (from Excel or pandas) with empty string
@@ -12,8 +13,7 @@ def fix_nan(val):
     return val
 
 def main():
-    with open(STORE_PRODUCTS_PATH, 'r', encoding='utf-8') as f:
-        products = json.load(f)
+    products = json_journal.load_collection(STORE_PRODUCTS_COLLECTION)
 
     for prod in products:
         # دمج quantity إلى carton_count
@@ -23,8 +23,7 @@ def main():
         if 'flavor' in prod:
             prod['flavor'] = fix_nan(prod['flavor'])
 
-    with open(STORE_PRODUCTS_PATH, 'w', encoding='utf-8') as f:
-        json.dump(products, f, ensure_ascii=False, indent=4)
+    json_journal.write_snapshot(STORE_PRODUCTS_COLLECTION, schema.coerce_documents(STORE_PRODUCTS_COLLECTION, products))
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -1,10 +1,10 @@
 import os
-import json
 import openpyxl
+import json_journal
+import schema
 from pymongo import MongoClient
 
 EXCEL_PATH = os.path.join('excel_data', 'hookah_store_products.xlsx')
-JSON_PATH = os.path.join('mongodb_data', 'store_products.json')
 
 # --- إعداد بيانات الاتصال بمونجو ---
 MONGO_URI = 'mongodb://localhost:27017/'  # عدلها إذا كان لديك بيانات اتصال مختلفة
@@ -30,8 +30,8 @@ def sync_excel_to_json_and_mongo():
     if not os.path.exists(EXCEL_PATH):
         print(f"Excel file not found: {EXCEL_PATH}")
         return
-    if not os.path.exists(JSON_PATH):
-        print(f"JSON file not found: {JSON_PATH}")
+    if not json_journal.exists(COLLECTION_NAME):
+        print(f"JSON file not found: {json_journal.snapshot_path(COLLECTION_NAME)}")
         return
     # Load Excel
     wb = openpyxl.load_workbook(EXCEL_PATH)
@@ -43,11 +43,10 @@ def sync_excel_to_json_and_mongo():
         c_idx = headers.get('carton_count')
         if id_idx and c_idx:
             item_id = str(row[id_idx-1].value)
-            carton_count = row[c_idx-1].value
+            carton_count = schema.coerce_field(COLLECTION_NAME, 'carton_count', row[c_idx-1].value, fill_blanks=False)
             excel_data[item_id] = carton_count
     # Load JSON
-    with open(JSON_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = json_journal.load_collection(COLLECTION_NAME)
     updated_json = 0
     for item in data:
         item_id = str(item.get('id'))
@@ -56,9 +55,8 @@ def sync_excel_to_json_and_mongo():
             if excel_val is not None and item.get('carton_count') != excel_val:
                 item['carton_count'] = excel_val
                 updated_json += 1
-    with open(JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"[Sync] Updated {updated_json} items in {JSON_PATH} from Excel.")
+    json_journal.write_snapshot(COLLECTION_NAME, schema.coerce_documents(COLLECTION_NAME, data))
+    print(f"[Sync] Updated {updated_json} items in {json_journal.snapshot_path(COLLECTION_NAME)} from Excel.")
 
     # --- تحديث MongoDB ---
     try:
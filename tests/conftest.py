@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# The modules live at the repository root, which is not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# No log file and no cache watcher thread under test
+os.environ.setdefault('LOG_FILE', '')
+os.environ.setdefault('DATA_CACHE_REFRESH', 'none')
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run in an empty directory, so mongodb_data/ and the in-memory journal
+    and sync queue state start fresh"""
+    import json_journal
+    import sync_queue
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(json_journal, '_states', {})
+    monkeypatch.setattr(json_journal, '_journal_sizes', {})
+    monkeypatch.setattr(sync_queue, '_pending', None)
+    monkeypatch.setattr(sync_queue, '_failures', [])
+    return tmp_path
+
+
+@pytest.fixture
+def online(data_dir, monkeypatch):
+    """data_handler connected to an in-memory MongoDB"""
+    mongomock = pytest.importorskip('mongomock')
+    import data_handler
+    db = mongomock.MongoClient()['test']
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(data_handler, 'db', db)
+    monkeypatch.setattr(data_handler, '_db_ready', ready)
+    monkeypatch.setattr(data_handler, 'start_db_initialization', lambda: None)
+    monkeypatch.setattr(data_handler, 'schedule_excel_export', lambda data_type: None)
+    monkeypatch.setattr(data_handler, '_collection_cache', {})
+    monkeypatch.setattr(data_handler, '_collection_bases', {})
+    return data_handler
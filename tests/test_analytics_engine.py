@@ -0,0 +1,81 @@
+import statistics
+
+import pytest
+
+from analytics_engine import numeric_column, InventoryColumns, DailySeries, CustomerColumns
+
+INVENTORY = [
+    {'quantity': 10, 'price': 2.5, 'category': 'Tobacco'},
+    {'quantity': '4', 'price': '10', 'category': 'Coal'},
+    {'quantity': 0, 'price': 7, 'category': 'Tobacco'},
+    {'quantity': 'n/a', 'price': None},
+    {'quantity': 2.9, 'price': 1, 'category': 'Coal'},
+]
+
+
+def test_numeric_column_treats_bad_values_as_zero():
+    rows = [{'x': 1}, {'x': '2.5'}, {'x': None}, {'x': 'abc'}, {}]
+    assert numeric_column(rows, 'x').tolist() == [1.0, 2.5, 0.0, 0.0, 0.0]
+
+
+def test_inventory_totals_and_categories():
+    inventory = InventoryColumns(INVENTORY)
+    assert len(inventory) == 5
+    # 2.9 counts as 2 whole units
+    assert inventory.total_quantity() == 16
+    assert inventory.total_value() == pytest.approx(10 * 2.5 + 4 * 10 + 2 * 1)
+    assert inventory.by_category() == {
+        'Tobacco': {'count': 2, 'value': 25.0, 'quantity': 10},
+        'Coal': {'count': 2, 'value': 42.0, 'quantity': 6},
+        'Uncategorized': {'count': 1, 'value': 0.0, 'quantity': 0},
+    }
+
+
+def test_low_stock_threshold_and_counts():
+    inventory = InventoryColumns(INVENTORY)
+    # Median of the stocked quantities (10, 4, 2) is 4; a quarter of it rounds down to 1
+    assert inventory.low_stock_threshold() == 1
+    assert inventory.stock_counts(5) == (1, 4, 2)
+    assert InventoryColumns([{'quantity': 0}]).low_stock_threshold() == 10
+
+
+DAILY = {
+    '2026-10-03': {'gross': 150.0, 'items': 9},
+    '2026-10-01': {'gross': 100.0, 'items': 5},
+    '2026-10-02': {'gross': 50.0, 'items': 2},
+}
+
+
+def test_daily_series_kpis():
+    series = DailySeries(DAILY)
+    assert [str(day) for day in series.dates] == ['2026-10-01', '2026-10-02', '2026-10-03']
+    assert series.total() == 300.0
+    assert series.mean() == 100.0
+    assert series.growth_rate() == 50.0
+    assert series.volatility() == pytest.approx(statistics.stdev([100, 50, 150]) / 100 * 100)
+    assert series.trailing_mean(2) == 100.0
+
+
+def test_daily_series_without_enough_days():
+    assert DailySeries({}).mean() == 0.0
+    assert DailySeries({}).trailing_mean(7) == 0.0
+    single = DailySeries({'2026-10-01': {'gross': 80.0, 'items': 1}})
+    assert (single.growth_rate(), single.volatility()) == (0.0, 0.0)
+
+
+CUSTOMERS = {
+    'Sara': {'count': 6, 'quantity': 12, 'revenue': 300.0},
+    'Omar': {'count': 2, 'quantity': 5, 'revenue': 60.0},
+    'Laila': {'count': 1, 'quantity': 1, 'revenue': 10.0},
+    'Unknown': {'count': 3, 'quantity': 10, 'revenue': 30.0},
+}
+
+
+def test_customer_segments_and_stats():
+    customers = CustomerColumns(CUSTOMERS)
+    assert customers.purchase_segments() == (1, 2, 1)
+    assert customers.value_stats() == (100.0, 300.0, 10.0)
+    # High is above twice the average; low is below half of it
+    assert customers.value_segments(100.0) == (1, 1, 2)
+    assert customers.average_visits() == 3.0
+    assert CustomerColumns({}).value_stats() == (0.0, 0.0, 0.0)
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+import analytics_store
+from constants import ANALYTICS_DAILY_COLLECTION
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def sale(date, lines, employee=None, customer=None):
+    document = {
+        '_id': ObjectId(),
+        'date': date,
+        'items': [
+            {'product_id': product_id, 'name': name, 'sale_type': 'retail',
+             'quantity': quantity, 'unit_price': price, 'line_total': quantity * price}
+            for product_id, name, quantity, price in lines
+        ],
+    }
+    if employee:
+        document['employee'] = employee
+    if customer:
+        document['customer'] = customer
+    return document
+
+
+SALES = [
+    sale('2026-10-01 10:00:00', [(1, 'Mint', 2, 10.0), (2, 'Coal', 5, 1.0)], 'cashier', 'Sara'),
+    sale('2026-10-01 18:00:00', [(1, 'Mint', 1, 10.0)], 'admin'),
+    sale(datetime(2026, 10, 2, 12), [(3, 'Grape', 2, 12.0), (2, 'Coal', 5, 1.0)], 'cashier', 'Omar'),
+    sale('2026-10-04 09:00:00', [(2, 'Coal', 10, 1.0), (3, 'Grape', 1, 12.0)], customer='Sara'),
+    sale('not a date', [(1, 'Mint', 1, 10.0)]),
+]
+PRODUCTS = [{'id': 1, 'category': 'Tobacco'}, {'id': 2, 'type': 'Coal'}, {'id': 3, 'category': 'Tobacco'}]
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()['test']
+    db['sales_journal'].insert_many([dict(document) for document in SALES])
+    db['products'].insert_many([dict(document) for document in PRODUCTS])
+    analytics_store.rebuild(db)
+    return db
+
+
+def folded_days(start_day=None, end_day=None, sales=SALES):
+    """Day totals folded in Python straight from the sales, oldest first"""
+    days = analytics_store.fold_sales(sales, analytics_store.category_map(PRODUCTS))
+    return [totals for day, totals in sorted(days.items()) if analytics_store.in_range(day, start_day, end_day)]
+
+
+def test_fold_sales_totals():
+    days = {totals['date']: totals for totals in folded_days()}
+    assert sorted(days) == ['2026-10-01', '2026-10-02', '2026-10-04']
+    first = days['2026-10-01']
+    assert (first['count'], first['gross'], first['items']) == (2, 35.0, 8)
+    assert first['categories'] == {
+        'Tobacco': {'count': 2, 'quantity': 3, 'revenue': 30.0},
+        'Coal': {'count': 1, 'quantity': 5, 'revenue': 5.0},
+    }
+    assert days['2026-10-04']['employees'] == {'Unknown': {'count': 1, 'quantity': 11, 'revenue': 22.0}}
+
+
+def test_stored_days_match_the_fold(db):
+    assert analytics_store.load_days(db) == folded_days()
+    assert analytics_store.load_days(db, '2026-10-02', '2026-10-04') == folded_days('2026-10-02', '2026-10-04')
+
+
+@pytest.mark.parametrize('start_day, end_day', [(None, None), ('2026-10-02', None), (None, '2026-10-01'), ('2026-10-03', '2026-10-03')])
+def test_pipelines_match_the_python_reports(db, start_day, end_day):
+    days = folded_days(start_day, end_day)
+    assert analytics_store.aggregate_sales_summary(db, start_day, end_day) == analytics_store.sales_summary(days)
+    assert analytics_store.aggregate_sales_over_time(db, start_day, end_day) == analytics_store.sales_over_time(days)
+    assert analytics_store.aggregate_top_products(db, start_day, end_day) == analytics_store.top_products(days)
+    assert analytics_store.aggregate_top_products(db, start_day, end_day, limit=2) == analytics_store.top_products(days, limit=2)
+
+
+def test_refresh_recomputes_the_days_of_new_sales(db):
+    late = sale('2026-10-02 20:00:00', [(1, 'Mint', 3, 10.0)], 'cashier')
+    db['sales_journal'].insert_one(dict(late))
+    assert analytics_store.refresh(db) >= 1
+    assert analytics_store.load_days(db) == folded_days(sales=SALES + [late])
+
+
+def test_recompute_days_counts_sales_older_than_the_watermark(db):
+    analytics_store.refresh(db)
+    # A checkout queued offline keeps the _id it was given days earlier
+    late = sale('2026-10-03 20:00:00', [(1, 'Mint', 3, 10.0)], 'cashier')
+    late['_id'] = ObjectId.from_datetime(datetime(2026, 9, 1))
+    db['sales_journal'].insert_one(dict(late))
+    analytics_store.refresh(db)
+    assert analytics_store.load_days(db) == folded_days()
+
+    analytics_store.recompute_days(db, {'2026-10-03'})
+    assert analytics_store.load_days(db) == folded_days(sales=SALES + [late])
+
+
+def test_rebuild_drops_days_without_sales(db):
+    db['sales_journal'].delete_many({'date': {'$regex': '^2026-10-04'}})
+    analytics_store.rebuild(db)
+    assert [day['date'] for day in analytics_store.load_days(db)] == ['2026-10-01', '2026-10-02']
+    assert db[ANALYTICS_DAILY_COLLECTION].find_one({'_id': analytics_store.STATE_ID})['last_id'] is not None
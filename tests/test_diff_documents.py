@@ -0,0 +1,57 @@
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne
+
+from data_handler import diff_documents
+
+
+def test_unchanged_documents_produce_no_operations():
+    existing = [{'_id': ObjectId(), 'id': 1, 'name': 'Mint'}, {'_id': ObjectId(), 'name': 'No id'}]
+    data = [{'id': 1, 'name': 'Mint'}, {'name': 'No id'}]
+    assert diff_documents(existing, data) == []
+
+
+def test_changed_and_removed_fields_update_only_those_fields():
+    object_id = ObjectId()
+    existing = [{'_id': object_id, 'id': 1, 'name': 'Mint', 'price': 10, 'note': 'old'}]
+    data = [{'_id': str(object_id), 'id': 1, 'name': 'Mint', 'price': 12}]
+    assert diff_documents(existing, data) == [
+        UpdateOne({'_id': object_id}, {'$set': {'price': 12}, '$unset': {'note': ''}})
+    ]
+
+
+def test_new_documents_are_inserted_and_missing_ones_deleted():
+    kept, dropped = ObjectId(), ObjectId()
+    existing = [{'_id': kept, 'id': 1, 'name': 'Mint'}, {'_id': dropped, 'id': 2, 'name': 'Lemon'}]
+    data = [{'id': 1, 'name': 'Mint'}, {'id': 3, 'name': 'Grape'}]
+    assert diff_documents(existing, data) == [
+        InsertOne({'id': 3, 'name': 'Grape'}),
+        DeleteOne({'_id': dropped}),
+    ]
+
+
+def test_documents_are_matched_by_id_when_data_has_no_object_id():
+    object_id = ObjectId()
+    existing = [{'_id': object_id, 'id': 7, 'name': 'Mint'}]
+    data = [{'id': 7, 'name': 'Double Mint'}]
+    assert diff_documents(existing, data) == [UpdateOne({'_id': object_id}, {'$set': {'name': 'Double Mint'}})]
+
+
+def test_repeated_content_is_matched_one_to_one():
+    first, second = ObjectId(), ObjectId()
+    existing = [{'_id': first, 'name': 'Coal'}, {'_id': second, 'name': 'Coal'}]
+    assert diff_documents(existing, [{'name': 'Coal'}]) == [DeleteOne({'_id': second})]
+
+
+def test_nan_equals_nan():
+    existing = [{'_id': ObjectId(), 'id': 1, 'price': float('nan')}]
+    assert diff_documents(existing, [{'id': 1, 'price': float('nan')}]) == []
+
+
+def test_cached_base_without_object_ids_selects_by_id_or_content():
+    existing = [{'id': 1, 'name': 'Mint'}, {'id': 2, 'name': 'Lemon'}, {'name': 'Coal'}]
+    data = [{'id': 1, 'name': 'Double Mint'}]
+    assert diff_documents(existing, data) == [
+        UpdateOne({'id': 1}, {'$set': {'name': 'Double Mint'}}),
+        DeleteOne({'id': 2}),
+        DeleteOne({'name': 'Coal'}),
+    ]
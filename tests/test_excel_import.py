@@ -0,0 +1,29 @@
+import os
+
+import data_handler
+from data_handler import merge_records
+
+
+def test_rows_match_existing_items_by_id_first():
+    existing = [{'id': 1, 'name': 'Mint', 'price': 10}, {'id': 2, 'name': 'Lemon', 'price': 8}]
+    incoming = [{'id': 1.0, 'name': 'Lemon', 'price': 12}, {'id': 3, 'price': 5}, {'price': 1}]
+    result = merge_records(existing, incoming)
+    assert result['updated'] == [(existing[0], {'name': 'Lemon', 'price': 12})]
+    assert [row.get('id') for row in result['added']] == [3, None]
+
+
+def test_reimporting_an_exported_sales_workbook_changes_nothing(online):
+    os.makedirs('excel_data')
+    sales = online.db['sales_journal']
+    sales.insert_many([
+        {'id': 1, 'date': '2026-10-01 10:00:00', 'total': 20.0,
+         'items': [{'product_id': 5, 'name': 'Mint', 'sale_type': 'retail', 'quantity': 2, 'unit_price': 10.0, 'line_total': 20.0}]},
+        {'id': 2, 'date': '2026-10-01 11:00:00', 'total': 3.0,
+         'items': [{'product_id': 6, 'name': 'Coal', 'sale_type': 'retail', 'quantity': 3, 'unit_price': 1.0, 'line_total': 3.0}]},
+    ])
+    before = list(sales.find({}, {'_id': 0}))
+    assert data_handler.export_to_excel('sales_journal', force=True)
+
+    for _ in range(2):
+        assert data_handler.import_from_excel('sales_journal')
+        assert list(sales.find({}, {'_id': 0})) == before
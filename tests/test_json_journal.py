@@ -0,0 +1,65 @@
+import json
+import os
+
+import json_journal
+
+
+def reload_collection(name):
+    """Read a collection back from disk, as a restarted app would"""
+    json_journal._states.clear()
+    return json_journal.load_collection(name)
+
+
+def test_save_journals_only_changes_and_replays_them(data_dir):
+    json_journal.record_save('products', [{'id': 1, 'name': 'Mint'}, {'id': 2, 'name': 'Lemon'}])
+    assert json_journal.record_save('products', [{'id': 1, 'name': 'Mint'}, {'id': 2, 'name': 'Lemon'}]) == 0
+    assert json_journal.record_save('products', [{'id': 1, 'name': 'Double Mint'}, {'id': 3, 'name': 'Grape'}]) == 3
+
+    with open(json_journal.journal_path('products'), encoding='utf-8') as f:
+        ops = [json.loads(line)['op'] for line in f]
+    assert ops == ['insert', 'insert', 'update', 'insert', 'delete']
+    assert reload_collection('products') == [{'id': 1, 'name': 'Double Mint'}, {'id': 3, 'name': 'Grape'}]
+
+
+def test_single_document_records_replay(data_dir):
+    json_journal.record_insert('suppliers', {'id': 1, 'name': 'A'})
+    json_journal.record_insert('suppliers', {'id': 2, 'name': 'B'})
+    json_journal.record_update_where('suppliers', 'id', 1, {'phone': '123'})
+    json_journal.record_delete_where('suppliers', 'id', '2')
+    assert reload_collection('suppliers') == [{'id': 1, 'name': 'A', 'phone': '123'}]
+
+
+def test_bulk_increments_numeric_fields(data_dir):
+    json_journal.record_bulk('products', [
+        {'op': 'insert', 'document': {'id': 1, 'quantity': 10}},
+        {'op': 'update', 'filter': {'id': 1}, 'inc': {'quantity': -3}},
+        {'op': 'update', 'filter': {'id': 1}, 'set': {'name': 'Mint'}, 'inc': {'retail_quantity': 2}},
+    ])
+    assert reload_collection('products') == [{'id': 1, 'quantity': 7, 'name': 'Mint', 'retail_quantity': 2}]
+
+
+def test_torn_last_line_is_skipped(data_dir):
+    json_journal.record_insert('products', {'id': 1, 'name': 'Mint'})
+    with open(json_journal.journal_path('products'), 'a', encoding='utf-8') as f:
+        f.write('{"op": "insert", "key": "id:2", "doc": {"id"')
+    assert reload_collection('products') == [{'id': 1, 'name': 'Mint'}]
+
+
+def test_compact_folds_the_journal_into_the_snapshot(data_dir):
+    json_journal.write_snapshot('products', [{'id': 1, 'name': 'Mint'}])
+    json_journal.record_insert('products', {'id': 2, 'name': 'Lemon'})
+    json_journal.record_delete_where('products', 'id', 1)
+    json_journal.compact('products')
+
+    assert not os.path.exists(json_journal.journal_path('products'))
+    with open(json_journal.snapshot_path('products'), encoding='utf-8') as f:
+        assert json.load(f) == [{'id': 2, 'name': 'Lemon'}]
+    assert reload_collection('products') == [{'id': 2, 'name': 'Lemon'}]
+
+
+def test_journal_compacts_itself_every_compact_every_records(data_dir, monkeypatch):
+    monkeypatch.setattr(json_journal, 'JOURNAL_COMPACT_EVERY', 3)
+    for product_id in range(3):
+        json_journal.record_insert('products', {'id': product_id})
+    assert not os.path.exists(json_journal.journal_path('products'))
+    assert reload_collection('products') == [{'id': 0}, {'id': 1}, {'id': 2}]
@@ -0,0 +1,73 @@
+from schema import compact_sale_item, sale_items, sale_rollup, as_number, SALES_ROLLUP_FIELDS
+
+
+def test_cart_entry_is_compacted_to_a_line_item():
+    cart_entry = {
+        'product': {'id': 5, 'name': 'Mint', 'price': '12.5', 'barcode': '111', 'image_path': 'mint.png'},
+        'quantity': '2',
+        'sale_type': 'retail',
+    }
+    assert compact_sale_item(cart_entry) == {
+        'product_id': 5,
+        'name': 'Mint',
+        'sale_type': 'retail',
+        'quantity': 2,
+        'unit_price': 12.5,
+        'line_total': 25.0,
+    }
+
+
+def test_compact_items_are_left_alone():
+    item = {'product_id': 5, 'name': 'Mint', 'sale_type': 'retail', 'quantity': 2, 'unit_price': 12.5, 'line_total': 25.0}
+    assert compact_sale_item(item) is item
+
+
+def test_flat_legacy_items_and_bad_numbers():
+    item = {'id': 7, 'product_name': 'Coal', 'price': 'n/a', 'quantity': 3}
+    assert compact_sale_item(item) == {
+        'product_id': 7, 'name': 'Coal', 'sale_type': None, 'quantity': 3, 'unit_price': 0.0, 'line_total': 0.0,
+    }
+
+
+def test_sale_items_reads_both_shapes():
+    sale = {'items': [
+        {'product': {'id': 1, 'name': 'Mint', 'price': 10}, 'quantity': 1, 'sale_type': 'wholesale'},
+        {'product_id': 2, 'name': 'Coal', 'sale_type': 'retail', 'quantity': 4, 'unit_price': 1.0, 'line_total': 4.0},
+    ]}
+    assert [(item['product_id'], item['line_total']) for item in sale_items(sale)] == [(1, 10.0), (2, 4.0)]
+    assert sale_items({'items': None}) == []
+
+
+def test_sale_rollup_splits_totals_by_sale_type():
+    sale = {
+        'date': '2026-10-01 14:30:00.123456',
+        'terminal': 'front',
+        'total': 34.0,
+        'items': [
+            {'product': {'id': 1, 'name': 'Mint', 'price': 10}, 'quantity': 3, 'sale_type': 'wholesale'},
+            {'product_id': 2, 'name': 'Coal', 'sale_type': 'retail', 'quantity': 4, 'unit_price': 1.0, 'line_total': 4.0},
+        ],
+    }
+    assert sale_rollup(sale) == ('2026-10-01|front', '2026-10-01', 'front', {
+        'count': 1, 'gross': 34.0, 'items': 7,
+        'wholesale_amount': 30.0, 'wholesale_items': 3, 'retail_amount': 4.0, 'retail_items': 4,
+    })
+
+
+def test_sale_rollup_without_total_or_terminal():
+    sale = {'date': '2026-10-02', 'items': [{'product': {'id': 1, 'price': 2.5}, 'quantity': 2}]}
+    rollup_id, day, terminal, increments = sale_rollup(sale)
+    assert (rollup_id, day, terminal) == ('2026-10-02|unknown', '2026-10-02', 'unknown')
+    assert increments['gross'] == 5.0
+    assert increments['items'] == 2
+    assert set(increments) == set(SALES_ROLLUP_FIELDS)
+
+
+def test_documents_written_before_coercion_load_as_numbers(online):
+    online.db['inventory'].insert_many([
+        {'id': 1, 'name': 'Mint', 'quantity': '12', 'price': '٢٫٥'},
+        {'id': 2, 'name': 'Coal', 'quantity': 4, 'price': 'n/a'},
+    ])
+    inventory = online.load_data('inventory')
+    assert [(item['quantity'], item['price']) for item in inventory] == [(12, 2.5), (4, 'n/a')]
+    assert [as_number(item['price']) for item in inventory] == [2.5, 0]
@@ -0,0 +1,128 @@
+import json
+import os
+from datetime import datetime
+
+from bson import ObjectId
+
+import analytics_store
+import json_journal
+import sync_queue
+
+
+def reload_queue():
+    """Read the queue back from disk, as a restarted app would"""
+    sync_queue._pending = None
+    return sync_queue.pending()
+
+
+def test_queued_operations_survive_a_restart_in_order(data_dir):
+    first = sync_queue.enqueue('products', 'insert', {'document': {'id': 1}})
+    second = sync_queue.enqueue('suppliers', 'delete', {'filter': {'id': 2}})
+    assert [operation['op_id'] for operation in reload_queue()] == [first['op_id'], second['op_id']]
+    assert sync_queue.has_pending()
+    assert sync_queue.pending_collections() == {'products', 'suppliers'}
+
+
+def test_acknowledged_operations_are_not_replayed(data_dir):
+    first = sync_queue.enqueue('products', 'insert', {'document': {'id': 1}})
+    second = sync_queue.enqueue('products', 'insert', {'document': {'id': 2}})
+    sync_queue.acknowledge(first['op_id'])
+    assert [operation['op_id'] for operation in reload_queue()] == [second['op_id']]
+
+    sync_queue.acknowledge(second['op_id'])
+    assert not os.path.exists(sync_queue.QUEUE_FILE)
+    assert reload_queue() == []
+
+
+def test_failures_leave_the_queue_and_are_reported_once(data_dir):
+    operation = sync_queue.enqueue('products', 'insert', {'document': {'id': 1}})
+    sync_queue.record_failure(operation, ValueError('duplicate barcode'))
+
+    assert reload_queue() == []
+    with open(sync_queue.FAILED_FILE, encoding='utf-8') as f:
+        assert json.loads(f.readline())['error'] == 'duplicate barcode'
+    failures = sync_queue.take_failures()
+    assert [failure['op_id'] for failure in failures] == [operation['op_id']]
+    assert sync_queue.take_failures() == []
+
+
+def test_drain_replays_each_operation_once(online):
+    document = {'_id': ObjectId(), 'id': 1, 'name': 'Mint'}
+    replayed = sync_queue.enqueue('products', 'insert', {'document': document})
+    applied = sync_queue.enqueue('products', 'insert', {'document': {'_id': ObjectId(), 'id': 2}})
+    # Applied by MongoDB before a crash, but never acknowledged
+    online.db[online.SYNC_LOG_COLLECTION].insert_one({'_id': applied['op_id']})
+
+    assert online.drain_sync_queue() == 0
+    assert list(online.db['products'].find({}, {'_id': 0})) == [{'id': 1, 'name': 'Mint'}]
+    assert online.db[online.SYNC_LOG_COLLECTION].find_one({'_id': replayed['op_id']}) is not None
+    assert not sync_queue.has_pending()
+
+
+def test_drain_reports_rejected_operations_and_restores_the_local_copy(online):
+    online.db['products'].create_index('barcode', unique=True)
+    online.db['products'].insert_one({'id': 1, 'barcode': '111'})
+    document = {'_id': ObjectId(), 'id': 2, 'barcode': '111'}
+    json_journal.record_insert('products', document)
+    operation = sync_queue.enqueue('products', 'insert', {'document': document})
+
+    assert online.drain_sync_queue() == 0
+    assert [failure['op_id'] for failure in online.take_sync_failures()] == [operation['op_id']]
+    assert json_journal.load_collection('products') == [{'id': 1, 'barcode': '111'}]
+
+
+def test_rejected_save_is_rolled_back_locally(online):
+    online.db['products'].create_index('barcode', unique=True)
+    online.db['products'].insert_one({'id': 1, 'barcode': '111'})
+    products = online.load_data('products')
+
+    assert not online.save_data('products', products + [{'id': 2, 'barcode': '111'}])
+    assert online.load_data('products') == [{'id': 1, 'barcode': '111'}]
+    assert json_journal.load_collection('products') == [{'id': 1, 'barcode': '111'}]
+
+
+def test_replayed_checkout_reaches_the_analytics(online, monkeypatch):
+    monkeypatch.setattr(online, '_transactions_supported', False)
+    # mongomock has no $setDifference
+    monkeypatch.setattr(online, '_clear_checkout_marker', lambda collection, query, op_id: collection.update_many(
+        query, {'$pull': {online.CHECKOUT_MARKER_FIELD: op_id}}))
+    online.db['products'].insert_one({'id': 1, 'name': 'Mint', 'quantity': 5})
+    analytics_store.rebuild(online.db)
+    analytics_store.refresh(online.db)
+    sale = {'_id': ObjectId.from_datetime(datetime(2026, 9, 1)), 'date': '2026-09-01 21:00:00',
+            'items': [{'product_id': 1, 'name': 'Mint', 'sale_type': 'retail',
+                       'quantity': 2, 'unit_price': 10.0, 'line_total': 20.0}]}
+    sync_queue.enqueue('sales_journal', 'checkout', {'sale': sale, 'stock': [{'id': 1, 'field': 'quantity', 'quantity': 2}]})
+
+    assert online.drain_sync_queue() == 0
+    [day] = analytics_store.load_days(online.db)
+    assert (day['date'], day['count'], day['gross']) == ('2026-09-01', 1, 20.0)
+
+
+def test_queued_save_replays_only_its_own_changes(online, monkeypatch):
+    online.db['products'].insert_many([{'id': 1, 'name': 'Mint'}, {'id': 2, 'name': 'Lemon'}])
+    products = online.load_data('products')
+
+    with monkeypatch.context() as offline:
+        offline.setattr(online, 'ensure_db', lambda: False)
+        products[0]['name'] = 'Double Mint'
+        assert online.save_data('products', products + [{'id': 4, 'name': 'Grape'}])
+    assert sync_queue.has_pending()
+    # Another terminal adds a product during the outage
+    online.db['products'].insert_one({'id': 3, 'name': 'Coal'})
+
+    assert online.drain_sync_queue() == 0
+    names = {product['id']: product['name'] for product in online.db['products'].find()}
+    assert names == {1: 'Double Mint', 2: 'Lemon', 3: 'Coal', 4: 'Grape'}
+
+
+def test_offline_save_is_diffed_against_the_local_copy(online, monkeypatch):
+    json_journal.record_save('products', [{'id': 1, 'name': 'Mint'}])
+    online.db['products'].insert_many([{'id': 1, 'name': 'Mint'}, {'id': 2, 'name': 'Coal'}])
+    with monkeypatch.context() as offline:
+        offline.setattr(online, 'ensure_db', lambda: False)
+        products = online.load_data('products')
+        assert online.save_data('products', products + [{'id': 3, 'name': 'Grape'}])
+
+    assert online.drain_sync_queue() == 0
+    assert sorted(product['id'] for product in online.db['products'].find()) == [1, 2, 3]
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import customtkinter as ctk
+from PIL import Image
+from constants import THUMBNAIL_CACHE_PATH, THUMBNAIL_CACHE_SIZE
+from data_worker import data_worker
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Product thumbnails
+# Scaled copies of product images are kept on disk (THUMBNAIL_CACHE_PATH) and
+# the CTkImages built from them in a small in-memory LRU, both keyed by
+# (path, mtime, size), so list screens never decode full-size photos again
+# and an edited image file gets a fresh thumbnail.
+
+LIST_SIZE = (50, 50)
+PREVIEW_SIZE = (100, 100)
+
+_lock = threading.Lock()
+_images = OrderedDict()  # (path, mtime_ns, size) -> CTkImage, or None if unreadable
+
+
+def _cache_key(image_path, size):
+    """(absolute path, mtime, size), or None if the file is missing"""
+    try:
+        path = os.path.abspath(image_path)
+        return (path, os.stat(path).st_mtime_ns, tuple(size))
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def _disk_path(key):
+    path, mtime_ns, (width, height) = key
+    digest = hashlib.sha1(f"{path}|{mtime_ns}".encode('utf-8')).hexdigest()
+    return os.path.join(THUMBNAIL_CACHE_PATH, f"{digest}_{width}x{height}.png")
+
+
+def _scaled_image(key):
+    """PIL thumbnail for key, from the disk cache or made from the original"""
+    disk_path = _disk_path(key)
+    if os.path.exists(disk_path):
+        with Image.open(disk_path) as cached:
+            cached.load()
+            return cached
+    path, _, size = key
+    with Image.open(path) as original:
+        # Let JPEG decode at a reduced scale instead of full resolution
+        original.draft('RGB', size)
+        image = original.copy()
+    image.thumbnail(size)
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+        image = image.convert('RGB')
+    os.makedirs(THUMBNAIL_CACHE_PATH, exist_ok=True)
+    tmp_path = f"{disk_path}.{threading.get_ident()}.tmp"
+    image.save(tmp_path, format='PNG')
+    os.replace(tmp_path, disk_path)
+    return image
+
+
+def get_thumbnail(image_path, size=LIST_SIZE):
+    """CTkImage of an image scaled to size, or None if it cannot be read"""
+    key = _cache_key(image_path, size)
+    if key is None:
+        return None
+    with _lock:
+        if key in _images:
+            _images.move_to_end(key)
+            return _images[key]
+    try:
+        image = _scaled_image(key)
+        thumbnail = ctk.CTkImage(light_image=image, dark_image=image, size=size)
+    except Exception as e:
+        logger.error("Could not load product image %s: %s", image_path, e)
+        thumbnail = None
+    with _lock:
+        _images[key] = thumbnail
+        while len(_images) > THUMBNAIL_CACHE_SIZE:
+            _images.popitem(last=False)
+    return thumbnail
+
+
+def _write_thumbnails(image_path, sizes):
+    for size in sizes:
+        key = _cache_key(image_path, size)
+        if key is not None and not os.path.exists(_disk_path(key)):
+            _scaled_image(key)
+    return image_path
+
+
+def prefetch(image_path, sizes=(LIST_SIZE, PREVIEW_SIZE)):
+    """Write the disk thumbnails of an image on the data worker; returns the Future"""
+    return data_worker.submit(_write_thumbnails, image_path, sizes)
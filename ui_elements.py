@@ -116,8 +116,40 @@ def create_loading_screen(parent, message="Loading..."):
     progress_bar.set(0)
     progress_bar.start()
     
+    loading_window.message_label = message_label
+    loading_window.progress_bar = progress_bar
     return loading_window
 
+def set_loading_progress(loading_window, done, total, message=None):
+    """Switch a loading screen to a determinate bar showing done/total"""
+    progress_bar = loading_window.progress_bar
+    if progress_bar.cget('mode') != 'determinate':
+        progress_bar.stop()
+        progress_bar.configure(mode='determinate')
+    progress_bar.set(done / total if total else 1)
+    if message is not None:
+        loading_window.message_label.configure(text=message)
+    loading_window.update_idletasks()
+
+def debounce(widget, delay_ms, callback):
+    """Return a function that runs callback once calls stop for delay_ms"""
+    pending = None
+
+    def call(*args):
+        nonlocal pending
+        if pending is not None:
+            widget.after_cancel(pending)
+
+        def run():
+            nonlocal pending
+            pending = None
+            if widget.winfo_exists():
+                callback()
+
+        pending = widget.after(delay_ms, run)
+
+    return call
+
 def create_modern_tooltip(widget, text):
     """Create a modern tooltip for a widget"""
     tooltip = None
@@ -232,6 +264,128 @@ def apply_rtl(widget, is_rtl):
         for child in widget.winfo_children():
             apply_rtl(child, is_rtl)
 
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only creates the rows its height can show.
+
+    create_row(parent) builds one empty row widget and bind_row(row, item)
+    fills it with an item. Scrolling rebinds the same rows to other items,
+    so the number of widgets does not grow with len(items). row_height is
+    a first estimate; it grows to the tallest row actually rendered (wrapped
+    text, images), so the last rows are never clipped.
+    """
+
+    WHEEL_SEQUENCES = ('<MouseWheel>', '<Button-4>', '<Button-5>')
+    ROW_PADY = 5
+
+    def __init__(self, parent, create_row, bind_row, row_height=80, empty_text="", **kwargs):
+        kwargs.setdefault('fg_color', 'transparent')
+        super().__init__(parent, **kwargs)
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_height = row_height
+        self.empty_text = empty_text
+        self.items = []
+        self.first = 0
+        self.rows = []
+        self.shown = 0  # rows currently packed, always a prefix of self.rows
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.body = ctk.CTkFrame(self, fg_color='transparent')
+        self.body.pack(side='left', fill='both', expand=True)
+        self.empty_label = create_styled_label(self.body, text=empty_text, style='body')
+        self.body.bind('<Configure>', lambda event: self._render())
+        # The wheel is bound on a bindtag of this list's own widgets (rows are
+        # tagged as they are created), so it only sees events over the list
+        # and nothing global outlives it
+        self.wheel_tag = f"VirtualListWheel{id(self)}"
+        for sequence in self.WHEEL_SEQUENCES:
+            self.bind_class(self.wheel_tag, sequence, self._on_wheel)
+        self._tag_wheel(self)
+
+    def destroy(self):
+        for sequence in self.WHEEL_SEQUENCES:
+            self.unbind_class(self.wheel_tag, sequence)
+        super().destroy()
+
+    def _tag_wheel(self, widget):
+        """Put the wheel bindtag first on widget and all its descendants"""
+        tags = widget.bindtags()
+        if self.wheel_tag not in tags:
+            widget.bindtags((self.wheel_tag,) + tags)
+        for child in widget.winfo_children():
+            self._tag_wheel(child)
+
+    def set_items(self, items, empty_text=None):
+        """Show a new item list, keeping the scroll position where possible"""
+        self.items = items
+        if empty_text is not None:
+            self.empty_text = empty_text
+        self._render()
+
+    def scroll_to(self, index):
+        self.first = index
+        self._render()
+
+    def _visible_count(self):
+        return max(1, self.body.winfo_height() // self.row_height + 1)
+
+    def _render(self):
+        self.first = max(0, min(self.first, len(self.items) - self._visible_count() + 1))
+        visible = min(self._visible_count(), len(self.items) - self.first)
+        while len(self.rows) < visible:
+            row = self.create_row(self.body)
+            self._tag_wheel(row)
+            self.rows.append(row)
+        for position, row in enumerate(self.rows[:visible]):
+            self.bind_row(row, self.items[self.first + position])
+        # Hidden rows stay a suffix, so re-packing keeps the row order
+        for row in self.rows[self.shown:visible]:
+            row.pack(fill='x', padx=10, pady=self.ROW_PADY)
+        for row in self.rows[visible:self.shown]:
+            row.pack_forget()
+        self.shown = visible
+        measured = self._measure_rows(visible) if visible else 0
+        if measured > self.row_height:
+            # Rows are taller than estimated: show fewer of them per screen
+            self.row_height = measured
+            self._render()
+            return
+
+        if self.items:
+            self.empty_label.pack_forget()
+        else:
+            self.empty_label.configure(text=self.empty_text)
+            self.empty_label.pack(pady=20)
+        total = len(self.items)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self._visible_count()) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _measure_rows(self, count):
+        """Height the first count rows take each, with their padding"""
+        self.body.update_idletasks()
+        return max(row.winfo_reqheight() for row in self.rows[:count]) + 2 * self.ROW_PADY
+
+    def _on_scrollbar(self, action, value, units=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.items)))
+        elif action == 'scroll':
+            step = int(value) * (self._visible_count() if units == 'pages' else 1)
+            self.scroll_to(self.first + step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            step = -1
+        elif event.num == 5:
+            step = 1
+        elif abs(event.delta) >= 120:
+            step = -event.delta // 120
+        else:
+            step = -event.delta
+        self.scroll_to(self.first + step)
+
 class ModernAuthScreens:
     def __init__(self, root, languages, login_callback):
         self.root = root